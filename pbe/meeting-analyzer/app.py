@@ -3,19 +3,37 @@ Flask Web Application for Meeting Analyzer
 Serves the web interface and handles API endpoints
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, g
 from werkzeug.utils import secure_filename
 import os
+import io
 import json
+import hashlib
+import threading
+import time
+import uuid
 from datetime import datetime
 from pathlib import Path
 
+_import_started = time.monotonic()
+
 from config.settings import Config
 from src.clients import APIClients
 from src.transcript_parser import TranscriptParser
 from src.meeting_analyzer import MeetingAnalyzer
-from src.vector_store import VectorStore
+from src.vector_store import LineVectors, VectorStore
+from src.embedding_service import EmbeddingService
 from src.chat_interface import ChatInterface
+from src.meeting_store import MeetingStore
+from src.checkpoints import CheckpointStore, RunInProgress
+from src.transcript import Transcript, merge_speaker_stats
+from src.uploads import UploadRetention, save_stream
+from src.singleflight import SingleFlight, normalize_question
+from src.tracing import tracer
+from src import usage
+from src.task_index import (
+    URGENCY_LEVELS, GlobalTaskIndex, decode_cursor, encode_cursor, parse_deadline, select_tasks
+)
 from src.utils import generate_meeting_id
 
 # Initialize Flask app
@@ -25,28 +43,68 @@ app = Flask(__name__, template_folder='templates', static_folder='static')
 Config.validate()
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'txt', 'json', 'md'}
+ALLOWED_EXTENSIONS = {'txt', 'json', 'md', 'vtt', 'srt'}
+ON_DUPLICATE = ('return', 'alias', 'reanalyze')
 
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Initialize components
-try:
-    clients = APIClients()
-    clients.create_collection_if_not_exists()
-    parser = TranscriptParser(clients.cohere_client)
-    analyzer = MeetingAnalyzer(clients.cohere_client)
-    vector_store = VectorStore(clients.qdrant_client, clients.embedding_model)
-    chat_interface = ChatInterface(clients, vector_store)
-    print("✓ All components initialized successfully")
-except Exception as e:
-    print(f"✗ Error initializing components: {e}")
-    raise
+# Initialize components. Clients and the embedding model are created lazily,
+# so this does no network or model I/O; warm-up loads them in the background
+# and /api/ready reports when it is done.
+clients = APIClients()
+parser = TranscriptParser(clients.deferred('cohere_client'))
+analyzer = MeetingAnalyzer(clients.deferred('cohere_client'))
+embedding_service = EmbeddingService(clients.deferred('embedding_model')) if Config.EMBEDDING_BATCHING_ENABLED else None
+vector_store = VectorStore(clients.deferred('qdrant_client'), clients.deferred('embedding_model'), embedding_service)
+chat_interface = ChatInterface(clients, vector_store)
+
+# Persistent meeting records with an LRU of hot meetings in front
+meeting_store = MeetingStore()
+
+# Per-stage outputs of unfinished analyses, so retried uploads resume
+checkpoints = CheckpointStore()
+
+# Deletes saved uploads past their retention period or the size cap
+upload_retention = UploadRetention(UPLOAD_FOLDER)
+
+# Open tasks across all meetings, kept in step with the store's revisions
+task_index = GlobalTaskIndex(meeting_store)
+
+# Coalesce identical concurrent uploads and questions
+analyze_flight = SingleFlight()
+chat_flight = SingleFlight()
+
+# Appends to one meeting in this process queue on one of these locks (chosen
+# by meeting id); across workers the store's append claim turns them away
+append_locks = [threading.Lock() for _ in range(64)]
 
-# Store active meetings in memory (in production, use database)
-active_meetings = {}
+
+@app.before_request
+def start_request_trace():
+    g.request_start = time.perf_counter()
+    wants_trace = Config.TRACE_ALL_REQUESTS or request.args.get('trace') == '1' or request.headers.get('X-Trace')
+    tracer.begin_request(f"{request.method} {request.path}" if wants_trace else None)
+
+
+@app.after_request
+def finish_request_trace(response):
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    trace = tracer.end_request(
+        f"http {request.method} {rule}",
+        time.perf_counter() - g.get('request_start', time.perf_counter()),
+        error=response.status_code >= 500
+    )
+    if trace is not None:
+        response.headers['X-Trace-Id'] = trace['trace_id']
+    return response
+
+
+clients.startup_times['app_import'] = round(time.monotonic() - _import_started, 3)
+if Config.WARM_UP_ON_START:
+    clients.start_warm_up()
 
 
 def allowed_file(filename):
@@ -54,26 +112,397 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def read_transcript_file(filepath):
-    """Read transcript from file"""
+def upload_path(original):
+    """
+    (name, path) to save an upload under: unique per upload (a uuid4 after the
+    timestamp), so two same-name uploads never share a file
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{timestamp}_{uuid.uuid4().hex}_{secure_filename(original)}"
+    return filename, os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+
+def pagination_args():
+    """Parse limit/cursor query parameters. Raises ValueError on bad input."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # If JSON, extract transcript text
-        if filepath.endswith('.json'):
-            try:
-                data = json.loads(content)
-                if isinstance(data, dict) and 'transcript' in data:
-                    return data['transcript']
-                elif isinstance(data, dict) and 'text' in data:
-                    return data['text']
-            except json.JSONDecodeError:
-                pass
-        
-        return content
-    except Exception as e:
-        raise Exception(f"Error reading file: {str(e)}")
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= 200:
+        raise ValueError('limit must be between 1 and 200')
+    return limit, request.args.get('cursor') or None
+
+
+def hash_file(filepath, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_tasks(summary):
+    """Task dicts (owner, deadline, urgency, tags, ...) from the action items of an LLM summary"""
+    tasks = []
+    if isinstance(summary.get('action_items'), list):
+        for item in summary.get('action_items', []):
+            if isinstance(item, dict):
+                # Keep the full object structure with owner, deadline, urgency_reason, and tags
+                tasks.append({
+                    'task': item.get('task', str(item)),
+                    'owner': item.get('owner', 'Unassigned'),
+                    'deadline': item.get('deadline', 'No deadline'),
+                    'urgency_reason': item.get('urgency_reason', ''),
+                    'urgency': item.get('urgency', 'medium'),
+                    'tags': item.get('tags', [])
+                })
+            else:
+                tasks.append({
+                    'task': str(item),
+                    'owner': 'Unassigned',
+                    'deadline': 'No deadline',
+                    'urgency_reason': '',
+                    'urgency': 'medium',
+                    'tags': []
+                })
+    elif isinstance(summary.get('action_items'), str):
+        tasks = [{
+            'task': summary.get('action_items'),
+            'owner': 'Unassigned',
+            'deadline': 'No deadline',
+            'urgency_reason': '',
+            'urgency': 'medium',
+            'tags': []
+        }]
+    return tasks
+
+
+def extract_topics(summary):
+    """Topic strings from an LLM summary"""
+    topics = []
+    if isinstance(summary.get('key_topics'), list):
+        topics = summary.get('key_topics', [])
+    elif isinstance(summary.get('topics_discussed'), list):
+        topics = summary.get('topics_discussed', [])
+    elif isinstance(summary.get('key_topics'), str):
+        topics = [summary.get('key_topics')]
+    
+    # Fallback: extract from summary text if no topics found
+    if not topics and summary.get('summary'):
+        # Simple extraction - split by common delimiters
+        summary_text = summary.get('summary', '')
+        if 'topic' in summary_text.lower():
+            topics = ['General Discussion']
+    
+    # Ensure topics are lists of strings
+    return [str(t) for t in topics if t]
+
+
+def run_analysis(filepath, filename, team_id=None, content_hash=None):
+    """
+    Run the full analysis pipeline on a saved upload and register the meeting.
+    An earlier failed attempt on the same content resumes from its checkpoints.
+    """
+    run = checkpoints.open_run(content_hash or hash_file(filepath), generate_meeting_id(), filename, team_id)
+    meeting_id = run.meeting_id
+    tracer.tag_request(meeting_id=meeting_id)
+    if run.resumed:
+        print(f"Resuming analysis of meeting {meeting_id} (attempt {run.attempts})")
+    
+    # Earlier attempts' tokens count against the meeting's budget too
+    spent_tokens, spent_cost = run.usage_spent()
+    try:
+        with usage.track(meeting_id, '/api/analyze', spent_tokens, spent_cost) as ledger:
+            meeting_data = analyze_upload(run, filepath, filename, team_id)
+    except Exception:
+        run.release()
+        raise
+    finally:
+        # Usage rows reference the meeting, so every attempt's (failed ones
+        # too) is kept on the run until the meeting is saved
+        run.add_usage(ledger.rows())
+    
+    meeting_store.add_usage(meeting_id, run.usage_rows())
+    run.finish()
+    chat_interface.prepare_meeting(meeting_data)
+    meeting_data['usage'] = ledger.summary()
+    return meeting_data
+
+
+def analyze_upload(run, filepath, filename, team_id=None):
+    """
+    Parse, analyze, embed and store one uploaded transcript as run.meeting_id
+
+    Each stage's output is checkpointed on `run` as it completes (sentiment and
+    urgency also part-way), and stages already checkpointed are skipped.
+    """
+    meeting_id = run.meeting_id
+    created_at = datetime.fromisoformat(run.created_at)
+    
+    # Parse into a columnar Transcript. The file (its hash keys the run) is
+    # parsed again on a retry, so only the entry count is checkpointed.
+    with run.stage('parse'):
+        print(f"Parsing transcript (Meeting ID: {meeting_id})...")
+        transcript = Transcript.from_entries(parser.iter_file(filepath))
+        parsed = run.load('parse')
+        if parsed is not None and parsed != {'entries': len(transcript)}:
+            # Parsed differently than last time (the parser changed); later stages are stale
+            run.invalidate('parse')
+            parsed = None
+        if parsed is None:
+            run.save('parse', {'entries': len(transcript)})
+    
+    # Sentiment per line, resuming after the last saved score
+    with run.stage('sentiment'):
+        if run.load('sentiment') is None:
+            scores = run.load_partial('sentiment') or []
+            for i, score in enumerate(scores):
+                transcript.set_sentiment(i, score)
+            remaining = (transcript.entry(i) for i in range(len(scores), len(transcript)))
+            saved = len(scores)
+            for i, entry in enumerate(parser.iter_sentiment(remaining, total=len(transcript) - len(scores)), len(scores)):
+                transcript.set_sentiment(i, entry['sentiment'])
+                if (i + 1) % Config.CHECKPOINT_SAVE_EVERY == 0:
+                    # Only the scores since the last save; load_partial() joins the slices
+                    run.save_slice('sentiment', saved, transcript.sentiment_values(saved, i + 1))
+                    saved = i + 1
+            run.save('sentiment', transcript.sentiment_values())
+        else:
+            for i, score in enumerate(run.load('sentiment')):
+                transcript.set_sentiment(i, score)
+    
+    # Analyze meeting
+    with run.stage('summary'):
+        summary = run.load('summary')
+        if summary is None:
+            print("Analyzing meeting...")
+            summary = analyzer.generate_summary(transcript)
+            run.save('summary', summary)
+    
+    with run.stage('urgency'):
+        labels = run.load('urgency')
+        if labels is None:
+            labels = analyzer.add_urgency(
+                summary, run.load_partial('urgency'),
+                on_label=lambda done: run.save_slice('urgency', len(done) - 1, done[-1:])
+            )
+            run.save('urgency', labels)
+        else:
+            analyzer.add_urgency(summary, labels)
+    
+    # Per-speaker talk time, turn counts and mean sentiment
+    speakers = transcript.speaker_stats()
+    
+    # Extract tasks and topics - handle different formats
+    tasks = extract_tasks(summary)
+    topics = extract_topics(summary)
+    
+    # Line, segment and meeting vectors. Embedded INGEST_BATCH_SIZE lines at
+    # a time; point ids are stable, so a retry overwrites what it stored before.
+    with run.stage('embedding'):
+        stored = run.load('embedding')
+        if stored is None:
+            print(f"Storing in vector database (Meeting ID: {meeting_id})...")
+            line_vectors = vector_store.store_transcript_in_qdrant(
+                iter(transcript), meeting_id, team_id=team_id, meeting_ts=created_at.timestamp()
+            )
+            vector_store.store_meeting_vectors(
+                meeting_id,
+                summary.get('summary') or summary.get('executive_summary', ''),
+                topics,
+                line_vectors,
+                team_id=team_id,
+                meeting_ts=created_at.timestamp()
+            )
+            stored = {
+                'points': line_vectors.count,
+                'centroid': line_vectors.centroid(),
+                'centroid_norm': line_vectors.centroid_norm()
+            }
+            run.save('embedding', stored)
+    
+    # Store meeting data
+    meeting_data = {
+        'meeting_id': meeting_id,
+        'timestamp': created_at.isoformat(),
+        'filename': filename,
+        'team_id': team_id,
+        'content_hash': run.content_hash,
+        'transcript': transcript,
+        'summary': {
+            'summary_text': summary.get('summary') or summary.get('executive_summary', ''),
+            'duration': f"{len(transcript)} entries",
+            'participants': len(speakers),
+            'key_focus': summary.get('key_focus', '')
+        },
+        'sentiment': {speaker: speakers[speaker]['sentiment'] for speaker in speakers},
+        'speakers': speakers,
+        'tasks': tasks,
+        'topics': topics,
+        'entities': [str(e) for e in summary.get('named_entities', []) if e],
+        'duration_seconds': transcript.duration_seconds(),
+        'centroid': stored['centroid'],
+        'centroid_norm': stored.get('centroid_norm')
+    }
+    
+    meeting_store.save(meeting_data)
+    return meeting_data
+
+
+def reuse_analysis(content_hash, filename, team_id=None, on_duplicate='return'):
+    """
+    An earlier analysis of the same content in place of a new one
+
+    With on_duplicate='return' the team's newest meeting of this content is
+    returned as it is; with 'alias', or when only another team has analyzed it
+    (teams' meetings stay separate), it is copied under a new meeting id.
+    Returns (meeting record, 'existing' or 'alias'), or (None, None) if there
+    is nothing to reuse or on_duplicate is 'reanalyze'.
+    """
+    if on_duplicate == 'reanalyze':
+        return None, None
+    meetings = [meeting_store.get(meeting_id) for meeting_id in reversed(meeting_store.find_by_content(content_hash))]
+    meetings = [meeting for meeting in meetings if meeting is not None]
+    if not meetings:
+        return None, None
+    
+    own = next((meeting for meeting in meetings if meeting.get('team_id') == team_id), None)
+    if own is not None and on_duplicate == 'return':
+        tracer.tag_request(meeting_id=own['meeting_id'])
+        return own, 'existing'
+    return alias_meeting((own or meetings[0])['meeting_id'], filename, team_id, content_hash), 'alias'
+
+
+def alias_meeting(source_id, filename, team_id=None, content_hash=None):
+    """
+    Copy an analyzed meeting (record, transcript, tasks and vectors) under a
+    new meeting id for another upload of the same content, without any
+    parsing, LLM or embedding calls
+    """
+    meeting_id = generate_meeting_id()
+    created_at = datetime.now()
+    tracer.tag_request(meeting_id=meeting_id)
+    source = meeting_store.get(source_id, include_transcript=True)
+    
+    vector_store.copy_meeting(source_id, meeting_id, team_id=team_id, meeting_ts=created_at.timestamp())
+    meeting_data = dict(
+        source,
+        meeting_id=meeting_id,
+        timestamp=created_at.isoformat(),
+        filename=filename,
+        team_id=team_id,
+        content_hash=content_hash,
+        alias_of=source.get('alias_of') or source_id,
+        tasks=[dict(task) for task in source['tasks']]
+    )
+    meeting_store.save(meeting_data)
+    chat_interface.prepare_meeting(meeting_data)
+    print(f"Aliased meeting {source_id} as {meeting_id}")
+    return meeting_data
+
+
+def analyze_or_reuse(filepath, filename, team_id=None, content_hash=None, on_duplicate='return'):
+    """(meeting record, how it was reused or None if it was analyzed now)"""
+    meeting_data, reused = reuse_analysis(content_hash, filename, team_id, on_duplicate)
+    if meeting_data is None:
+        meeting_data = run_analysis(filepath, filename, team_id=team_id, content_hash=content_hash)
+    return meeting_data, reused
+
+
+def append_to_meeting(meeting, first_index, claim, delta):
+    """
+    Merge turns appended to a stored meeting into it, doing work only for them
+
+    The new turns (a Transcript) are scored and embedded after the
+    `first_index` stored ones; a summary of them, written knowing the
+    meeting's summary so far, replaces the executive summary and adds its new
+    action items, topics and entities; speaker stats and task indexes are
+    updated from the new turns and tasks alone. `claim` is the store's
+    claim_append() for this append. Returns the updated record and the new
+    tasks, or (None, None) if the claim was lost meanwhile. If a step fails,
+    the vectors stored for the new turns are removed again.
+    """
+    meeting_id = meeting['meeting_id']
+    meeting_ts = datetime.fromisoformat(meeting['timestamp']).timestamp()
+    
+    try:
+        updated, new_tasks = _append_to_meeting(meeting, first_index, claim, delta, meeting_ts)
+    except Exception:
+        vector_store.delete_appended(meeting_id, first_index, len(delta))
+        vector_store.store_meeting_vectors(
+            meeting_id, meeting['summary'].get('summary_text', ''), meeting['topics'], LineVectors(),
+            team_id=meeting.get('team_id'), meeting_ts=meeting_ts
+        )
+        raise
+    if updated is not None:
+        chat_interface.prepare_meeting(updated)
+    return updated, new_tasks
+
+
+def _append_to_meeting(meeting, first_index, claim, delta, meeting_ts):
+    meeting_id = meeting['meeting_id']
+    
+    for i, entry in enumerate(parser.iter_sentiment(iter(delta), total=len(delta))):
+        delta.set_sentiment(i, entry['sentiment'])
+    
+    update = analyzer.update_summary({
+        'executive_summary': meeting['summary'].get('summary_text', ''),
+        'action_items': meeting['tasks'],
+        'topics_discussed': meeting['topics'],
+        'named_entities': meeting.get('entities', [])
+    }, delta)
+    # Action items the meeting already has are dropped before urgency is computed
+    known = {str(task.get('task', '')).strip().casefold() for task in meeting['tasks']}
+    if isinstance(update.get('action_items'), list):
+        update['action_items'] = [
+            item for item in update['action_items']
+            if str(item.get('task', item) if isinstance(item, dict) else item).strip().casefold() not in known
+        ]
+    analyzer.add_urgency(update)
+    new_tasks = extract_tasks(update)
+    
+    topics = list(meeting['topics'])
+    seen = {topic.casefold() for topic in topics}
+    for topic in extract_topics(update):
+        if topic.casefold() not in seen:
+            seen.add(topic.casefold())
+            topics.append(topic)
+    entities = list(meeting.get('entities', []))
+    entities += [str(e) for e in update.get('named_entities', []) if e and str(e) not in entities]
+    summary_text = update.get('summary') or update.get('executive_summary') or meeting['summary'].get('summary_text', '')
+    speakers = merge_speaker_stats(meeting['speakers'], delta.speaker_stats())
+    
+    # New line vectors continue the meeting's point ids and centroid
+    print(f"Storing {len(delta)} appended entries in vector database (Meeting ID: {meeting_id})...")
+    line_vectors = vector_store.store_transcript_in_qdrant(
+        iter(delta), meeting_id, team_id=meeting.get('team_id'), meeting_ts=meeting_ts,
+        line_vectors=LineVectors.resume(first_index, meeting.get('centroid'), meeting.get('centroid_norm'))
+    )
+    vector_store.store_meeting_vectors(
+        meeting_id, summary_text, topics, line_vectors, team_id=meeting.get('team_id'), meeting_ts=meeting_ts
+    )
+    
+    updated = meeting_store.append(meeting_id, claim, delta, {
+        'summary': dict(
+            meeting['summary'],
+            summary_text=summary_text,
+            duration=f"{line_vectors.count} entries",
+            participants=len(speakers)
+        ),
+        'sentiment': {speaker: speakers[speaker]['sentiment'] for speaker in speakers},
+        'speakers': speakers,
+        'topics': topics,
+        'entities': entities,
+        'duration_seconds': max(meeting.get('duration_seconds') or 0, delta.duration_seconds()),
+        'centroid': line_vectors.centroid(),
+        'centroid_norm': line_vectors.centroid_norm(),
+        # No longer the analysis of just its upload, so re-uploads don't reuse it
+        'content_hash': None
+    }, new_tasks)
+    if updated is None:
+        return None, None
+    return updated, new_tasks
 
 
 # Routes
@@ -88,8 +517,15 @@ def analyze_transcript():
     """
     Analyze uploaded transcript
     
-    Expected: multipart/form-data with 'file' field
+    Expected: multipart/form-data with 'file' field (optional 'team_id' field)
     Returns: JSON with analysis results
+    
+    Content that was analyzed before is not analyzed again: the optional
+    'on_duplicate' field ('return', 'alias' or 'reanalyze'; default
+    UPLOAD_ON_DUPLICATE) picks between the existing meeting, a copy of it
+    under a new meeting id, and a fresh analysis. `deduplicated` in the
+    response says which happened ('existing', 'alias' or null). While another
+    worker is analyzing the same content for the same team, the response is a 409.
     """
     try:
         # Check if file is present
@@ -104,173 +540,53 @@ def analyze_transcript():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed'}), 400
         
-        # Save file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Read transcript
-        transcript_text = read_transcript_file(filepath)
-        
-        # Parse transcript
-        print("Parsing transcript...")
-        transcript = parser.parse_transcript_with_timestamps(transcript_text)
-        
-        # Add sentiment analysis
-        transcript = parser.add_sentiment_analysis(transcript)
-        
-        # Analyze meeting
-        print("Analyzing meeting...")
-        summary = analyzer.analyze_meeting(transcript)
-        
-        # Generate meeting ID and store
-        meeting_id = generate_meeting_id()
-        print(f"Storing in vector database (Meeting ID: {meeting_id})...")
-        stored_points = vector_store.store_transcript_in_qdrant(transcript, meeting_id)
-        
-        # Extract speakers
-        speakers = {}
-        for entry in transcript:
-            # Handle both 'speaker' and 'speaker_name' keys
-            speaker = entry.get('speaker_name') or entry.get('speaker') or 'Unknown'
-            if speaker not in speakers:
-                speakers[speaker] = {
-                    'duration': 0,
-                    'segments': 0,
-                    'sentiment': 0,
-                    'sentiment_count': 0
-                }
-            speakers[speaker]['segments'] += 1
-            
-            # Handle duration - convert to float if string
-            duration = entry.get('duration', 0)
-            if isinstance(duration, str):
-                try:
-                    duration = float(duration)
-                except (ValueError, TypeError):
-                    duration = 0
-            speakers[speaker]['duration'] += duration
-            
-            # Handle sentiment - convert to float if string
-            sentiment = entry.get('sentiment', 0)
-            if isinstance(sentiment, str):
-                try:
-                    sentiment = float(sentiment)
-                except (ValueError, TypeError):
-                    sentiment = 0
-            elif sentiment is None:
-                sentiment = 0
-            
-            speakers[speaker]['sentiment'] += sentiment
-            speakers[speaker]['sentiment_count'] += 1
-        
-        # Calculate average sentiment per speaker and add sentiment label
-        for speaker in speakers:
-            if speakers[speaker]['sentiment_count'] > 0:
-                speakers[speaker]['sentiment'] = round(
-                    speakers[speaker]['sentiment'] / speakers[speaker]['sentiment_count'], 2
-                )
-            speakers[speaker]['duration'] = round(speakers[speaker]['duration'], 2)
-            
-            # Add sentiment label (Positive, Negative, Neutral)
-            sentiment_score = speakers[speaker]['sentiment']
-            if sentiment_score > 0.3:
-                speakers[speaker]['sentiment_label'] = 'Positive'
-            elif sentiment_score < -0.3:
-                speakers[speaker]['sentiment_label'] = 'Negative'
-            else:
-                speakers[speaker]['sentiment_label'] = 'Neutral'
+        team_id = request.form.get('team_id', '').strip() or None
+        on_duplicate = request.form.get('on_duplicate', '').strip() or Config.UPLOAD_ON_DUPLICATE
+        if on_duplicate not in ON_DUPLICATE:
+            return jsonify({'error': f"on_duplicate must be one of: {', '.join(ON_DUPLICATE)}"}), 400
+        
+        # Save file, hashing it as it is written
+        filename, filepath = upload_path(file.filename)
+        with upload_retention.hold(filepath):
+            content_hash, _ = save_stream(file.stream, filepath)
             
-            # Remove temporary count
-            del speakers[speaker]['sentiment_count']
-        
-        # Extract tasks and topics - handle different formats
-        tasks = []
-        topics = []
-        
-        # Extract tasks/action items with full structure including tags
-        if isinstance(summary.get('action_items'), list):
-            for item in summary.get('action_items', []):
-                if isinstance(item, dict):
-                    # Keep the full object structure with owner, deadline, urgency_reason, and tags
-                    tasks.append({
-                        'task': item.get('task', str(item)),
-                        'owner': item.get('owner', 'Unassigned'),
-                        'deadline': item.get('deadline', 'No deadline'),
-                        'urgency_reason': item.get('urgency_reason', ''),
-                        'urgency': item.get('urgency', 'medium'),
-                        'tags': item.get('tags', [])
-                    })
-                else:
-                    tasks.append({
-                        'task': str(item),
-                        'owner': 'Unassigned',
-                        'deadline': 'No deadline',
-                        'urgency_reason': '',
-                        'urgency': 'medium',
-                        'tags': []
-                    })
-        elif isinstance(summary.get('action_items'), str):
-            tasks = [{
-                'task': summary.get('action_items'),
-                'owner': 'Unassigned',
-                'deadline': 'No deadline',
-                'urgency_reason': '',
-                'urgency': 'medium',
-                'tags': []
-            }]
-        
-        # Extract topics
-        if isinstance(summary.get('key_topics'), list):
-            topics = summary.get('key_topics', [])
-        elif isinstance(summary.get('topics_discussed'), list):
-            topics = summary.get('topics_discussed', [])
-        elif isinstance(summary.get('key_topics'), str):
-            topics = [summary.get('key_topics')]
-        
-        # Fallback: extract from summary text if no topics found
-        if not topics and summary.get('summary'):
-            # Simple extraction - split by common delimiters
-            summary_text = summary.get('summary', '')
-            if 'topic' in summary_text.lower():
-                topics = ['General Discussion']
-        
-        # Ensure topics are lists of strings
-        topics = [str(t) for t in topics if t]
-        
-        # Store meeting data
-        meeting_data = {
-            'meeting_id': meeting_id,
-            'timestamp': datetime.now().isoformat(),
-            'filename': filename,
-            'transcript': transcript,
-            'summary': {
-                'summary_text': summary.get('summary', ''),
-                'duration': f"{len(transcript)} entries",
-                'participants': len(speakers),
-                'key_focus': summary.get('key_focus', '')
-            },
-            'sentiment': {speaker: speakers[speaker]['sentiment'] for speaker in speakers},
-            'speakers': speakers,
-            'tasks': tasks,
-            'topics': topics
-        }
+            # Identical uploads in flight share one analysis
+            (meeting_data, reused), coalesced = analyze_flight.do(
+                ('analyze', content_hash, team_id, on_duplicate),
+                lambda: analyze_or_reuse(filepath, filename, team_id, content_hash, on_duplicate)
+            )
+        if coalesced:
+            print(f"Coalesced duplicate upload into meeting {meeting_data['meeting_id']}")
+        if reused:
+            print(f"Upload matches meeting {meeting_data['meeting_id']} ({reused})")
+            # The analysis already exists; this copy of the file is not needed
+            try:
+                os.remove(filepath)
+            except FileNotFoundError:
+                pass
         
-        active_meetings[meeting_id] = meeting_data
+        try:
+            upload_retention.maybe_collect()
+        except OSError as e:
+            print(f"⚠ Upload cleanup failed: {e}")
         
         # Return results
         return jsonify({
-            'meeting_id': meeting_id,
+            'meeting_id': meeting_data['meeting_id'],
             'summary': meeting_data['summary'],
             'sentiment': meeting_data['sentiment'],
             'speakers': meeting_data['speakers'],
-            'tasks': tasks,
-            'topics': topics,
+            'tasks': meeting_data['tasks'],
+            'topics': meeting_data['topics'],
+            # A reused analysis costs this request nothing
+            'usage': dict(usage.summarize([]), degraded=[]) if reused else meeting_data['usage'],
+            'coalesced': coalesced,
+            'deduplicated': reused,
             'status': 'success'
         }), 200
         
+    except RunInProgress as e:
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
         print(f"Error in analyze_transcript: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -284,7 +600,9 @@ def chat():
     Expected JSON:
     {
         "meeting_id": "string",
-        "question": "string"
+        "question": "string",
+        "user_id": "string (optional, keys the conversation history)",
+        "reset_history": false
     }
     
     Returns: JSON with answer and validation status
@@ -306,7 +624,9 @@ def chat():
             }), 400
         
         meeting_id = data.get('meeting_id', '').strip()
+        tracer.tag_request(meeting_id=meeting_id)
         question = data.get('question', '').strip()
+        user_id = str(data.get('user_id') or 'anonymous').strip()
         
         # Validate inputs
         if not meeting_id:
@@ -327,18 +647,24 @@ def chat():
                 'status': 'error'
             }), 400
         
-        if meeting_id not in active_meetings:
+        meeting_data = meeting_store.get(meeting_id, include_transcript=True)
+        if meeting_data is None:
             return jsonify({
-                'error': f'Meeting "{meeting_id}" not found. Available meetings: {list(active_meetings.keys())}',
+                'error': f'Meeting "{meeting_id}" not found. Available meetings: {meeting_store.ids()}',
                 'status': 'error'
             }), 404
         
         # Get answer using chat interface
         print(f"Processing question for meeting {meeting_id}: {question}")
-        meeting_data = active_meetings[meeting_id]
         
-        # Check if question is meeting-related
-        is_related, validation_reason = chat_interface.is_meeting_related_question(question, meeting_data)
+        if data.get('reset_history'):
+            chat_interface.sessions.reset(meeting_id, user_id)
+        session = chat_interface.sessions.get(meeting_id, user_id)
+        
+        # Check if question is meeting-related (follow-ups are scored with the previous question)
+        is_related, validation_reason = chat_interface.is_meeting_related_question(
+            question, meeting_data, session.last_question()
+        )
         
         if not is_related:
             return jsonify({
@@ -349,16 +675,40 @@ def chat():
                 'status': 'success'
             }), 200
         
-        # Get answer with semantic search
-        answer = chat_interface.chat_with_transcript(
-            question,
-            meeting_data,
-            use_semantic_search=True
-        )
+        # Identical questions in flight share one answer. Answers depend on
+        # conversation history, so only fresh sessions share across users.
+        if session.last_question() is None:
+            flight_key = ('chat', meeting_id, normalize_question(question))
+        else:
+            flight_key = ('chat', meeting_id, user_id, normalize_question(question))
+        
+        # Get answer with semantic search (tokens count against the meeting's budget)
+        spent_tokens, spent_cost = meeting_store.usage_spent(meeting_id)
+        try:
+            with usage.track(meeting_id, '/api/chat', spent_tokens, spent_cost) as ledger:
+                answer, coalesced = chat_flight.do(
+                    flight_key,
+                    lambda: chat_interface.chat_with_transcript(
+                        question,
+                        meeting_data,
+                        use_semantic_search=True,
+                        session=session,
+                        record_turn=False,
+                        validated=True
+                    )
+                )
+                chat_interface.sessions.record_turn(session, question, answer)
+        finally:
+            # Tokens spent on a failed answer count too
+            meeting_store.add_usage(meeting_id, ledger.rows())
         
         return jsonify({
             'answer': answer,
             'meeting_id': meeting_id,
+            'user_id': user_id,
+            'turn': session.turn_count,
+            'coalesced': coalesced,
+            'usage': ledger.summary(),
             'is_meeting_related': True,
             'status': 'success'
         }), 200
@@ -373,6 +723,297 @@ def chat():
         }), 500
 
 
+@app.route('/api/chat/history', methods=['DELETE'])
+def reset_chat_history():
+    """
+    Clear the conversation history for a meeting and user
+    
+    Expected JSON:
+    {
+        "meeting_id": "string",
+        "user_id": "string (optional)"
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    meeting_id = str(data.get('meeting_id', '')).strip()
+    user_id = str(data.get('user_id') or 'anonymous').strip()
+    
+    if not meeting_id:
+        return jsonify({
+            'error': 'meeting_id is required',
+            'status': 'error'
+        }), 400
+    
+    cleared = chat_interface.sessions.reset(meeting_id, user_id)
+    return jsonify({
+        'meeting_id': meeting_id,
+        'user_id': user_id,
+        'cleared': cleared,
+        'status': 'success'
+    }), 200
+
+
+def parse_time_filter(value, name):
+    """ISO datetime or Unix seconds -> Unix seconds. Raises ValueError."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO datetime or Unix timestamp')
+
+
+@app.route('/search', methods=['POST'])
+@app.route('/api/search', methods=['POST'])
+def search():
+    """
+    Semantic search across meetings
+    
+    Expected JSON:
+    {
+        "query": "string",
+        "meeting_id": "string (optional)",
+        "meeting_ids": ["string", ...] (optional),
+        "team_id": "string (optional)",
+        "speaker": "string" or "speakers": ["string", ...] (optional),
+        "start_time": "ISO datetime (optional, meeting time)",
+        "end_time": "ISO datetime (optional, meeting time)",
+        "start_offset": seconds from meeting start (optional),
+        "end_offset": seconds from meeting start (optional),
+        "last_minutes": only the final N minutes (optional, single meeting only),
+        "top_k": 10,
+        "cursor": "next_cursor from the previous page (optional)",
+        "mode": "flat" or "two_stage" (meeting/segment vectors first, then lines)
+    }
+    
+    Returns: Hits grouped by meeting, best-scoring meeting first
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                'error': 'Invalid JSON',
+                'status': 'error'
+            }), 400
+        
+        query = str(data.get('query', '')).strip()
+        if not query:
+            return jsonify({
+                'error': 'query is required',
+                'status': 'error'
+            }), 400
+        
+        meeting_ids = list(data.get('meeting_ids') or [])
+        if data.get('meeting_id'):
+            meeting_ids.append(data['meeting_id'])
+        speakers = list(data.get('speakers') or [])
+        if data.get('speaker'):
+            speakers.append(data['speaker'])
+        
+        try:
+            top_k = int(data.get('top_k', 10))
+            if not 1 <= top_k <= 100:
+                raise ValueError
+        except (TypeError, ValueError):
+            return jsonify({
+                'error': 'top_k must be an integer between 1 and 100',
+                'status': 'error'
+            }), 400
+        
+        try:
+            start_ts = parse_time_filter(data.get('start_time'), 'start_time')
+            end_ts = parse_time_filter(data.get('end_time'), 'end_time')
+            offset = decode_cursor(data['cursor'], (int,))[0] if data.get('cursor') else 0
+            start_offset = int(data['start_offset']) if data.get('start_offset') is not None else None
+            end_offset = int(data['end_offset']) if data.get('end_offset') is not None else None
+            last_minutes = float(data['last_minutes']) if data.get('last_minutes') is not None else None
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': str(e),
+                'status': 'error'
+            }), 400
+        
+        if last_minutes is not None:
+            if len(meeting_ids) != 1:
+                return jsonify({
+                    'error': 'last_minutes requires exactly one meeting_id',
+                    'status': 'error'
+                }), 400
+            meeting = meeting_store.get(meeting_ids[0])
+            if meeting is None:
+                return jsonify({
+                    'error': f'Meeting "{meeting_ids[0]}" not found',
+                    'status': 'error'
+                }), 404
+            start_offset = max(0, int(meeting.get('duration_seconds', 0) - last_minutes * 60))
+        
+        mode = data.get('mode', 'flat')
+        if mode not in ('flat', 'two_stage'):
+            return jsonify({
+                'error': 'mode must be "flat" or "two_stage"',
+                'status': 'error'
+            }), 400
+        search_fn = vector_store.search_two_stage if mode == 'two_stage' else vector_store.search_transcripts
+        
+        results, has_more = search_fn(
+            query,
+            meeting_ids=meeting_ids,
+            team_id=data.get('team_id'),
+            speakers=speakers,
+            start_ts=start_ts,
+            end_ts=end_ts,
+            start_offset=start_offset,
+            end_offset=end_offset,
+            top_k=top_k,
+            offset=offset
+        )
+        
+        # Group hits by meeting, keeping score order within and across groups
+        groups = {}
+        for result in results:
+            payload = result.payload
+            group = groups.get(payload['meeting_id'])
+            if group is None:
+                meeting = meeting_store.get(payload['meeting_id'])
+                group = groups[payload['meeting_id']] = {
+                    'meeting_id': payload['meeting_id'],
+                    'filename': meeting.get('filename') if meeting else None,
+                    'timestamp': meeting.get('timestamp') if meeting else None,
+                    'best_score': result.score,
+                    'hits': []
+                }
+            group['hits'].append({
+                'speaker_name': payload.get('speaker_name'),
+                'text': payload.get('text'),
+                'timestamp': payload.get('timestamp'),
+                'offset_seconds': payload.get('offset_seconds'),
+                'entry_index': payload.get('entry_index'),
+                'score': result.score
+            })
+        
+        return jsonify({
+            'query': query,
+            'mode': mode,
+            'results': list(groups.values()),
+            'total_hits': len(results),
+            'next_cursor': encode_cursor([offset + len(results)]) if has_more else None,
+            'status': 'success'
+        }), 200
+    except Exception as e:
+        print(f"Error in search: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/meetings/<meeting_id>/append', methods=['POST'])
+def append_transcript(meeting_id):
+    """
+    Add turns to an analyzed meeting (a live meeting, a follow-up session)
+    
+    Expected: JSON {"text": "Speaker: line\\nSpeaker: line"}, or multipart/form-data
+    with a 'file' field in any upload format. Lines without a [H:MM:SS] time
+    continue after the meeting's last turn.
+    
+    Only the new turns are parsed, scored and embedded. The summary is
+    updated by summarizing them against the existing one; new action items
+    get urgency levels and are added to the meeting's tasks.
+    
+    Returns: the updated summary, speakers and topics, the new tasks and
+    this request's LLM usage; 409 while another worker is appending to the
+    meeting (send it again). Appends within one worker wait for each other.
+    
+    Example:
+    POST /api/meetings/meeting_123/append {"text": "Dev: I'll ship the fix tomorrow"}
+    """
+    try:
+        if not meeting_store.exists(meeting_id):
+            return jsonify({
+                'error': f'Meeting "{meeting_id}" not found',
+                'status': 'error'
+            }), 404
+        
+        with append_locks[hash(meeting_id) % len(append_locks)]:
+            # Claimed before any work, so a concurrent append can't overwrite
+            # the vectors stored for the same transcript positions
+            claimed = meeting_store.claim_append(meeting_id)
+            if claimed is None:
+                return jsonify({
+                    'error': 'Another append to this meeting is in progress; send it again',
+                    'status': 'error'
+                }), 409
+            first_index, claim = claimed
+            try:
+                meeting = meeting_store.get(meeting_id)
+                if meeting is None:
+                    return jsonify({
+                        'error': f'Meeting "{meeting_id}" not found',
+                        'status': 'error'
+                    }), 404
+                # Untimed lines start a turn after the last one, as within a transcript
+                start_time = (meeting.get('duration_seconds') or 0) + 30 if first_index else 0
+                
+                if 'file' in request.files:
+                    file = request.files['file']
+                    if not allowed_file(file.filename):
+                        return jsonify({'error': 'File type not allowed', 'status': 'error'}), 400
+                    _, filepath = upload_path(file.filename)
+                    with upload_retention.hold(filepath):
+                        save_stream(file.stream, filepath)
+                        try:
+                            delta = Transcript.from_entries(parser.iter_file(filepath, start_time))
+                        finally:
+                            os.remove(filepath)
+                else:
+                    text = (request.get_json(silent=True) or {}).get('text')
+                    if not isinstance(text, str):
+                        return jsonify({'error': 'Provide "text" or a file', 'status': 'error'}), 400
+                    delta = Transcript.from_entries(parser.iter_entries(io.StringIO(text), start_time))
+                
+                if not len(delta):
+                    return jsonify({'error': 'No transcript lines found', 'status': 'error'}), 400
+                
+                tracer.tag_request(meeting_id=meeting_id)
+                spent_tokens, spent_cost = meeting_store.usage_spent(meeting_id)
+                try:
+                    with usage.track(meeting_id, '/api/append', spent_tokens, spent_cost) as ledger:
+                        updated, new_tasks = append_to_meeting(meeting, first_index, claim, delta)
+                finally:
+                    # Tokens spent on a failed or rejected append count too
+                    meeting_store.add_usage(meeting_id, ledger.rows())
+                if updated is None:
+                    return jsonify({
+                        'error': 'The meeting changed while this append was processed; send it again',
+                        'status': 'error'
+                    }), 409
+            finally:
+                # A no-op once append() has released it
+                meeting_store.release_append(meeting_id, claim)
+        
+        return jsonify({
+            'meeting_id': meeting_id,
+            'appended': len(delta),
+            'entries': first_index + len(delta),
+            'summary': updated['summary'],
+            'sentiment': updated['sentiment'],
+            'speakers': updated['speakers'],
+            'new_tasks': new_tasks,
+            'topics': updated['topics'],
+            'usage': ledger.summary(),
+            'status': 'success'
+        }), 200
+        
+    except Exception as e:
+        print(f"Error in append_transcript: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
 @app.route('/api/meetings/<meeting_id>', methods=['GET'])
 def get_meeting(meeting_id):
     """
@@ -384,14 +1025,14 @@ def get_meeting(meeting_id):
     GET /api/meetings/meeting_123
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
-                'available_meetings': list(active_meetings.keys()),
+                'available_meetings': meeting_store.ids(),
                 'status': 'error'
             }), 404
         
-        meeting = active_meetings[meeting_id]
         return jsonify({
             'meeting_id': meeting_id,
             'summary': meeting['summary'],
@@ -401,6 +1042,7 @@ def get_meeting(meeting_id):
             'topics': meeting['topics'],
             'timestamp': meeting['timestamp'],
             'filename': meeting['filename'],
+            'usage': usage.summarize(meeting_store.usage_rows(meeting_id))['total'],
             'status': 'success'
         }), 200
         
@@ -411,6 +1053,116 @@ def get_meeting(meeting_id):
         }), 500
 
 
+@app.route('/api/meetings/<meeting_id>/usage', methods=['GET'])
+def get_meeting_usage(meeting_id):
+    """
+    LLM tokens and cost a meeting has used, per stage, endpoint and provider
+    
+    Counts come from provider responses where available and are estimated
+    otherwise (see `estimated_calls`).
+    
+    Example:
+    GET /api/meetings/meeting_123/usage
+    """
+    try:
+        if not meeting_store.exists(meeting_id):
+            return jsonify({
+                'error': f'Meeting "{meeting_id}" not found',
+                'status': 'error'
+            }), 404
+        
+        summary = usage.summarize(meeting_store.usage_rows(meeting_id))
+        return jsonify(dict(
+            summary,
+            meeting_id=meeting_id,
+            budget=usage.budget_status(summary['total']),
+            status='success'
+        )), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/usage', methods=['GET'])
+def get_usage():
+    """LLM tokens and cost across all meetings, per stage, endpoint and provider"""
+    try:
+        summary = usage.summarize(meeting_store.usage_rows())
+        return jsonify(dict(summary, meetings=meeting_store.count(), status='success')), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/checkpoints', methods=['GET'])
+def list_checkpoints():
+    """Unfinished analyses and how far each got (retrying the upload resumes them)"""
+    try:
+        runs = checkpoints.runs()
+        return jsonify({'runs': runs, 'total': len(runs), 'status': 'success'}), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/checkpoints/<content_hash>', methods=['GET'])
+def get_checkpoint(content_hash):
+    """
+    Stage checkpoints of one unfinished analysis, by the upload's SHA-256
+    (and ?team_id= for uploads made with one)
+    """
+    run = checkpoints.describe(content_hash, request.args.get('team_id') or None)
+    if run is None:
+        return jsonify({
+            'error': 'No checkpoints for this content',
+            'status': 'error'
+        }), 404
+    return jsonify(dict(run, status='success')), 200
+
+
+@app.route('/api/checkpoints/<content_hash>', methods=['DELETE'])
+def invalidate_checkpoint(content_hash):
+    """
+    Invalidate checkpoints so the next attempt recomputes them
+    
+    Query: ?stage=summary drops that stage and every later one;
+    without it the whole run is dropped (the next upload starts fresh).
+    ?team_id= selects the run of an upload made with one.
+    
+    Example:
+    DELETE /api/checkpoints/3f2a...?stage=urgency
+    """
+    stage = request.args.get('stage') or None
+    try:
+        invalidated = checkpoints.invalidate(content_hash, request.args.get('team_id') or None, stage)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+    
+    if not invalidated:
+        return jsonify({
+            'error': 'No checkpoints for this content' + (f' at stage {stage}' if stage else ''),
+            'status': 'error'
+        }), 404
+    return jsonify({
+        'content_hash': content_hash,
+        'stage': stage,
+        'invalidated': True,
+        'status': 'success'
+    }), 200
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """
@@ -424,15 +1176,76 @@ def health():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'active_meetings': len(active_meetings),
-        'meetings': list(active_meetings.keys())
+        'active_meetings': meeting_store.count(),
+        'meetings': meeting_store.ids(),
+        'meeting_cache': meeting_store.cache_stats(),
+        'chat_sessions': len(chat_interface.sessions),
+        'hedging': chat_interface.hedger.stats() if chat_interface.hedger else None,
+        'coalescing': {
+            'analyze': analyze_flight.stats(),
+            'chat': chat_flight.stats()
+        },
+        'ollama_endpoints': clients.ollama_pool.stats(),
+        'embedding_service': embedding_service.stats() if embedding_service else None,
+        'uploads': upload_retention.stats()
     }), 200
 
 
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe, separate from /api/health (liveness)
+    
+    Returns 200 once the Cohere and Qdrant clients, the collections and the
+    embedding model are loaded, 503 before that. Includes per-component
+    state and startup timings in seconds.
+    
+    Example:
+    GET /api/ready
+    """
+    status = clients.readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics: latency histograms per pipeline stage and HTTP route,
+    LLM token and retry counters. Counted per worker process.
+    """
+    return Response(tracer.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/traces', methods=['GET'])
+def list_traces():
+    """
+    Recently captured request traces (newest first)
+    
+    Send any request with ?trace=1 or an X-Trace header to capture its trace;
+    the response carries the id in the X-Trace-Id header.
+    """
+    return jsonify({
+        'traces': tracer.recent_traces(),
+        'status': 'success'
+    }), 200
+
+
+@app.route('/api/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    """Every span of one captured request, with timings and tags"""
+    trace = tracer.get_trace(trace_id)
+    if trace is None:
+        return jsonify({
+            'error': 'Trace not found (traces are kept per worker, most recent only)',
+            'status': 'error'
+        }), 404
+    return jsonify(dict(trace, status='success')), 200
+
+
 @app.route('/api/meetings', methods=['GET'])
 def list_meetings():
     """
-    List all active meetings
+    List all stored meetings
     
     Returns: Array of meeting IDs with basic info
     
@@ -440,15 +1253,7 @@ def list_meetings():
     GET /api/meetings
     """
     try:
-        meetings_list = []
-        for meeting_id, meeting_data in active_meetings.items():
-            meetings_list.append({
-                'meeting_id': meeting_id,
-                'filename': meeting_data.get('filename'),
-                'timestamp': meeting_data.get('timestamp'),
-                'participants': len(meeting_data.get('speakers', {})),
-                'action_items': len(meeting_data.get('tasks', []))
-            })
+        meetings_list = meeting_store.list_meetings()
         
         return jsonify({
             'meetings': meetings_list,
@@ -473,21 +1278,15 @@ def get_tasks(meeting_id):
     GET /api/meetings/meeting_123/tasks
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
             }), 404
         
-        meeting = active_meetings[meeting_id]
-        tasks = meeting.get('tasks', [])
-        
-        # Sort by urgency
-        urgency_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-        sorted_tasks = sorted(
-            tasks,
-            key=lambda x: urgency_order.get(x.get('urgency', 'medium'), 2)
-        )
+        # Pre-sorted by urgency at analysis time
+        sorted_tasks = select_tasks(meeting['tasks'], meeting['indexes']['sorted_tasks'])
         
         return jsonify({
             'meeting_id': meeting_id,
@@ -502,6 +1301,211 @@ def get_tasks(meeting_id):
         }), 500
 
 
+@app.route('/api/meetings/<meeting_id>/tasks/<int:task_id>', methods=['PATCH'])
+def update_task(meeting_id, task_id):
+    """
+    Update a task's fields (owner, deadline, urgency, tags, task, status)
+    
+    The meeting's task indexes are rebuilt so the filter routes stay consistent.
+    
+    Example:
+    PATCH /api/meetings/meeting_123/tasks/0
+    {"owner": "Aaleya", "urgency": "high"}
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                'error': 'Invalid JSON',
+                'status': 'error'
+            }), 400
+        
+        editable = {'task', 'owner', 'deadline', 'urgency', 'urgency_reason', 'tags', 'status'}
+        changes = {k: v for k, v in data.items() if k in editable}
+        if not changes:
+            return jsonify({
+                'error': f'No editable fields provided. Editable fields: {sorted(editable)}',
+                'status': 'error'
+            }), 400
+        
+        if 'urgency' in changes:
+            changes['urgency'] = str(changes['urgency']).lower().strip()
+            if changes['urgency'] not in URGENCY_LEVELS:
+                return jsonify({
+                    'error': 'urgency must be one of: critical, high, medium, low',
+                    'status': 'error'
+                }), 400
+        
+        if 'tags' in changes and not isinstance(changes['tags'], list):
+            return jsonify({
+                'error': 'tags must be a list',
+                'status': 'error'
+            }), 400
+        
+        task = meeting_store.update_task(meeting_id, task_id, changes)
+        if task is None:
+            return jsonify({
+                'error': f'Task {task_id} not found in meeting "{meeting_id}"',
+                'status': 'error'
+            }), 404
+        
+        return jsonify({
+            'meeting_id': meeting_id,
+            'task': task,
+            'status': 'success'
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/tasks', methods=['GET'])
+def get_owner_tasks():
+    """
+    Open tasks for an owner across all meetings, ordered by deadline then urgency
+    
+    Query Parameters:
+    - owner: The owner name (case-insensitive)
+    - limit: Page size (default 50, max 200)
+    - cursor: next_cursor from the previous page
+    
+    Example:
+    GET /api/tasks?owner=Dev&limit=20
+    """
+    try:
+        owner = request.args.get('owner', '').strip()
+        if not owner:
+            return jsonify({
+                'error': 'owner parameter is required',
+                'status': 'error'
+            }), 400
+        limit, cursor = pagination_args()
+        
+        page = task_index.tasks_for_owner(owner, limit=limit, cursor=cursor)
+        return jsonify({
+            'owner': owner,
+            **page,
+            'status': 'success'
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/tasks/by-tag', methods=['GET'])
+def get_tagged_tasks():
+    """
+    Open tasks with a tag across all meetings, ordered by deadline then urgency
+    
+    Example:
+    GET /api/tasks/by-tag?tag=development&limit=20
+    """
+    try:
+        tag = request.args.get('tag', '').lower().strip()
+        if not tag:
+            return jsonify({
+                'error': 'tag parameter is required',
+                'status': 'error'
+            }), 400
+        limit, cursor = pagination_args()
+        
+        page = task_index.tasks_for_tag(tag, limit=limit, cursor=cursor)
+        return jsonify({
+            'tag': tag,
+            **page,
+            'status': 'success'
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/tasks/due', methods=['GET'])
+def get_due_tasks():
+    """
+    Open tasks with a deadline in a date range, ordered by deadline then urgency
+    
+    Query Parameters:
+    - from, to: ISO dates (inclusive, both optional)
+    - owner: Optional owner filter
+    
+    Example:
+    GET /api/tasks/due?from=2026-01-01&to=2026-01-31&owner=Dev
+    """
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        for name, value in (('from', start), ('to', end)):
+            if value and parse_deadline(value) is None:
+                return jsonify({
+                    'error': f'{name} must be a date (YYYY-MM-DD)',
+                    'status': 'error'
+                }), 400
+        limit, cursor = pagination_args()
+        
+        page = task_index.tasks_due(
+            start=parse_deadline(start) if start else None,
+            end=parse_deadline(end) if end else None,
+            owner=request.args.get('owner', '').strip() or None,
+            limit=limit,
+            cursor=cursor
+        )
+        return jsonify({
+            'from': start,
+            'to': end,
+            **page,
+            'status': 'success'
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
+@app.route('/api/tasks/workload', methods=['GET'])
+def get_workload():
+    """
+    Open task counts per owner across all meetings (by urgency, overdue, undated)
+    
+    Example:
+    GET /api/tasks/workload
+    """
+    try:
+        owners = task_index.workload()
+        return jsonify({
+            'owners': owners,
+            'total_owners': len(owners),
+            'status': 'success'
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+
 @app.route('/api/meetings/<meeting_id>/speakers', methods=['GET'])
 def get_speakers(meeting_id):
     """
@@ -513,13 +1517,13 @@ def get_speakers(meeting_id):
     GET /api/meetings/meeting_123/speakers
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
             }), 404
         
-        meeting = active_meetings[meeting_id]
         speakers = meeting.get('speakers', {})
         
         # Sort by duration
@@ -563,14 +1567,13 @@ def get_summary(meeting_id):
     GET /api/meetings/meeting_123/summary
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
             }), 404
         
-        meeting = active_meetings[meeting_id]
-        
         # Build comprehensive summary
         summary_text = f"""
 MEETING SUMMARY REPORT
@@ -630,14 +1633,6 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 
-if __name__ == '__main__':
-    print("🚀 Starting Meeting Analyzer Web Server")
-    print("=" * 60)
-    print("Server running at http://localhost:5000")
-    print("=" * 60)
-    app.run(debug=True, host='0.0.0.0', port=5000)
-
-
 @app.route('/api/meetings/<meeting_id>/sentiment', methods=['GET'])
 def get_sentiment_analysis(meeting_id):
     """
@@ -649,13 +1644,13 @@ def get_sentiment_analysis(meeting_id):
     GET /api/meetings/meeting_123/sentiment
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
             }), 404
         
-        meeting = active_meetings[meeting_id]
         speakers = meeting.get('speakers', {})
         
         # Build sentiment analysis with labels
@@ -709,7 +1704,8 @@ def get_tasks_by_tag(meeting_id):
     GET /api/meetings/meeting_123/tasks/by-tag?tag=development
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
@@ -722,20 +1718,8 @@ def get_tasks_by_tag(meeting_id):
                 'status': 'error'
             }), 400
         
-        meeting = active_meetings[meeting_id]
-        tasks = meeting.get('tasks', [])
-        
-        # Filter tasks by tag
-        filtered_tasks = [
-            task for task in tasks
-            if tag in [t.lower() for t in task.get('tags', [])]
-        ]
-        
-        # Sort by urgency
-        urgency_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-        filtered_tasks.sort(
-            key=lambda x: urgency_order.get(x.get('urgency', 'medium'), 2)
-        )
+        # Tag index holds tasks in urgency order
+        filtered_tasks = select_tasks(meeting['tasks'], meeting['indexes']['by_tag'].get(tag, []))
         
         return jsonify({
             'meeting_id': meeting_id,
@@ -765,7 +1749,8 @@ def get_tasks_by_owner(meeting_id):
     GET /api/meetings/meeting_123/tasks/by-owner?owner=John
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
@@ -778,20 +1763,8 @@ def get_tasks_by_owner(meeting_id):
                 'status': 'error'
             }), 400
         
-        meeting = active_meetings[meeting_id]
-        tasks = meeting.get('tasks', [])
-        
-        # Filter tasks by owner (case-insensitive)
-        filtered_tasks = [
-            task for task in tasks
-            if task.get('owner', '').lower() == owner.lower()
-        ]
-        
-        # Sort by urgency
-        urgency_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-        filtered_tasks.sort(
-            key=lambda x: urgency_order.get(x.get('urgency', 'medium'), 2)
-        )
+        # Owner index is case-folded and holds tasks in urgency order
+        filtered_tasks = select_tasks(meeting['tasks'], meeting['indexes']['by_owner'].get(owner.casefold(), []))
         
         return jsonify({
             'meeting_id': meeting_id,
@@ -821,27 +1794,21 @@ def get_tasks_by_urgency(meeting_id):
     GET /api/meetings/meeting_123/tasks/by-urgency?urgency=critical
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
             }), 404
         
         urgency = request.args.get('urgency', '').lower().strip()
-        if not urgency or urgency not in ['critical', 'high', 'medium', 'low']:
+        if not urgency or urgency not in URGENCY_LEVELS:
             return jsonify({
                 'error': 'urgency parameter must be one of: critical, high, medium, low',
                 'status': 'error'
             }), 400
         
-        meeting = active_meetings[meeting_id]
-        tasks = meeting.get('tasks', [])
-        
-        # Filter tasks by urgency
-        filtered_tasks = [
-            task for task in tasks
-            if task.get('urgency', 'medium').lower() == urgency
-        ]
+        filtered_tasks = select_tasks(meeting['tasks'], meeting['indexes']['by_urgency'].get(urgency, []))
         
         return jsonify({
             'meeting_id': meeting_id,
@@ -871,7 +1838,8 @@ def get_sentiment_by_speaker(meeting_id):
     GET /api/meetings/meeting_123/sentiment/by-speaker?speaker=John
     """
     try:
-        if meeting_id not in active_meetings:
+        meeting = meeting_store.get(meeting_id)
+        if meeting is None:
             return jsonify({
                 'error': f'Meeting "{meeting_id}" not found',
                 'status': 'error'
@@ -884,21 +1852,20 @@ def get_sentiment_by_speaker(meeting_id):
                 'status': 'error'
             }), 400
         
-        meeting = active_meetings[meeting_id]
         speakers = meeting.get('speakers', {})
         
         # Find speaker (case-insensitive)
         speaker_info = None
-        for sp_name, sp_data in speakers.items():
-            if sp_name.lower() == speaker.lower():
-                speaker_info = {
-                    'speaker': sp_name,
-                    'sentiment_score': sp_data['sentiment'],
-                    'sentiment_label': sp_data.get('sentiment_label', 'Neutral'),
-                    'segments': sp_data['segments'],
-                    'duration': sp_data['duration']
-                }
-                break
+        sp_name = meeting['indexes']['speakers'].get(speaker.casefold())
+        if sp_name is not None:
+            sp_data = speakers[sp_name]
+            speaker_info = {
+                'speaker': sp_name,
+                'sentiment_score': sp_data['sentiment'],
+                'sentiment_label': sp_data.get('sentiment_label', 'Neutral'),
+                'segments': sp_data['segments'],
+                'duration': sp_data['duration']
+            }
         
         if not speaker_info:
             return jsonify({
@@ -917,3 +1884,12 @@ def get_sentiment_by_speaker(meeting_id):
             'error': str(e),
             'status': 'error'
         }), 500
+
+
+if __name__ == '__main__':
+    print("🚀 Starting Meeting Analyzer Web Server")
+    print("=" * 60)
+    print("Server running at http://localhost:5000")
+    print("Development server; for production: gunicorn -c gunicorn.conf.py wsgi:app")
+    print("=" * 60)
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Import a backlog of transcripts without the web server
+
+    python batch.py recordings/ --workers 4
+    python batch.py "recordings/2024-*/*.vtt" --output data/import.jsonl
+
+Every transcript (.txt, .md, .json, .vtt, .srt) in the directory (recursively)
+or matching the glob goes through the same pipeline as POST /api/analyze and
+is saved to the meeting store and Qdrant. Files are processed by a pool of
+worker processes forked after the embedding model is loaded, so they share
+its weights; their Cohere calls are paced by one rate limit shared across
+the pool (--rpm, default BATCH_COHERE_RPM).
+
+One JSON line per finished file is appended to --output as soon as it is
+done. That file is also the checkpoint: a rerun skips files whose content
+(SHA-256) already has a successful line, so an interrupted import resumes
+where it stopped and failed files are retried (from the first stage they
+did not complete, see src/checkpoints.py). Files with identical content are
+imported once. A throughput and failure
+summary is printed and written next to it (<output>.summary.json).
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+# Hugging Face tokenizers deadlock if their thread pool is used before a fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+from config.settings import Config
+
+# Workers are forked from this process; nothing should warm up before that
+Config.WARM_UP_ON_START = False
+
+import app as web
+from src import rate_limit
+from src.rate_limit import SharedRateLimiter
+
+
+def find_transcripts(inputs):
+    """Transcript files under the given directories / matching the given globs, sorted"""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(os.path.join(root, name) for name in files)
+        else:
+            paths.update(glob.glob(pattern, recursive=True))
+    return sorted(path for path in paths if os.path.isfile(path) and web.allowed_file(path))
+
+
+def load_checkpoint(output):
+    """Content hashes already imported successfully according to `output`"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            if row.get("status") == "ok":
+                done.add(row["sha256"])
+    return done
+
+
+# Workers
+
+def init_worker(limiter, worker_count, verbose):
+    """Per-process setup after the fork, as in wsgi.after_fork()"""
+    threads = Config.TORCH_THREADS or max(1, (os.cpu_count() or 1) // max(1, worker_count))
+    web.clients.after_fork(torch_threads=threads)
+    web.meeting_store.after_fork()
+    web.checkpoints.after_fork()
+    web.chat_interface.sessions.after_fork()
+    if web.embedding_service is not None:
+        web.embedding_service.after_fork()
+
+    if limiter is not None:
+        rate_limit.install(limiter)
+        # The shared limiter does the pacing
+        Config.API_DELAY_SECONDS = 0
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+
+
+def process_file(path, sha256, team_id):
+    """Analyze and store one transcript; returns its result line"""
+    start = time.perf_counter()
+    row = {"file": path, "sha256": sha256}
+    web.tracer.begin_request()
+    try:
+        meeting = web.run_analysis(path, os.path.basename(path), team_id=team_id, content_hash=sha256)
+        total = meeting["usage"]["total"]
+        row.update({
+            "status": "ok",
+            "meeting_id": meeting["meeting_id"],
+            "entries": len(meeting["transcript"]),
+            "speakers": len(meeting["speakers"]),
+            "tasks": len(meeting["tasks"]),
+            "llm_calls": total["calls"],
+            "tokens": total["tokens"],
+            "cost_usd": total["cost_usd"],
+        })
+    except Exception as e:
+        row.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    row["finished_at"] = datetime.now().isoformat()
+    row["worker"] = os.getpid()
+    return row
+
+
+# Driver
+
+def summarize(rows, skipped, duplicates, wall_seconds, workers, rpm):
+    succeeded = [row for row in rows if row["status"] == "ok"]
+    entries = sum(row["entries"] for row in succeeded)
+    return {
+        "finished_at": datetime.now().isoformat(),
+        "workers": workers,
+        "cohere_rpm": rpm or None,
+        "files": len(rows) + skipped + duplicates,
+        "skipped": skipped,
+        "duplicates": duplicates,
+        "processed": len(rows),
+        "succeeded": len(succeeded),
+        "failed": len(rows) - len(succeeded),
+        "wall_seconds": round(wall_seconds, 3),
+        "files_per_minute": round(len(succeeded) / wall_seconds * 60, 2) if wall_seconds else None,
+        "entries_per_second": round(entries / wall_seconds, 2) if wall_seconds else None,
+        "entries": entries,
+        "llm_calls": sum(row["llm_calls"] for row in succeeded),
+        "tokens": sum(row["tokens"] for row in succeeded),
+        "cost_usd": round(sum(row["cost_usd"] for row in succeeded), 6),
+        "failures": [{"file": row["file"], "error": row["error"]} for row in rows if row["status"] != "ok"],
+    }
+
+
+def print_summary(summary):
+    print(f"\n{'='*60}")
+    print("BATCH IMPORT SUMMARY")
+    print("="*60)
+    print(f"Files: {summary['files']} ({summary['skipped']} already imported, {summary['duplicates']} duplicates, "
+          f"{summary['processed']} processed)")
+    print(f"Succeeded: {summary['succeeded']}, failed: {summary['failed']}")
+    print(f"Wall time: {summary['wall_seconds']:.1f}s with {summary['workers']} workers "
+          f"({summary['files_per_minute']} files/min, {summary['entries_per_second']} entries/s)")
+    print(f"LLM: {summary['llm_calls']} calls, {summary['tokens']} tokens, ${summary['cost_usd']:.4f}")
+    for failure in summary["failures"]:
+        print(f"  ✗ {failure['file']}: {failure['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Directories and/or glob patterns")
+    parser.add_argument("--workers", type=int, default=Config.BATCH_WORKERS)
+    parser.add_argument("--rpm", type=int, default=Config.BATCH_COHERE_RPM,
+                        help="Cohere calls per minute across all workers (0 = no limit)")
+    parser.add_argument("--output", default="data/batch_results.jsonl", help="Results and checkpoint file")
+    parser.add_argument("--team-id", help="Team the imported meetings belong to")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    paths = find_transcripts(args.inputs)
+    done = load_checkpoint(args.output)
+    pending = {}
+    duplicates = 0
+    for path in paths:
+        sha256 = web.hash_file(path)
+        if sha256 in pending:
+            # Identical files would race for one checkpoint run; import the first
+            duplicates += 1
+        elif sha256 not in done:
+            pending[sha256] = path
+    pending = [(path, sha256) for sha256, path in pending.items()]
+    skipped = len(paths) - len(pending) - duplicates
+    print(f"✓ {len(paths)} transcripts found, {skipped} already imported, {duplicates} duplicates, "
+          f"{len(pending)} to process")
+    if not pending:
+        return 0
+
+    # Loaded once here; forked workers share the weights copy-on-write
+    web.clients.embedding_model
+
+    workers = max(1, min(args.workers, len(pending)))
+    context = multiprocessing.get_context("fork")
+    limiter = SharedRateLimiter(args.rpm, context) if args.rpm > 0 else None
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    rows = []
+    start = time.perf_counter()
+    with open(args.output, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=init_worker,
+        initargs=(limiter, workers, args.verbose)
+    ) as pool:
+        futures = [pool.submit(process_file, path, sha256, args.team_id) for path, sha256 in pending]
+        try:
+            for future in as_completed(futures):
+                row = future.result()
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                rows.append(row)
+                mark = "✓" if row["status"] == "ok" else "✗"
+                print(f"{mark} [{len(rows)}/{len(pending)}] {row['file']} ({row['seconds']:.1f}s)"
+                      + (f" {row['error']}" if row["status"] != "ok" else ""))
+        except KeyboardInterrupt:
+            print("\nInterrupted; finished files are checkpointed, rerun to resume")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    summary = summarize(rows, skipped, duplicates, time.perf_counter() - start, workers, args.rpm)
+    with open(os.path.splitext(args.output)[0] + ".summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print_summary(summary)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark query embedding under concurrency, with and without micro-batching
+
+    python benchmark_embedding.py --threads 1 8 32 --duration 10 --with-ingest
+
+Each client thread embeds one question at a time, as /api/chat and /search do.
+"direct" calls model.encode([query]) from every thread; "batched" goes through
+EmbeddingService. With --with-ingest a background thread keeps encoding
+transcript-sized batches at bulk priority, as an upload would.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import Config
+from src.embedding_service import EmbeddingService, INTERACTIVE, BULK
+
+QUESTIONS = [
+    "What deadlines were agreed for the frontend?",
+    "Who is responsible for the database migration?",
+    "What did the team decide about the release date?",
+    "Which risks were raised about the API integration?",
+    "Summarize the discussion about testing",
+]
+TRANSCRIPT_LINE = "Speaker: we should finish the schema before the frontend work starts next sprint"
+
+
+def run(encode_query, encode_bulk, threads, duration, with_ingest):
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(n):
+        i = n
+        while time.monotonic() < stop_at:
+            start = time.monotonic()
+            encode_query(QUESTIONS[i % len(QUESTIONS)])
+            elapsed = time.monotonic() - start
+            i += 1
+            with lock:
+                latencies.append(elapsed)
+
+    def ingest():
+        while time.monotonic() < stop_at:
+            encode_bulk([TRANSCRIPT_LINE] * 200)
+
+    ingest_thread = None
+    if with_ingest:
+        ingest_thread = threading.Thread(target=ingest, daemon=True)
+        ingest_thread.start()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(client, range(threads)))
+    if ingest_thread:
+        ingest_thread.join()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000
+    return len(latencies) / duration, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--with-ingest", action="store_true")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(Config.EMBEDDING_MODEL)
+    model.encode(QUESTIONS)  # warm up
+    service = EmbeddingService(model)
+
+    modes = {
+        "direct": (lambda q: model.encode([q]), lambda texts: model.encode(texts)),
+        "batched": (lambda q: service.encode([q], INTERACTIVE), lambda texts: service.encode(texts, BULK)),
+    }
+
+    print(f"{'mode':>8} {'threads':>7} {'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for threads in args.threads:
+        for name, (encode_query, encode_bulk) in modes.items():
+            qps, p50, p99 = run(encode_query, encode_bulk, threads, args.duration, args.with_ingest)
+            print(f"{name:>8} {threads:>7} {qps:>10.1f} {p50:>8.1f} {p99:>8.1f}")
+    print(f"\nbatching stats: {service.stats()}")
+
+
+if __name__ == "__main__":
+    main()
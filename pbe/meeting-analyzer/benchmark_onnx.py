@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compare embedding backends: load time, throughput and parity with PyTorch
+
+    python benchmark_onnx.py --backends torch onnx onnx-int8 --min-cosine 0.99
+
+Every backend embeds the lines of the sample transcript. Parity is the
+cosine similarity between each backend's vector and the PyTorch vector for
+the same line; the script exits non-zero if any backend's minimum falls
+below --min-cosine (int8 is held to --min-cosine-int8).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.onnx_embeddings import load_embedding_model, cosine_parity
+from data.sample_transcript import RAW_TRANSCRIPT
+
+
+def throughput(model, texts, batch_size, rounds):
+    start = time.perf_counter()
+    encoded = 0
+    for _ in range(rounds):
+        for i in range(0, len(texts), batch_size):
+            model.encode(texts[i:i + batch_size])
+            encoded += len(texts[i:i + batch_size])
+    return encoded / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--min-cosine-int8", type=float, default=0.95)
+    args = parser.parse_args()
+
+    texts = [line.strip() for line in RAW_TRANSCRIPT.strip().splitlines() if line.strip()]
+    reference = None
+    failed = False
+
+    print(f"{'backend':>10} {'load s':>7} {'1/batch/s':>10} {'64/batch/s':>11} {'cos min':>8} {'cos mean':>9}")
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        start = time.perf_counter()
+        model = load_embedding_model(backend)
+        load_seconds = time.perf_counter() - start
+
+        model.encode(texts[:8])  # warm up
+        single = throughput(model, texts, 1, 1)
+        batched = throughput(model, texts, 64, args.rounds)
+
+        if reference is None:
+            reference = model
+            parity = {"min": 1.0, "mean": 1.0}
+        else:
+            parity = cosine_parity(reference, model, texts)
+            threshold = args.min_cosine_int8 if backend == "onnx-int8" else args.min_cosine
+            failed = failed or parity["min"] < threshold
+
+        if backend in args.backends:
+            print(f"{backend:>10} {load_seconds:>7.2f} {single:>10.1f} {batched:>11.1f} "
+                  f"{parity['min']:>8.4f} {parity['mean']:>9.4f}")
+
+    if failed:
+        print("✗ Parity check failed")
+        sys.exit(1)
+    print("✓ Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
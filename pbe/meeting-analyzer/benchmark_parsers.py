@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Transcript parse throughput per format
+
+    python benchmark_parsers.py --cues 200000 --formats text vtt srt json
+
+Writes a synthetic file per format (benchmarks/synthetic.py) and times
+TranscriptParser.iter_file() over it: MB/s, input cues/s, and how many
+entries are left after consecutive same-speaker cues are merged.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.synthetic import generate_captions, generate_transcript
+from src.transcript_parser import TranscriptParser
+
+EXTENSIONS = {"text": "txt", "vtt": "vtt", "srt": "srt", "json": "json"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cues", type=int, default=200000)
+    parser.add_argument("--formats", nargs="+", choices=list(EXTENSIONS), default=list(EXTENSIONS))
+    parser.add_argument("--rounds", type=int, default=3, help="Best of this many runs")
+    args = parser.parse_args()
+
+    transcript_parser = TranscriptParser(None)
+    print(f"{'format':>7} {'size MB':>8} {'MB/s':>8} {'cues/s':>10} {'entries':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for fmt in args.formats:
+            if fmt == "text":
+                content = generate_transcript(args.cues)
+            else:
+                content = generate_captions(args.cues, fmt)
+            path = os.path.join(workdir, f"transcript.{EXTENSIONS[fmt]}")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            size_mb = os.path.getsize(path) / 1e6
+            del content
+
+            best = None
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                entries = sum(1 for _ in transcript_parser.iter_file(path))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            print(f"{fmt:>7} {size_mb:>8.1f} {size_mb / best:>8.1f} {args.cues / best:>10.0f} {entries:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark requests/sec against the number of gunicorn workers
+
+    python benchmark_serving.py --workers 1 2 4 --concurrency 16 --duration 20
+
+For each worker count this starts `gunicorn -c gunicorn.conf.py wsgi:app`,
+waits for /api/ready, then drives POST /api/search (one query embedding plus
+one Qdrant search per request) from a pool of client threads. Memory is read
+from /proc: PSS splits shared pages between processes, so a model shared
+copy-on-write shows up as total PSS well below the sum of RSS.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+QUERIES = [
+    "What deadlines were agreed for the frontend?",
+    "Who is responsible for the database migration?",
+    "What did the team decide about the release date?",
+    "Which risks were raised about the API integration?",
+    "Summarize the discussion about testing",
+]
+
+
+def wait_until_ready(base_url, workers, timeout):
+    """Wait for several ready answers in a row, so most workers are warm"""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            ok = requests.get(f"{base_url}/api/ready", timeout=2).status_code == 200
+        except requests.RequestException:
+            ok = False
+        streak = streak + 1 if ok else 0
+        if streak >= 2 * workers:
+            return True
+        time.sleep(0.1 if ok else 0.5)
+    return False
+
+
+def memory_mb(pid):
+    """(rss, pss) in MB for a process and its direct children"""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        return None, None
+
+    rss = pss = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+        except OSError:
+            continue
+    return round(rss / 1024), round(pss / 1024)
+
+
+def drive(base_url, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(n):
+        session = requests.Session()
+        i = n
+        while time.monotonic() < stop_at:
+            query = QUERIES[i % len(QUERIES)]
+            i += 1
+            start = time.monotonic()
+            try:
+                response = session.post(f"{base_url}/api/search", json={"query": query, "top_k": 5}, timeout=30)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.monotonic() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(p / 100.0 * len(latencies)))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / duration,
+        "p50_ms": pct(50),
+        "p99_ms": pct(99),
+    }
+
+
+def run(worker_count, args):
+    env = dict(os.environ, GUNICORN_WORKERS=str(worker_count), GUNICORN_BIND=f"127.0.0.1:{args.port}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if not wait_until_ready(base_url, worker_count, args.startup_timeout):
+            print(f"✗ {worker_count} worker(s): server not ready after {args.startup_timeout}s")
+            return None
+        drive(base_url, args.concurrency, min(2, args.duration))  # warm caches and connections
+        result = drive(base_url, args.concurrency, args.duration)
+        result["rss_mb"], result["pss_mb"] = memory_mb(server.pid)
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--verbose", action="store_true", help="Show gunicorn's log")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'RSS MB':>7} {'PSS MB':>7}")
+    for worker_count in args.workers:
+        r = run(worker_count, args)
+        if r is None:
+            continue
+        print(f"{worker_count:>7} {r['rps']:>8.1f} {r['p50_ms'] or 0:>8.1f} {r['p99_ms'] or 0:>8.1f} "
+              f"{r['errors']:>6} {r['rss_mb'] or 0:>7} {r['pss_mb'] or 0:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Memory and aggregation speed of the columnar Transcript vs a list of entry dicts
+
+    python benchmark_transcript.py --lines 10000 50000 --format vtt
+
+Parses a synthetic transcript (benchmarks/synthetic.py) into both shapes,
+with sentiment filled in as the app does, and reports the memory each holds
+(tracemalloc, bytes per 10k lines), the time of the per-speaker statistics
+(dict loop as app.py used to do it vs Transcript.speaker_stats()), and
+checks that to_entries() gives back exactly the parsed entries.
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.synthetic import generate_captions, generate_transcript
+from src.transcript import Transcript, sentiment_label
+from src.transcript_parser import TranscriptParser
+
+SCORES = (-0.75, 0.0, 0.75)
+
+
+def scored_entries(transcript_parser, path, seed=0):
+    rng = random.Random(seed)
+    for entry in transcript_parser.iter_file(path):
+        entry['sentiment'] = rng.choice(SCORES)
+        yield entry
+
+
+def held_bytes(build):
+    """Bytes still allocated once build() has returned (the object it built)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, held
+
+
+def loop_speaker_stats(entries):
+    """Per-speaker statistics the way app.py computed them over entry dicts"""
+    speakers = {}
+    for entry in entries:
+        stats = speakers.setdefault(entry['speaker_name'], {'duration': 0, 'segments': 0, 'sentiment': 0})
+        stats['segments'] += 1
+        stats['duration'] += entry.get('duration', 0)
+        stats['sentiment'] += entry['sentiment'] or 0
+    for stats in speakers.values():
+        stats['sentiment'] = round(stats['sentiment'] / stats['segments'], 2)
+        stats['duration'] = round(stats['duration'], 2)
+        stats['sentiment_label'] = sentiment_label(stats['sentiment'])
+    return speakers
+
+
+def same_stats(loop, vectorized):
+    """
+    Equal apart from float rounding: the loop sums durations as floats, the
+    Transcript sums exact milliseconds, so totals can differ in the last digit
+    """
+    return loop.keys() == vectorized.keys() and all(
+        abs(loop[name]['duration'] - vectorized[name]['duration']) <= 0.011
+        and dict(loop[name], duration=0) == dict(vectorized[name], duration=0)
+        for name in loop
+    )
+
+
+def best_of(rounds, fn):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--format", choices=["text", "vtt", "srt"], default="vtt")
+    parser.add_argument("--rounds", type=int, default=5, help="Best of this many runs")
+    args = parser.parse_args()
+
+    transcript_parser = TranscriptParser(None)
+    print(f"{'lines':>7} {'entries':>8} {'dicts KB/10k':>13} {'columns KB/10k':>15} {'saved':>6} "
+          f"{'loop ms':>8} {'vector ms':>10} {'round-trip':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for lines in args.lines:
+            if args.format == "text":
+                content = generate_transcript(lines)
+            else:
+                content = generate_captions(lines, args.format)
+            path = os.path.join(workdir, f"transcript.{'txt' if args.format == 'text' else args.format}")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            del content
+
+            entries, dict_bytes = held_bytes(lambda: list(scored_entries(transcript_parser, path)))
+            transcript, column_bytes = held_bytes(lambda: Transcript.from_entries(scored_entries(transcript_parser, path)))
+
+            loop_seconds = best_of(args.rounds, lambda: loop_speaker_stats(entries))
+            vector_seconds = best_of(args.rounds, transcript.speaker_stats)
+            assert same_stats(loop_speaker_stats(entries), transcript.speaker_stats())
+            lossless = transcript.to_entries() == entries
+
+            per_10k = 10000 / len(entries) / 1024
+            print(f"{lines:>7} {len(entries):>8} {dict_bytes * per_10k:>13.0f} {column_bytes * per_10k:>15.0f} "
+                  f"{1 - column_bytes / dict_bytes:>6.0%} {loop_seconds * 1000:>8.2f} {vector_seconds * 1000:>10.2f} "
+                  f"{'ok' if lossless else 'MISMATCH':>11}")
+
+
+if __name__ == "__main__":
+    main()
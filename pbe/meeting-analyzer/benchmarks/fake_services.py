@@ -0,0 +1,182 @@
+"""
+Local stand-ins for Cohere and Ollama
+
+Both are plain HTTP servers running in a background thread. They answer the
+prompts the analyzer sends with canned but well-formed responses, after a
+configurable latency, and count calls and tokens. The Cohere stand-in can
+also enforce a requests-per-minute limit, answering 429 like the real API.
+"""
+
+import abc
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def count_tokens(text):
+    """Rough token count (words), good enough to compare runs"""
+    return len(WORD_PATTERN.findall(text or ""))
+
+
+class FakeService(abc.ABC):
+    """Shared server plumbing: latency, rate limit and call accounting"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rpm=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rpm = rpm
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = []
+        self._server = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"calls": 0, "rate_limited": 0, "tokens_in": 0, "tokens_out": 0, "by_kind": {}}
+            self._window = []
+
+    def _admit(self):
+        """True if the call fits in the rate limit (and is counted)"""
+        now = time.monotonic()
+        with self._lock:
+            if self.rpm:
+                self._window = [t for t in self._window if now - t < 60]
+                if len(self._window) >= self.rpm:
+                    self.stats["rate_limited"] += 1
+                    return False
+                self._window.append(now)
+            return True
+
+    def _record(self, kind, prompt, answer):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["tokens_in"] += count_tokens(prompt)
+            self.stats["tokens_out"] += count_tokens(answer)
+            self.stats["by_kind"][kind] = self.stats["by_kind"].get(kind, 0) + 1
+
+    def _sleep(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    @abc.abstractmethod
+    def handle(self, path, body):
+        """Answer a POST; returns (status, response dict)"""
+
+    def handle_get(self, path):
+        return 404, {"message": "not found"}
+
+    def start(self, port=0):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._reply(*service.handle(self.path, body))
+
+            def do_GET(self):
+                self._reply(*service.handle_get(self.path))
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class FakeCohere(FakeService):
+    """Answers POST /v1/chat for the sentiment, summary and urgency prompts"""
+
+    def handle(self, path, body):
+        if not path.rstrip("/").endswith("/chat"):
+            return 404, {"message": f"unknown endpoint {path}"}
+        if not self._admit():
+            return 429, {"message": "You are using a Trial key, which is limited. (fake)"}
+
+        preamble = body.get("preamble") or ""
+        message = body.get("message") or ""
+        self._sleep()
+
+        if "Required JSON structure" in message:
+            kind, text = "summary", json.dumps(self._summary(message))
+        elif "urgency" in preamble.lower():
+            kind, text = "urgency", self._random.choice(["critical", "high", "medium", "low"])
+        elif "sentiment" in preamble.lower():
+            kind, text = "sentiment", self._random.choice(["positive", "neutral", "negative"])
+        else:
+            kind, text = "chat", "This is a stand-in answer based on the meeting transcript."
+
+        self._record(kind, preamble + "\n" + message, text)
+        return 200, {
+            "text": text,
+            "generation_id": str(uuid.uuid4()),
+            "finish_reason": "COMPLETE",
+            "meta": {"billed_units": {"input_tokens": count_tokens(message), "output_tokens": count_tokens(text)}},
+        }
+
+    def _summary(self, message):
+        speakers = sorted(set(re.findall(r"^\[[^\]]*\]\s*([^:]+):", message, re.MULTILINE)))[:6] or ["Alex"]
+        return {
+            "executive_summary": "The team reviewed progress, agreed owners for open work and set deadlines.",
+            "action_items": [
+                {
+                    "task": f"Follow up on item {i + 1}",
+                    "owner": speakers[i % len(speakers)],
+                    "deadline": f"2026-{(i % 12) + 1:02d}-15",
+                    "urgency_reason": "Blocks the next milestone",
+                    "tags": ["planning", "backend"][: 1 + i % 2],
+                }
+                for i in range(5)
+            ],
+            "topics_discussed": ["Release planning", "Backend integration", "Testing strategy"],
+            "named_entities": ["Qdrant", "Cohere", "Flask"],
+            "overall_sentiment": "positive",
+        }
+
+
+class FakeOllama(FakeService):
+    """Answers POST /api/generate and GET /api/tags"""
+
+    def __init__(self, model="qwen2:1.5b", **kwargs):
+        super().__init__(**kwargs)
+        self.model = model
+
+    def handle_get(self, path):
+        if path.startswith("/api/tags"):
+            return 200, {"models": [{"name": self.model}]}
+        return 404, {"error": "not found"}
+
+    def handle(self, path, body):
+        if not path.startswith("/api/generate"):
+            return 404, {"error": f"unknown endpoint {path}"}
+        if not self._admit():
+            return 429, {"error": "rate limited (fake)"}
+        self._sleep()
+        prompt = body.get("prompt") or ""
+        text = "According to the meeting, the owner agreed to deliver it before the deadline."
+        self._record("generate", prompt, text)
+        return 200, {"model": self.model, "response": text, "done": True}
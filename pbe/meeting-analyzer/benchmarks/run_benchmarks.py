@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks against local stand-ins for Cohere, Ollama and Qdrant
+
+    python -m benchmarks.run_benchmarks --sizes 50 500 2000 10000 --modes pipeline api
+
+Each case runs in its own process with fake Cohere/Ollama HTTP servers
+(configurable latency, jitter and rate limit) and an in-memory Qdrant, so no
+API keys are needed and peak RSS belongs to that case alone. The embedding
+model is the real one.
+
+- pipeline: main.py's process_transcript(), then chat questions in sequence
+- api: POST /api/analyze, then concurrent POST /api/chat and POST /search
+
+Reported per case: wall time per stage, LLM calls and tokens sent per service,
+peak RSS and chat p50/p95. Results are written as JSON to --output-dir;
+pass --compare with an earlier file to print the change.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+def latency_summary(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 1) if samples else None,
+        "p95_ms": round(percentile(samples, 95) * 1000, 1) if samples else None,
+    }
+
+
+# Case runner (child process)
+
+def start_fakes(args):
+    from benchmarks.fake_services import FakeCohere, FakeOllama
+
+    cohere = FakeCohere(latency=args.cohere_latency, jitter=args.jitter, rpm=args.cohere_rpm)
+    ollama = FakeOllama(latency=args.ollama_latency, jitter=args.jitter)
+    cohere_url = cohere.start()
+    ollama_url = ollama.start()
+
+    # Must be set before anything imports config.settings
+    os.environ.update({
+        "COHERE_API_KEY": "benchmark",
+        "COHERE_BASE_URL": cohere_url,
+        "OLLAMA_BASE_URL": ollama_url,
+        "OLLAMA_BASE_URLS": ollama_url,
+        "QDRANT_LOCAL_PATH": ":memory:",
+        "MEETING_DB_PATH": os.path.join(args.workdir, "meetings.db"),
+        "CHAT_SESSION_DB_PATH": os.path.join(args.workdir, "meetings.db"),
+        "WARM_UP_ON_START": "false",
+        "API_DELAY_SECONDS": str(args.api_delay),
+    })
+    return cohere, ollama
+
+
+def run_pipeline_case(args, raw_text, questions, timings):
+    from main import process_transcript
+    from src.clients import APIClients
+    from src.transcript_parser import TranscriptParser
+    from src.meeting_analyzer import MeetingAnalyzer
+    from src.vector_store import VectorStore
+    from src.chat_interface import ChatInterface
+    from src.utils import timed_stage
+
+    with timed_stage(timings, "startup"):
+        clients = APIClients()
+        clients.warm_up()
+        parser = TranscriptParser(clients.cohere_client)
+        analyzer = MeetingAnalyzer(clients.cohere_client)
+        vector_store = VectorStore(clients.qdrant_client, clients.embedding_model)
+        chat_interface = ChatInterface(clients, vector_store)
+
+    processed = process_transcript(raw_text, parser, analyzer, vector_store, chat_interface, timings)
+
+    latencies = []
+    with timed_stage(timings, "chat"):
+        for question in questions:
+            start = time.perf_counter()
+            chat_interface.chat_with_transcript(question, processed, record_turn=False)
+            latencies.append(time.perf_counter() - start)
+    return {"chat": latency_summary(latencies)}
+
+
+def run_api_case(args, raw_text, questions, timings):
+    from src.utils import timed_stage
+
+    with timed_stage(timings, "startup"):
+        import app as web
+        web.clients.warm_up()
+    client = web.app.test_client()
+
+    with timed_stage(timings, "analyze_request"):
+        response = client.post('/api/analyze', data={
+            'file': (io.BytesIO(raw_text.encode()), 'benchmark.txt')
+        })
+    if response.status_code != 200:
+        raise RuntimeError(f"/api/analyze failed: {response.get_json()}")
+    meeting_id = response.get_json()['meeting_id']
+
+    def timed_post(path, body):
+        local = web.app.test_client()
+        start = time.perf_counter()
+        status = local.post(path, json=body).status_code
+        return time.perf_counter() - start, status
+
+    def run_concurrently(stage, path, bodies):
+        with timed_stage(timings, stage):
+            with ThreadPoolExecutor(max_workers=args.chat_concurrency) as pool:
+                results = list(pool.map(lambda body: timed_post(path, body), bodies))
+        errors = sum(1 for _, status in results if status != 200)
+        return dict(latency_summary([seconds for seconds, _ in results]), errors=errors)
+
+    chat = run_concurrently("chat", "/api/chat", [
+        {"meeting_id": meeting_id, "question": q, "user_id": f"bench-{i}"} for i, q in enumerate(questions)
+    ])
+    search = run_concurrently("search", "/search", [{"query": q, "top_k": 5} for q in questions])
+    return {"chat": chat, "search": search}
+
+
+def run_case(args):
+    mode, lines = args.case.split(":")
+    lines = int(lines)
+    cohere, ollama = start_fakes(args)
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from benchmarks.synthetic import generate_transcript, QUESTIONS
+
+    raw_text = generate_transcript(lines, seed=args.seed)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.chat_questions)]
+
+    timings = {}
+    runner = run_pipeline_case if mode == "pipeline" else run_api_case
+    start = time.perf_counter()
+    latencies = runner(args, raw_text, questions, timings)
+    total = time.perf_counter() - start
+
+    result = {
+        "mode": mode,
+        "lines": lines,
+        "total_seconds": round(total, 3),
+        "stages": {name: round(seconds, 3) for name, seconds in timings.items()},
+        "llm": {"cohere": cohere.stats, "ollama": ollama.stats},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    result.update(latencies)
+    with open(args.case_output, "w") as f:
+        json.dump(result, f)
+
+
+# Driver (parent process)
+
+KNOBS = ("cohere_latency", "ollama_latency", "jitter", "cohere_rpm", "api_delay",
+         "chat_questions", "chat_concurrency", "seed")
+
+
+def knob_args(args):
+    argv = []
+    for name in KNOBS:
+        value = getattr(args, name)
+        if value is not None:
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+    return argv
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_case(case):
+    cohere, ollama = case["llm"]["cohere"], case["llm"]["ollama"]
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in case["stages"].items())
+    print(f"\n{case['mode']} / {case['lines']} lines: {case['total_seconds']:.2f}s, peak RSS {case['peak_rss_mb']} MB")
+    print(f"  stages: {stages}")
+    print(f"  cohere: {cohere['calls']} calls, {cohere['tokens_in']} tokens sent, {cohere['rate_limited']} rate-limited")
+    print(f"  ollama: {ollama['calls']} calls, {ollama['tokens_in']} tokens sent")
+    for name in ("chat", "search"):
+        if name in case:
+            print(f"  {name}: p50 {case[name]['p50_ms']} ms, p95 {case[name]['p95_ms']} ms ({case[name]['count']} requests)")
+
+
+def compare(previous_path, cases):
+    with open(previous_path) as f:
+        previous = {(c["mode"], c["lines"]): c for c in json.load(f)["cases"]}
+
+    def delta(old, new):
+        if not old or new is None:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nCompared with {previous_path}:")
+    for case in cases:
+        old = previous.get((case["mode"], case["lines"]))
+        if old is None:
+            continue
+        print(f"  {case['mode']} / {case['lines']}: total {delta(old['total_seconds'], case['total_seconds'])}, "
+              f"cohere calls {delta(old['llm']['cohere']['calls'], case['llm']['cohere']['calls'])}, "
+              f"peak RSS {delta(old['peak_rss_mb'], case['peak_rss_mb'])}, "
+              f"chat p95 {delta(old['chat']['p95_ms'], case['chat']['p95_ms'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2000, 10000])
+    parser.add_argument("--modes", nargs="+", choices=["pipeline", "api"], default=["pipeline", "api"])
+    parser.add_argument("--cohere-latency", type=float, default=0.05, help="Seconds per fake Cohere call")
+    parser.add_argument("--ollama-latency", type=float, default=0.2, help="Seconds per fake Ollama call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--cohere-rpm", type=int, default=None, help="Fake Cohere requests/minute limit")
+    parser.add_argument("--api-delay", type=float, default=0.0, help="API_DELAY_SECONDS for the run")
+    parser.add_argument("--chat-questions", type=int, default=40)
+    parser.add_argument("--chat-concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=os.path.join(ROOT, "benchmarks", "results"))
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--case-output", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args)
+        return 0
+
+    cases = []
+    for mode in args.modes:
+        for lines in args.sizes:
+            with tempfile.TemporaryDirectory() as workdir:
+                output = os.path.join(workdir, "result.json")
+                command = [sys.executable, "-m", "benchmarks.run_benchmarks", "--case", f"{mode}:{lines}",
+                           "--case-output", output, "--workdir", workdir] + knob_args(args)
+                quiet = None if args.verbose else subprocess.DEVNULL
+                completed = subprocess.run(command, cwd=ROOT, stdout=quiet, stderr=quiet)
+                if completed.returncode != 0 or not os.path.exists(output):
+                    print(f"\n✗ {mode} / {lines} lines failed (rerun with --verbose)")
+                    continue
+                with open(output) as f:
+                    case = json.load(f)
+            cases.append(case)
+            print_case(case)
+
+    results = {
+        "started_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {name: getattr(args, name) for name in KNOBS},
+        "cases": cases,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results saved to {path}")
+
+    if args.compare:
+        compare(args.compare, cases)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
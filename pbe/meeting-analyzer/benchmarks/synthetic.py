@@ -0,0 +1,80 @@
+"""
+Synthetic meeting transcripts of any length, in the "Speaker: text" format
+the parser reads, or as WebVTT/SRT captions and Whisper-style JSON segments.
+Seeded, so the same size always yields the same text.
+"""
+
+import json
+import random
+
+SPEAKERS = ["Dev", "Farhaan", "Aaleya", "Yash", "Priya", "Marcus", "Lena", "Tomas"]
+
+OPENERS = ["I think", "Honestly,", "From my side,", "Quick update:", "Agreed, and", "One concern:", "So", "Right,"]
+SUBJECTS = ["the API integration", "the frontend build", "the database migration", "our test coverage",
+            "the release date", "model latency", "the onboarding flow", "the vector search", "the demo script",
+            "the Qdrant cluster", "the summary prompt", "error handling"]
+PREDICATES = ["is behind schedule", "needs another review", "should be ready by Friday", "is blocking QA",
+              "looks stable now", "needs an owner", "has a few open bugs", "depends on the schema freeze",
+              "could slip a week", "is mostly done"]
+CLOSERS = ["", " Can you take that?", " I'll follow up.", " Let's decide today.", " We need a deadline.",
+           " That's a risk.", " Good progress overall."]
+
+
+def generate_transcript(lines, speakers=6, seed=0):
+    """Raw transcript text with `lines` utterances from `speakers` people"""
+    rng = random.Random(seed)
+    people = SPEAKERS[:max(1, min(speakers, len(SPEAKERS)))]
+    out = []
+    for _ in range(lines):
+        sentence = f"{rng.choice(OPENERS)} {rng.choice(SUBJECTS)} {rng.choice(PREDICATES)}.{rng.choice(CLOSERS)}"
+        out.append(f"{rng.choice(people)}: {sentence}")
+    return "\n".join(out)
+
+
+def _clock(seconds, separator):
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{rest:06.3f}".replace(".", separator)
+
+
+def generate_captions(cues, fmt="vtt", speakers=6, seed=0):
+    """
+    Caption file text with `cues` cues: "vtt", "srt" or "json" (Whisper-style
+    segments). Speakers change every few cues, as in real captions, so
+    consecutive cues can be merged into turns.
+    """
+    rng = random.Random(seed)
+    people = SPEAKERS[:max(1, min(speakers, len(SPEAKERS)))]
+    speaker = people[0]
+    start = 0.0
+    blocks = ["WEBVTT\n"] if fmt == "vtt" else []
+    segments = []
+
+    for i in range(cues):
+        if rng.random() < 0.3:
+            speaker = rng.choice(people)
+        text = f"{rng.choice(OPENERS)} {rng.choice(SUBJECTS)} {rng.choice(PREDICATES)}."
+        end = start + rng.uniform(1.5, 5.0)
+        if fmt == "json":
+            segments.append({"id": i, "start": round(start, 3), "end": round(end, 3), "speaker": speaker, "text": " " + text})
+        elif fmt == "srt":
+            blocks.append(f"{i + 1}\n{_clock(start, ',')} --> {_clock(end, ',')}\n{speaker}: {text}\n")
+        else:
+            blocks.append(f"{_clock(start, '.')} --> {_clock(end, '.')}\n<v {speaker}>{text}\n")
+        start = end + rng.uniform(0.0, 1.0)
+
+    if fmt == "json":
+        return json.dumps({"segments": segments})
+    return "\n".join(blocks)
+
+
+QUESTIONS = [
+    "What are the action items from this meeting?",
+    "Who owns the database migration task?",
+    "What deadlines were discussed?",
+    "What risks did the team mention about the release date?",
+    "Summarize the discussion about the API integration",
+    "Which tasks are blocking QA?",
+    "What did Dev say about model latency?",
+    "What was decided about the frontend build?",
+]
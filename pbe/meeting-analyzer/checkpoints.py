@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Inspect and invalidate the stage checkpoints of unfinished analyses
+
+    python checkpoints.py list
+    python checkpoints.py show 3f2a9c
+    python checkpoints.py invalidate 3f2a9c --stage summary
+    python checkpoints.py invalidate 3f2a9c
+
+Runs are identified by the SHA-256 of the uploaded file (any unique prefix
+works here) plus --team-id for uploads made with one. Invalidating a stage
+also drops every later stage; without --stage the whole run is dropped and
+the next upload starts from scratch.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.checkpoints import STAGES, CheckpointStore
+
+
+def resolve(store, prefix, team_id):
+    """Full content hash for a unique prefix, or None (with a message)"""
+    matches = [
+        run["content_hash"] for run in store.runs()
+        if run["content_hash"].startswith(prefix) and run["team_id"] == team_id
+    ]
+    if len(matches) == 1:
+        return matches[0]
+    print(f"✗ {'No run' if not matches else f'{len(matches)} runs'} matching '{prefix}'")
+    return None
+
+
+def print_runs(runs):
+    if not runs:
+        print("No unfinished analyses")
+        return
+    print(f"{'content hash':<14} {'team':<12} {'meeting':<28} {'attempts':>8} {'next stage':<11} {'updated':<20} failure")
+    for run in runs:
+        failure = f"{run['failed_stage']}: {run['error']}" if run["error"] else ""
+        print(f"{run['content_hash'][:12]:<14} {run['team_id'] or '-':<12} {run['meeting_id']:<28} {run['attempts']:>8} "
+              f"{run['next_stage'] or 'save':<11} {run['updated_at'][:19]:<20} {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Checkpoint database (default CHECKPOINT_DB_PATH)")
+    parser.add_argument("--team-id", help="Team the upload was made for")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Unfinished analyses")
+    show = commands.add_parser("show", help="Stages of one run, as JSON")
+    show.add_argument("content_hash")
+    invalidate = commands.add_parser("invalidate", help="Drop a stage (and later ones) or a whole run")
+    invalidate.add_argument("content_hash")
+    invalidate.add_argument("--stage", choices=STAGES)
+    args = parser.parse_args()
+
+    store = CheckpointStore(args.db)
+    if args.command == "list":
+        print_runs(store.runs())
+        return 0
+
+    content_hash = resolve(store, args.content_hash, args.team_id)
+    if content_hash is None:
+        return 1
+    if args.command == "show":
+        print(json.dumps(store.describe(content_hash, args.team_id), indent=2))
+        return 0
+
+    if not store.invalidate(content_hash, args.team_id, args.stage):
+        print(f"✗ Nothing checkpointed at stage {args.stage}")
+        return 1
+    print(f"✓ Invalidated {f'{args.stage} and later stages' if args.stage else 'run'} of {content_hash[:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,31 +9,143 @@ class Config:
     
     # API Keys
     COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+    # Override the Cohere API URL (e.g. the local stand-in used by benchmarks/)
+    COHERE_BASE_URL = os.getenv("COHERE_BASE_URL")
     
     # Ollama Configuration (for Q&A to avoid rate limits)
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2:1.5b")
+    # Comma-separated list of Ollama instances to load balance across
+    OLLAMA_BASE_URLS = [
+        url.strip() for url in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if url.strip()
+    ]
+    OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))
+    OLLAMA_MAX_FAILURES = int(os.getenv("OLLAMA_MAX_FAILURES", "2"))
+    OLLAMA_EWMA_ALPHA = float(os.getenv("OLLAMA_EWMA_ALPHA", "0.3"))
     
     # Qdrant Configuration
     QDRANT_URL = os.getenv("QDRANT_URL")
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+    # Embedded Qdrant (":memory:" or a directory) instead of a server
+    QDRANT_LOCAL_PATH = os.getenv("QDRANT_LOCAL_PATH")
+    
+    # Load clients and the embedding model in the background at startup
+    # (otherwise on first use)
+    WARM_UP_ON_START = os.getenv("WARM_UP_ON_START", "true").lower() == "true"
     
     # Application Settings
     COLLECTION_NAME = os.getenv("COLLECTION_NAME", "meeting_transcripts")
+    # Meeting- and segment-level vectors for coarse-to-fine search
+    SUMMARY_COLLECTION_NAME = os.getenv("SUMMARY_COLLECTION_NAME", f"{COLLECTION_NAME}_summaries")
+    SEGMENT_SIZE = int(os.getenv("SEGMENT_SIZE", "12"))
+    COARSE_CANDIDATES = int(os.getenv("COARSE_CANDIDATES", "20"))
     EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    # "torch", "onnx" or "onnx-int8" (ONNX Runtime; needs optimum[onnxruntime])
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "data/onnx")
+    # Quantization target: arm64, avx2, avx512 or avx512_vnni
+    EMBEDDING_ONNX_QUANT_CONFIG = os.getenv("EMBEDDING_ONNX_QUANT_CONFIG", "avx2")
+    # Micro-batch concurrent encodes through one embedding worker thread
+    EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+    EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+    EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+    # Consecutive caption cues (WebVTT/SRT/JSON segments) of one speaker are merged
+    # into a turn while the pause is at most this long and the turn this short
+    CUE_MERGE_MAX_GAP = float(os.getenv("CUE_MERGE_MAX_GAP", "2.0"))
+    CUE_MERGE_MAX_SECONDS = float(os.getenv("CUE_MERGE_MAX_SECONDS", "60"))
+    # Transcript lines embedded and upserted per batch while streaming an upload
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    # Torch threads per gunicorn worker (0 = CPU count / number of workers)
+    TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+    
+    # Meeting storage (SQLite) and its in-memory hot cache
+    MEETING_DB_PATH = os.getenv("MEETING_DB_PATH", "data/meetings.db")
+    MEETING_CACHE_SIZE = int(os.getenv("MEETING_CACHE_SIZE", "128"))
+    MEETING_CACHE_MAX_ENTRIES = int(os.getenv("MEETING_CACHE_MAX_ENTRIES", "200000"))
+    # Per-stage outputs of unfinished analyses (so retries resume), and how many
+    # sentiment scores are computed between saves within that stage
+    CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", MEETING_DB_PATH)
+    CHECKPOINT_SAVE_EVERY = int(os.getenv("CHECKPOINT_SAVE_EVERY", "100"))
+    # One attempt at a time per run: another upload of the same content (and
+    # team) gets a 409 until the running one fails, finishes or goes this long
+    # without saving a checkpoint
+    CHECKPOINT_LEASE_SECONDS = float(os.getenv("CHECKPOINT_LEASE_SECONDS", "900"))
+    
+    # Re-uploads of content that was already analyzed: "return" the existing
+    # meeting, "alias" it under a new meeting id (copied, not recomputed) or
+    # "reanalyze"; overridable per upload with the on_duplicate form field
+    UPLOAD_ON_DUPLICATE = os.getenv("UPLOAD_ON_DUPLICATE", "return")
+    # Saved uploads are deleted once older than UPLOAD_RETENTION_HOURS and, oldest
+    # first, while the directory is over UPLOAD_MAX_MB (0 = no limit for either);
+    # checked after uploads at most every UPLOAD_GC_INTERVAL_SECONDS
+    UPLOAD_RETENTION_HOURS = float(os.getenv("UPLOAD_RETENTION_HOURS", "72"))
+    UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "1024"))
+    UPLOAD_GC_INTERVAL_SECONDS = float(os.getenv("UPLOAD_GC_INTERVAL_SECONDS", "300"))
+    # Uploads being analyzed are never collected; a hold older than this is
+    # assumed to be left by a worker that died
+    UPLOAD_HOLD_TIMEOUT_HOURS = float(os.getenv("UPLOAD_HOLD_TIMEOUT_HOURS", "6"))
+    # Appends to one meeting run one at a time; a claim left by a worker that
+    # died mid-append is taken over after this long
+    APPEND_CLAIM_TIMEOUT_SECONDS = float(os.getenv("APPEND_CLAIM_TIMEOUT_SECONDS", "600"))
+    
+    # Questions with no meeting vocabulary and a lower cosine similarity to the
+    # meeting's embedding centroid are rejected as off-topic
+    OFFTOPIC_SIMILARITY_THRESHOLD = float(os.getenv("OFFTOPIC_SIMILARITY_THRESHOLD", "0.15"))
+    
+    # Chat sessions (multi-turn memory)
+    CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+    CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+    CHAT_HISTORY_RECENT_TURNS = int(os.getenv("CHAT_HISTORY_RECENT_TURNS", "4"))
+    CHAT_HISTORY_MAX_CHARS = int(os.getenv("CHAT_HISTORY_MAX_CHARS", "4000"))
+    CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1500"))
+    # Sessions are persisted here so every worker process sees the same history
+    # (empty string keeps them in process memory only)
+    CHAT_SESSION_DB_PATH = os.getenv("CHAT_SESSION_DB_PATH", MEETING_DB_PATH)
+    
+    # Hedged chat requests (Ollama primary, Cohere backup)
+    CHAT_HEDGING_ENABLED = os.getenv("CHAT_HEDGING_ENABLED", "false").lower() == "true"
+    CHAT_HEDGE_PERCENTILE = float(os.getenv("CHAT_HEDGE_PERCENTILE", "95"))
+    CHAT_HEDGE_MIN_DELAY = float(os.getenv("CHAT_HEDGE_MIN_DELAY", "1.0"))
+    CHAT_HEDGE_MAX_DELAY = float(os.getenv("CHAT_HEDGE_MAX_DELAY", "10.0"))
+    CHAT_HEDGE_DEFAULT_DELAY = float(os.getenv("CHAT_HEDGE_DEFAULT_DELAY", "3.0"))
+    CHAT_HEDGE_WINDOW = int(os.getenv("CHAT_HEDGE_WINDOW", "200"))
+    CHAT_HEDGE_WORKERS = int(os.getenv("CHAT_HEDGE_WORKERS", "16"))
+    
+    # Tracing: spans feed the /metrics histograms; traces are kept for requests
+    # sent with ?trace=1 or an X-Trace header (or all requests if TRACE_ALL_REQUESTS)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_ALL_REQUESTS = os.getenv("TRACE_ALL_REQUESTS", "false").lower() == "true"
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "50"))
+    
+    # LLM token accounting: USD per million (prompt, completion) tokens
+    LLM_PRICES_PER_MTOK = {
+        "cohere": (float(os.getenv("COHERE_PRICE_IN_PER_MTOK", "0.15")),
+                   float(os.getenv("COHERE_PRICE_OUT_PER_MTOK", "0.60"))),
+        "ollama": (float(os.getenv("OLLAMA_PRICE_IN_PER_MTOK", "0")),
+                   float(os.getenv("OLLAMA_PRICE_OUT_PER_MTOK", "0"))),
+    }
+    # Per-meeting budgets (0 = unlimited). Past either one, sentiment, urgency
+    # and chat switch to cheaper paths instead of more LLM calls.
+    MEETING_TOKEN_BUDGET = int(os.getenv("MEETING_TOKEN_BUDGET", "0"))
+    MEETING_COST_BUDGET_USD = float(os.getenv("MEETING_COST_BUDGET_USD", "0"))
     
     # Rate limiting
     API_DELAY_SECONDS = float(os.getenv("API_DELAY_SECONDS", "0.5"))
+    # Cohere calls per minute shared by all workers of a batch import
+    # (batch.py; replaces API_DELAY_SECONDS there, 0 = no limit)
+    BATCH_COHERE_RPM = int(os.getenv("BATCH_COHERE_RPM", "100"))
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
     
     @classmethod
     def validate(cls):
         """Validate required configuration"""
-        required_vars = [
-            ("COHERE_API_KEY", cls.COHERE_API_KEY),
-            ("QDRANT_URL", cls.QDRANT_URL),
-            ("QDRANT_API_KEY", cls.QDRANT_API_KEY)
-        ]
+        required_vars = [("COHERE_API_KEY", cls.COHERE_API_KEY)]
+        if not cls.QDRANT_LOCAL_PATH:
+            required_vars += [
+                ("QDRANT_URL", cls.QDRANT_URL),
+                ("QDRANT_API_KEY", cls.QDRANT_API_KEY)
+            ]
         
         missing = [name for name, value in required_vars if not value]
         
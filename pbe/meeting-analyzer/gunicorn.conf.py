@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for production serving
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is preloaded in the master (see wsgi.py) and workers are forked from
+it. Meetings and chat sessions live in SQLite, so any worker can serve any
+request.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    from wsgi import after_fork
+    after_fork(server.cfg.workers)
@@ -7,21 +7,87 @@ AI-powered meeting analysis with semantic search and interactive chat
 from datetime import datetime
 from src.clients import APIClients
 from src.transcript_parser import TranscriptParser
+from src.transcript import Transcript
 from src.meeting_analyzer import MeetingAnalyzer
 from src.vector_store import VectorStore
 from src.chat_interface import ChatInterface
-from src.utils import export_meeting_analysis, generate_meeting_id, demo_questions, print_meeting_summary
+from src import usage
+from src.utils import export_meeting_analysis, generate_meeting_id, demo_questions, print_meeting_summary, timed_stage
 from data.sample_transcript import RAW_TRANSCRIPT
 
+def process_transcript(raw_text, parser, analyzer, vector_store, chat_interface, timings=None):
+    """
+    Parse, analyze, embed and store one transcript
+
+    Returns: processed meeting data. Wall time per stage (seconds) is added
+    to `timings` if a dict is given.
+    """
+    timings = {} if timings is None else timings
+    meeting_id = generate_meeting_id()
+    
+    # Parse transcript
+    print(f"\n{'='*60}")
+    print("PARSING TRANSCRIPT")
+    print("="*60)
+    
+    with timed_stage(timings, "parse"):
+        transcript = parser.parse_transcript_with_timestamps(raw_text)
+    print(f"✓ Parsed {len(transcript)} transcript entries with timestamps")
+    
+    with usage.track(meeting_id, "cli") as ledger:
+        # Add sentiment analysis
+        with timed_stage(timings, "sentiment"):
+            transcript = Transcript.from_entries(parser.add_sentiment_analysis(transcript))
+        
+        # Analyze meeting
+        with timed_stage(timings, "analysis"):
+            summary = analyzer.analyze_meeting(transcript)
+    
+    llm_usage = ledger.summary()
+    print(f"✓ LLM usage: {llm_usage['total']['tokens']} tokens, ${llm_usage['total']['cost_usd']:.4f}")
+    
+    # Store in vector database
+    print(f"\n{'='*60}")
+    print(f"STORING TRANSCRIPT IN QDRANT CLOUD")
+    print(f"{'='*60}")
+    print(f"Meeting ID: {meeting_id}")
+    
+    with timed_stage(timings, "embed_and_store"):
+        line_vectors = vector_store.store_transcript_in_qdrant(transcript, meeting_id)
+    with timed_stage(timings, "meeting_vectors"):
+        vector_store.store_meeting_vectors(
+            meeting_id,
+            summary.get("executive_summary", ""),
+            summary.get("topics_discussed", []),
+            line_vectors
+        )
+    
+    # Create processed meeting data
+    with timed_stage(timings, "prepare_chat"):
+        processed_meeting_data = {
+            "meeting_id": meeting_id,
+            "timestamp": datetime.now().isoformat(),
+            "overall_sentiment": summary.get("overall_sentiment", "neutral"),
+            "transcript": transcript,
+            "summary": summary,
+            "qdrant_stored": True,
+            "total_entries_stored": line_vectors.count,
+            "usage": llm_usage,
+            "centroid": line_vectors.centroid()
+        }
+        chat_interface.prepare_meeting(processed_meeting_data)
+    
+    return processed_meeting_data
+
 def main():
     """Main application entry point"""
     print("🚀 Meeting Analyzer - AI-Powered Meeting Analysis")
     print("="*60)
     
     try:
-        # Initialize API clients
+        # Initialize API clients (the CLI needs everything up front)
         clients = APIClients()
-        clients.create_collection_if_not_exists()
+        clients.warm_up()
         
         # Initialize components
         parser = TranscriptParser(clients.cohere_client)
@@ -29,39 +95,7 @@ def main():
         vector_store = VectorStore(clients.qdrant_client, clients.embedding_model)
         chat_interface = ChatInterface(clients, vector_store)  # Pass full clients object
         
-        # Parse transcript
-        print(f"\n{'='*60}")
-        print("PARSING TRANSCRIPT")
-        print("="*60)
-        
-        transcript = parser.parse_transcript_with_timestamps(RAW_TRANSCRIPT)
-        print(f"✓ Parsed {len(transcript)} transcript entries with timestamps")
-        
-        # Add sentiment analysis
-        transcript = parser.add_sentiment_analysis(transcript)
-        
-        # Analyze meeting
-        summary = analyzer.analyze_meeting(transcript)
-        
-        # Store in vector database
-        meeting_id = generate_meeting_id()
-        print(f"\n{'='*60}")
-        print(f"STORING TRANSCRIPT IN QDRANT CLOUD")
-        print(f"{'='*60}")
-        print(f"Meeting ID: {meeting_id}")
-        
-        stored_points = vector_store.store_transcript_in_qdrant(transcript, meeting_id)
-        
-        # Create processed meeting data
-        processed_meeting_data = {
-            "meeting_id": meeting_id,
-            "timestamp": datetime.now().isoformat(),
-            "overall_sentiment": summary.get("overall_sentiment", "neutral"),
-            "transcript": transcript,
-            "summary": summary,
-            "qdrant_stored": True,
-            "total_entries_stored": len(stored_points)
-        }
+        processed_meeting_data = process_transcript(RAW_TRANSCRIPT, parser, analyzer, vector_store, chat_interface)
         
         # Print summary
         print_meeting_summary(processed_meeting_data)
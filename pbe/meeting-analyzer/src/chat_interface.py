@@ -1,4 +1,12 @@
+import threading
+from collections import OrderedDict
 from config.settings import Config
+from src.chat_sessions import ChatSessionStore
+from src.hedging import Hedger
+from src.question_matcher import MeetingMatcher
+from src.tracing import tracer, cohere_chat
+from src import usage
+from src.transcript import Transcript
 
 class ChatInterface:
     """Interactive chat interface for meeting analysis"""
@@ -6,46 +14,99 @@ class ChatInterface:
     def __init__(self, api_clients, vector_store):
         self.api_clients = api_clients  # Changed to use api_clients instead of just cohere_client
         self.vector_store = vector_store
+        self.sessions = ChatSessionStore(summarizer=self._summarize_history, db_path=Config.CHAT_SESSION_DB_PATH)
+        self.hedger = Hedger() if Config.CHAT_HEDGING_ENABLED else None
+        self._matchers = OrderedDict()
+        self._matchers_lock = threading.Lock()
     
-    def is_meeting_related_question(self, question, meeting_data):
+    @tracer.traced("chat.summarize_history")
+    def _summarize_history(self, summary, turns):
+        """Fold older conversation turns into the rolling session summary"""
+        dropped = "\n".join(f"User: {q}\nAssistant: {a}" for q, a in turns)
+        prompt = f"""Current summary of the conversation:
+{summary or '(none)'}
+
+Additional turns:
+{dropped}
+
+Write an updated summary in at most 5 sentences. Keep names, tasks, dates and decisions the user asked about."""
+
+        return self.api_clients.generate_with_ollama(
+            prompt=prompt,
+            system_prompt="You condense chat history about a meeting. Reply with the summary only.",
+            temperature=0.1,
+            max_tokens=200,
+            stage="chat_history"
+        ).strip()
+    
+    def prepare_meeting(self, meeting_data):
+        """Precompile the question matcher for a meeting (call once after analysis)"""
+        matcher = MeetingMatcher.from_meeting(meeting_data)
+        meeting_id = meeting_data.get('meeting_id')
+        with self._matchers_lock:
+            self._matchers[meeting_id] = matcher
+            self._matchers.move_to_end(meeting_id)
+            while len(self._matchers) > 256:
+                self._matchers.popitem(last=False)
+        return matcher
+    
+    def _get_matcher(self, meeting_data):
+        with self._matchers_lock:
+            matcher = self._matchers.get(meeting_data.get('meeting_id'))
+        return matcher or self.prepare_meeting(meeting_data)
+    
+    @tracer.traced("chat.validate_question")
+    def is_meeting_related_question(self, question, meeting_data, previous_question=None):
         """
         Validate if the question is related to the meeting.
+        A follow-up ("and when is that due?") rarely names its subject, so
+        with the session's previous question the two are scored together.
         Returns: (is_related: bool, reason: str)
         """
-        question_lower = question.lower()
+        matcher = self._get_matcher(meeting_data)
         
-        meeting_keywords = [
-            'meeting', 'discuss', 'said', 'mention', 'talk', 'speaker', 'participant',
-            'action', 'task', 'deadline', 'decision', 'summary', 'topic', 'agenda',
-            'who', 'what', 'when', 'why', 'how', 'which', 'tell', 'explain', 'describe',
-            'sentiment', 'mood', 'tone', 'owner', 'assigned', 'responsible', 'urgent',
-            'important', 'critical', 'priority', 'risk', 'issue', 'problem', 'solution',
-            'agree', 'disagree', 'point', 'highlight', 'key', 'main', 'focus', 'outcome',
-            'result', 'conclusion', 'next', 'step', 'follow', 'up', 'plan', 'schedule'
-        ]
+        reason = matcher.lexical_match(question)
+        if reason:
+            return True, reason
         
-        if any(keyword in question_lower for keyword in meeting_keywords):
-            return True, "Question contains meeting-related keywords"
-        
-        speakers = list(meeting_data.get('speakers', {}).keys())
-        if any(speaker.lower() in question_lower for speaker in speakers):
-            return True, "Question mentions a meeting participant"
-        
-        topics = meeting_data.get('summary', {}).get('topics_discussed', [])
-        if not topics:
-            topics = meeting_data.get('topics', [])
-        if any(topic.lower() in question_lower for topic in topics if topic):
-            return True, "Question mentions a meeting topic"
+        # No meeting vocabulary: decide on semantic closeness to the meeting
+        if previous_question:
+            question = f"{previous_question} {question}"
+        try:
+            similarity = matcher.similarity(self.vector_store.embed_query(question))
+        except Exception as e:
+            print(f"⚠ Off-topic check failed: {e}")
+            similarity = None
         
-        return True, "Allowing question by default"
+        if similarity is None:
+            return True, "Allowing question (no meeting embedding available)"
+        if similarity < Config.OFFTOPIC_SIMILARITY_THRESHOLD:
+            return False, f"Question is unrelated to the meeting content (similarity {similarity:.2f})"
+        return True, f"Question is semantically close to the meeting content (similarity {similarity:.2f})"
     
-    def chat_with_transcript(self, user_question, processed_data, use_semantic_search=True):
+    @tracer.traced("chat.answer")
+    def chat_with_transcript(self, user_question, processed_data, use_semantic_search=True,
+                             session=None, record_turn=True, validated=False):
         """
         Answer user questions based on meeting data using LLM with semantic search
         Only answers questions related to the meeting.
+
+        If a ChatSession is given, its history is included in the prompt and
+        (unless record_turn is False) the new turn is recorded on it, so
+        follow-up questions resolve. Pass validated=True if the caller has
+        already run is_meeting_related_question.
         """
+        # Follow-ups ("and when is that due?") rarely mention the subject themselves
+        previous_question = session.last_question() if session is not None else None
+        is_follow_up = previous_question is not None
+
         # Validate if question is meeting-related
-        is_related, validation_reason = self.is_meeting_related_question(user_question, processed_data)
+        if not validated:
+            is_related, validation_reason = self.is_meeting_related_question(
+                user_question, processed_data, previous_question
+            )
+        else:
+            is_related = True
         
         if not is_related:
             return f"I can only answer questions related to this meeting. Your question appears to be off-topic. Please ask something about the meeting content, participants, decisions, or action items."
@@ -53,12 +114,18 @@ class ChatInterface:
         transcript = processed_data.get('transcript', [])
         summary = processed_data.get('summary', {})
         meeting_id = processed_data.get('meeting_id')
+        # Over the meeting's budget: answer from the search hits and summary
+        # only, instead of resending the whole transcript
+        compact = usage.over_budget("chat")
 
         # Use semantic search to find most relevant parts
         relevant_context = ""
         if use_semantic_search and meeting_id:
+            search_query = user_question
+            if is_follow_up:
+                search_query = f"{previous_question} {user_question}"
             try:
-                search_results = self.vector_store.search_relevant_transcript(user_question, meeting_id, top_k=5)
+                search_results = self.vector_store.search_relevant_transcript(search_query, meeting_id, top_k=5)
                 if search_results:
                     relevant_context = "\n\nMOST RELEVANT TRANSCRIPT SECTIONS (Semantic Search):\n"
                     for i, result in enumerate(search_results, 1):
@@ -68,10 +135,10 @@ class ChatInterface:
                 print(f"Semantic search warning: {e}")
 
         # Format full transcript with sentiment
-        formatted_transcript = "\n".join(
-            f"[{t['timestamp']}] {t['speaker_name']} (Sentiment: {t['sentiment']}): {t['text']}"
-            for t in transcript
-        )
+        if compact and relevant_context:
+            formatted_transcript = "(omitted to stay within the meeting's token budget; see the relevant sections)"
+        else:
+            formatted_transcript = "\n".join(Transcript.coerce(transcript).format_lines(with_sentiment=True))
 
         # Format summary
         formatted_summary = f"""
@@ -99,34 +166,47 @@ OVERALL SENTIMENT: {summary.get('overall_sentiment', 'N/A')}
 Be concise and accurate. If information is not available in the meeting, say so clearly.
 Reference specific timestamps and speakers when relevant.
 Prioritize information from the most relevant sections when available.
+Use the conversation so far to resolve follow-up questions.
 Do not make up information that is not in the meeting."""
 
+        history = session.format_history() if session is not None else ""
+
         user_message = f"""
 FULL MEETING TRANSCRIPT:
 {formatted_transcript}
 
 MEETING SUMMARY:
 {formatted_summary}
-{relevant_context}
+{relevant_context}{history}
 
 USER QUESTION: {user_question}
 
 Provide a clear, concise answer based on the meeting data above. Use the relevant sections highlighted by semantic search for better context.
 If the answer is not available in the meeting data, clearly state that."""
 
-        # Use Ollama for Q&A to avoid Cohere rate limits
-        try:
-            response = self.api_clients.chat_with_ollama(
+        answer = self._generate_answer(system_prompt, user_message, local_only=compact)
+
+        if session is not None and record_turn:
+            self.sessions.record_turn(session, user_question, answer)
+        return answer
+    
+    def _generate_answer(self, system_prompt, user_message, local_only=False):
+        """
+        Answer with Ollama, hedged against (or falling back to) Cohere.
+        With local_only (meeting over budget) Cohere is never called.
+        """
+        def ask_ollama():
+            return self.api_clients.generate_with_ollama(
                 prompt=user_message,
                 system_prompt=system_prompt,
                 temperature=0.3,
                 max_tokens=500
             )
-            return response
-        except Exception as e:
-            print(f"⚠ Ollama failed, falling back to Cohere: {e}")
-            # Fallback to Cohere if Ollama fails
-            response = self.api_clients.cohere_client.chat(
+
+        def ask_cohere():
+            response = cohere_chat(
+                self.api_clients.cohere_client,
+                "chat",
                 model="command-r-v2",
                 preamble=system_prompt,
                 message=user_message,
@@ -134,6 +214,33 @@ If the answer is not available in the meeting data, clearly state that."""
                 max_tokens=500
             )
             return response.text
+
+        if local_only:
+            return self.api_clients.chat_with_ollama(
+                prompt=user_message,
+                system_prompt=system_prompt,
+                temperature=0.3,
+                max_tokens=500
+            )
+
+        if self.hedger is not None:
+            answer, winner = self.hedger.run(ask_ollama, ask_cohere)
+            if winner == "backup":
+                print("↪ Answer served by Cohere (hedged)")
+            return answer
+
+        # Use Ollama for Q&A to avoid Cohere rate limits
+        try:
+            return self.api_clients.generate_with_ollama(
+                prompt=user_message,
+                system_prompt=system_prompt,
+                temperature=0.3,
+                max_tokens=500
+            )
+        except Exception as e:
+            print(f"⚠ Ollama failed, falling back to Cohere: {e}")
+            # Fallback to Cohere if Ollama fails
+            return ask_cohere()
     
     def interactive_chat(self, processed_data):
         """Start an interactive chat session with semantic search"""
@@ -151,6 +258,8 @@ If the answer is not available in the meeting data, clearly state that."""
         print("  • 'actions' - List all action items with urgency")
         print("="*60 + "\n")
 
+        session = self.sessions.get(processed_data['meeting_id'], 'cli')
+
         while True:
             try:
                 user_input = input("You: ").strip()
@@ -186,7 +295,7 @@ If the answer is not available in the meeting data, clearly state that."""
 
                 # Regular question - use LLM with semantic search
                 print(f"\n🔍 Analyzing your question...\n")
-                response = self.chat_with_transcript(user_input, processed_data, use_semantic_search=True)
+                response = self.chat_with_transcript(user_input, processed_data, use_semantic_search=True, session=session)
                 print(f"🤖 Assistant: {response}\n")
 
             except KeyboardInterrupt:
@@ -273,6 +382,8 @@ If the answer is not available in the meeting data, clearly state that."""
         print("  • 'actions' - List all action items with urgency")
         print("="*60 + "\n")
 
+        session = self.sessions.get(processed_data['meeting_id'], 'cli')
+
         while True:
             try:
                 user_input = input("You: ").strip()
@@ -308,7 +419,7 @@ If the answer is not available in the meeting data, clearly state that."""
 
                 # Regular question - use LLM with semantic search
                 print(f"\n🔍 Analyzing your question...\n")
-                response = self.chat_with_transcript(user_input, processed_data, use_semantic_search=True)
+                response = self.chat_with_transcript(user_input, processed_data, use_semantic_search=True, session=session)
                 print(f"🤖 Assistant: {response}\n")
 
             except KeyboardInterrupt:
@@ -0,0 +1,259 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from config.settings import Config
+from src.clients import FailedReply
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    meeting_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    turns TEXT NOT NULL,
+    turn_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (meeting_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated_at ON chat_sessions(updated_at);
+"""
+
+class ChatSession:
+    """Conversation state for one user talking about one meeting"""
+
+    def __init__(self, meeting_id, user_id):
+        self.meeting_id = meeting_id
+        self.user_id = user_id
+        self.turns = deque()  # (question, answer) pairs kept verbatim
+        self.summary = ""     # rolling summary of older turns
+        self.turn_count = 0
+        self.last_active = time.monotonic()
+        self.lock = threading.Lock()
+
+    def verbatim_chars(self):
+        return sum(len(q) + len(a) for q, a in self.turns)
+
+    def last_question(self):
+        return self.turns[-1][0] if self.turns else None
+
+    def format_history(self):
+        """Render the session as prompt context (empty string if no history)"""
+        if not self.turns and not self.summary:
+            return ""
+
+        history = "\n\nCONVERSATION SO FAR:\n"
+        if self.summary:
+            history += f"Earlier in this conversation: {self.summary}\n"
+        for question, answer in self.turns:
+            history += f"User: {question}\nAssistant: {answer}\n"
+        return history
+
+
+class ChatSessionStore:
+    """
+    Bounded, expiring store of chat sessions keyed by (meeting_id, user_id).
+
+    The most recent turns are kept verbatim; once a session exceeds its turn or
+    character budget the oldest turns are folded into a rolling summary by the
+    `summarizer` callable (summary, [(q, a), ...]) -> new summary.
+
+    With a `db_path` every session is also written to SQLite after each turn
+    and re-read on get(), so worker processes sharing the file share history.
+    """
+
+    def __init__(self, summarizer=None, max_sessions=None, idle_ttl=None,
+                 recent_turns=None, max_history_chars=None, max_summary_chars=None,
+                 db_path=None):
+        self.summarizer = summarizer
+        self.max_sessions = max_sessions or Config.CHAT_MAX_SESSIONS
+        self.idle_ttl = idle_ttl or Config.CHAT_SESSION_TTL_SECONDS
+        self.recent_turns = recent_turns or Config.CHAT_HISTORY_RECENT_TURNS
+        self.max_history_chars = max_history_chars or Config.CHAT_HISTORY_MAX_CHARS
+        self.max_summary_chars = max_summary_chars or Config.CHAT_SUMMARY_MAX_CHARS
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        self._local = threading.local()
+
+        if self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+    def _conn(self):
+        """One connection per thread; SQLite connections are not shareable"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Drop connections and locks inherited from the parent process"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        for session in self._sessions.values():
+            session.lock = threading.Lock()
+
+    def get(self, meeting_id, user_id):
+        """Return the live session for this meeting and user, creating it if needed"""
+        key = (meeting_id, user_id)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(key)
+            if session is None:
+                session = ChatSession(meeting_id, user_id)
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+            session.last_active = now
+
+        if self.db_path:
+            self._load(session)
+        return session
+
+    def _load(self, session):
+        """Refresh a session from the database (another worker may have written it)"""
+        row = self._conn().execute(
+            "SELECT summary, turns, turn_count FROM chat_sessions "
+            "WHERE meeting_id = ? AND user_id = ? AND updated_at >= ?",
+            (session.meeting_id, session.user_id, time.time() - self.idle_ttl)
+        ).fetchone()
+        with session.lock:
+            if row is None:
+                # Never stored, expired, or reset elsewhere
+                session.turns.clear()
+                session.summary = ""
+                session.turn_count = 0
+            else:
+                session.summary = row[0]
+                session.turns = deque(tuple(turn) for turn in json.loads(row[1]))
+                session.turn_count = row[2]
+
+    def _save(self, session):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions (meeting_id, user_id, summary, turns, turn_count, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session.meeting_id, session.user_id, session.summary,
+                 json.dumps(list(session.turns)), session.turn_count, now)
+            )
+            conn.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (now - self.idle_ttl,))
+
+    def reset(self, meeting_id, user_id):
+        """Drop a session's history. Returns True if one existed."""
+        with self._lock:
+            existed = self._sessions.pop((meeting_id, user_id), None) is not None
+        if self.db_path:
+            conn = self._conn()
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM chat_sessions WHERE meeting_id = ? AND user_id = ?", (meeting_id, user_id)
+                )
+            existed = existed or cursor.rowcount > 0
+        return existed
+
+    def drop_meeting(self, meeting_id):
+        """Drop every session attached to a meeting"""
+        with self._lock:
+            for key in [k for k in self._sessions if k[0] == meeting_id]:
+                del self._sessions[key]
+        if self.db_path:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM chat_sessions WHERE meeting_id = ?", (meeting_id,))
+
+    def record_turn(self, session, question, answer):
+        """
+        Append a turn and compress older turns if the session is over budget.
+        A FailedReply (the model could not be reached) is not recorded.
+
+        The summarizer runs outside the session lock, so other requests on the
+        session don't wait for it; the summary is merged back in afterwards.
+        """
+        if isinstance(answer, FailedReply):
+            return
+        with session.lock:
+            session.turns.append((question, answer))
+            session.turn_count += 1
+            session.last_active = time.monotonic()
+
+            evicted = []
+            while len(session.turns) > 1 and (
+                len(session.turns) > self.recent_turns
+                or session.verbatim_chars() > self.max_history_chars
+            ):
+                evicted.append(session.turns.popleft())
+            if session.verbatim_chars() > self.max_history_chars:
+                # The newest turn alone is over budget
+                session.turns[-1] = self._truncate_turn(*session.turns[-1])
+
+            base = session.summary
+            if not evicted:
+                if self.db_path:
+                    self._save(session)
+                return
+
+        new_summary = self._compress(base, evicted)
+
+        with session.lock:
+            if session.summary == base:
+                session.summary = new_summary
+            else:
+                # Another turn was folded in meanwhile; add ours to its summary
+                session.summary = self._fit_summary(f"{session.summary} {self._condense(evicted)}")
+            if self.db_path:
+                self._save(session)
+
+    def _truncate_turn(self, question, answer):
+        """Cut a turn down to max_history_chars, keeping at most half for the question"""
+        question = question[:self.max_history_chars // 2]
+        room = self.max_history_chars - len(question)
+        if len(answer) > room:
+            answer = answer[:max(room - 3, 0)] + "..."
+        return question, answer
+
+    def _compress(self, summary, turns):
+        new_summary = None
+        if self.summarizer:
+            try:
+                new_summary = self.summarizer(summary, turns)
+            except Exception as e:
+                print(f"⚠ Chat history summarization failed: {e}")
+
+        if not new_summary:
+            # Fall back to a plain, truncated transcript of the dropped turns
+            new_summary = f"{summary} {self._condense(turns)}".strip()
+        return self._fit_summary(new_summary)
+
+    @staticmethod
+    def _condense(turns):
+        return " ".join(f"Q: {q[:200]} A: {a[:300]}" for q, a in turns)
+
+    def _fit_summary(self, summary):
+        if len(summary) > self.max_summary_chars:
+            summary = "..." + summary[-(self.max_summary_chars - 3):]
+        return summary
+
+    def _expire(self, now):
+        # Sessions are ordered by last use, so expired ones sit at the front
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_active <= self.idle_ttl:
+                break
+            del self._sessions[key]
+
+    def __len__(self):
+        return len(self._sessions)
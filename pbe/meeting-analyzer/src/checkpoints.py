@@ -0,0 +1,414 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from config.settings import Config
+
+# Pipeline stages in order; each one's output depends on the ones before it
+STAGES = ("parse", "sentiment", "summary", "urgency", "embedding")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    content_hash TEXT NOT NULL,
+    team_id TEXT NOT NULL DEFAULT '',
+    meeting_id TEXT NOT NULL,
+    filename TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    failed_stage TEXT,
+    error TEXT,
+    owner TEXT,
+    lease_expires REAL,
+    PRIMARY KEY (content_hash, team_id)
+);
+CREATE TABLE IF NOT EXISTS stage_checkpoints (
+    content_hash TEXT NOT NULL,
+    team_id TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    progress INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (content_hash, team_id, stage),
+    FOREIGN KEY (content_hash, team_id) REFERENCES pipeline_runs(content_hash, team_id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS stage_slices (
+    content_hash TEXT NOT NULL,
+    team_id TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (content_hash, team_id, stage, start),
+    FOREIGN KEY (content_hash, team_id) REFERENCES pipeline_runs(content_hash, team_id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS run_usage (
+    content_hash TEXT NOT NULL,
+    team_id TEXT NOT NULL DEFAULT '',
+    endpoint TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    estimated_calls INTEGER NOT NULL DEFAULT 0,
+    tokens_in INTEGER NOT NULL DEFAULT 0,
+    tokens_out INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (content_hash, team_id, endpoint, stage, provider),
+    FOREIGN KEY (content_hash, team_id) REFERENCES pipeline_runs(content_hash, team_id) ON DELETE CASCADE
+);
+"""
+
+
+class RunInProgress(Exception):
+    """Another attempt holds the lease on this content's analysis"""
+
+
+class PipelineRun:
+    """
+    Checkpoints of one transcript's analysis for one team, keyed by the
+    transcript's content hash.
+
+    load() returns a stage's saved output once the stage completed, so the
+    pipeline can skip it; load_partial() also returns what an interrupted
+    stage got through (e.g. the sentiment scores computed before a failure),
+    joining the slices save_slice() wrote while the stage ran.
+    Writes go through the attempt's lease (`owner`) and raise RunInProgress
+    once another attempt has taken the run over.
+    """
+
+    def __init__(self, store, content_hash, team_id, meeting_id, created_at, attempts, resumed, owner=None):
+        self.store = store
+        self.key = (content_hash, team_id or '')
+        self.owner = owner
+        self.content_hash = content_hash
+        self.team_id = team_id
+        self.meeting_id = meeting_id
+        self.created_at = created_at
+        self.attempts = attempts
+        self.resumed = resumed
+
+    def load(self, stage):
+        payload, complete = self.store.load(self.key, stage)
+        return payload if complete else None
+
+    def load_partial(self, stage):
+        return self.store.load(self.key, stage)[0]
+
+    def save(self, stage, payload, complete=True):
+        self.store.save(self.key, stage, payload, complete, self.owner)
+
+    def save_slice(self, stage, start, values):
+        self.store.save_slice(self.key, stage, start, values, self.owner)
+
+    def invalidate(self, stage):
+        self.store.invalidate(*self.key, stage)
+
+    @contextmanager
+    def stage(self, name):
+        """Record an exception raised in the block as this run's failure"""
+        try:
+            yield
+        except RunInProgress:
+            raise
+        except Exception as e:
+            self.store.record_failure(self.key, name, f"{type(e).__name__}: {e}", self.owner)
+            raise
+
+    def release(self):
+        """Give up the lease so the next attempt can resume (a no-op after finish())"""
+        self.store.release(self.key, self.owner)
+
+    def add_usage(self, rows):
+        """Add an attempt's LLM usage rows (see UsageLedger.rows), failed attempts included"""
+        self.store.add_usage(self.key, rows)
+
+    def usage_rows(self):
+        return self.store.usage_rows(self.key)
+
+    def usage_spent(self):
+        """(tokens, cost_usd) every attempt on this run has used so far"""
+        rows = self.usage_rows()
+        return (sum(row['tokens_in'] + row['tokens_out'] for row in rows),
+                sum(row['cost_usd'] for row in rows))
+
+    def finish(self):
+        """The meeting is saved; its checkpoints are no longer needed"""
+        self.store.finish(self.key, self.owner)
+
+
+class CheckpointStore:
+    """
+    Per-stage outputs of the analysis pipeline (SQLite), so a retried upload
+    restarts from its first incomplete stage instead of from scratch.
+
+    A run is created per (content hash, team) on the first attempt and deleted
+    once the meeting is saved; a failed run keeps its meeting id, timestamp and
+    completed stages for the next upload of the same content by the same team.
+    One attempt at a time holds a run's lease, renewed by every checkpoint it
+    saves; another attempt on the same run while the lease is live gets
+    RunInProgress. Stage methods take the run's key, (content_hash, team_id or '').
+    """
+
+    def __init__(self, db_path=None, lease_seconds=None):
+        self.db_path = db_path or Config.CHECKPOINT_DB_PATH
+        self.lease_seconds = lease_seconds or Config.CHECKPOINT_LEASE_SECONDS
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        conn = self._conn()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(pipeline_runs)")}
+        if columns and 'owner' not in columns:
+            conn.execute("ALTER TABLE pipeline_runs ADD COLUMN owner TEXT")
+            conn.execute("ALTER TABLE pipeline_runs ADD COLUMN lease_expires REAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        """One connection per thread; SQLite connections are not shareable"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Drop connections inherited from the parent process"""
+        self._local = threading.local()
+
+    # Runs
+
+    def open_run(self, content_hash, meeting_id, filename=None, team_id=None):
+        """
+        The run for this content and team, leased to the caller: the earlier,
+        unfinished one if there is one (keeping its meeting id and timestamp),
+        else a new one for `meeting_id`. Raises RunInProgress while another
+        attempt holds the run's lease.
+        """
+        now = datetime.now().isoformat()
+        key = (content_hash, team_id or '')
+        owner = uuid.uuid4().hex
+        expires = time.time() + self.lease_seconds
+        conn = self._conn()
+        with conn:
+            # Take the write lock first, so two attempts can't both see the run free
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT meeting_id, created_at, attempts, owner, lease_expires FROM pipeline_runs "
+                "WHERE content_hash = ? AND team_id = ?", key
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO pipeline_runs (content_hash, team_id, meeting_id, filename, created_at, updated_at, "
+                    "owner, lease_expires) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + (meeting_id, filename, now, now, owner, expires)
+                )
+                return PipelineRun(self, content_hash, team_id, meeting_id, now, 1, resumed=False, owner=owner)
+
+            meeting_id, created_at, attempts, holder, lease_expires = row
+            if holder is not None and lease_expires > time.time():
+                raise RunInProgress(
+                    f"Meeting {meeting_id} is already being analyzed from this content; try again later"
+                )
+            conn.execute(
+                "UPDATE pipeline_runs SET attempts = attempts + 1, filename = ?, updated_at = ?, owner = ?, "
+                "lease_expires = ? WHERE content_hash = ? AND team_id = ?", (filename, now, owner, expires) + key
+            )
+            return PipelineRun(self, content_hash, team_id, meeting_id, created_at, attempts + 1, resumed=True,
+                               owner=owner)
+
+    def record_failure(self, key, stage, error, owner=None):
+        """Record a failed stage and release the attempt's lease"""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE pipeline_runs SET failed_stage = ?, error = ?, updated_at = ?, owner = NULL, "
+                "lease_expires = NULL WHERE content_hash = ? AND team_id = ? AND owner IS ?",
+                (stage, error, datetime.now().isoformat()) + key + (owner,)
+            )
+
+    def release(self, key, owner):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE pipeline_runs SET owner = NULL, lease_expires = NULL "
+                "WHERE content_hash = ? AND team_id = ? AND owner = ?", key + (owner,)
+            )
+
+    def finish(self, key, owner):
+        """Drop a run whose meeting is saved, unless another attempt has taken it over"""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM pipeline_runs WHERE content_hash = ? AND team_id = ? AND owner IS ?", key + (owner,)
+            )
+
+    def add_usage(self, key, rows):
+        """Add usage rows to a run's running totals (ignored once the run is gone)"""
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO run_usage (content_hash, team_id, endpoint, stage, provider, calls, estimated_calls, "
+                "tokens_in, tokens_out, cost_usd) SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ? "
+                "WHERE EXISTS (SELECT 1 FROM pipeline_runs WHERE content_hash = ? AND team_id = ?) "
+                "ON CONFLICT (content_hash, team_id, endpoint, stage, provider) DO UPDATE SET "
+                "calls = calls + excluded.calls, estimated_calls = estimated_calls + excluded.estimated_calls, "
+                "tokens_in = tokens_in + excluded.tokens_in, tokens_out = tokens_out + excluded.tokens_out, "
+                "cost_usd = cost_usd + excluded.cost_usd",
+                [
+                    key + (row['endpoint'], row['stage'], row['provider'], row['calls'], row['estimated_calls'],
+                           row['tokens_in'], row['tokens_out'], row['cost_usd']) + key
+                    for row in rows
+                ]
+            )
+
+    def usage_rows(self, key):
+        columns = ('endpoint', 'stage', 'provider', 'calls', 'estimated_calls', 'tokens_in', 'tokens_out', 'cost_usd')
+        return [dict(zip(columns, row)) for row in self._conn().execute(
+            f"SELECT {', '.join(columns)} FROM run_usage WHERE content_hash = ? AND team_id = ?", key
+        )]
+
+    # Stages
+
+    def load(self, key, stage):
+        """
+        (payload, complete) of a stage, or (None, False) if it has no
+        checkpoint. A stage with only slices gets them joined, up to the first gap.
+        """
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT payload, complete FROM stage_checkpoints WHERE content_hash = ? AND team_id = ? AND stage = ?",
+            key + (stage,)
+        ).fetchone()
+        if row:
+            return json.loads(row[0]), bool(row[1])
+
+        values = []
+        for start, payload in conn.execute(
+            "SELECT start, payload FROM stage_slices WHERE content_hash = ? AND team_id = ? AND stage = ? "
+            "ORDER BY start", key + (stage,)
+        ):
+            if start != len(values):
+                break
+            values.extend(json.loads(payload))
+        return (values or None), False
+
+    def _renew(self, conn, key, owner):
+        """Extend `owner`'s lease, or raise RunInProgress if it no longer holds the run"""
+        renewed = conn.execute(
+            "UPDATE pipeline_runs SET lease_expires = ? WHERE content_hash = ? AND team_id = ? AND owner IS ?",
+            (time.time() + self.lease_seconds,) + key + (owner,)
+        ).rowcount
+        if not renewed:
+            raise RunInProgress("This analysis's checkpoint run was dropped or taken over by another attempt")
+
+    def save(self, key, stage, payload, complete=True, owner=None):
+        """
+        Checkpoint a stage (replacing any slices of it) and renew `owner`'s
+        lease. Raises RunInProgress if the lease expired and another attempt
+        took the run (or it finished).
+        """
+        progress = len(payload) if isinstance(payload, list) else int(complete)
+        conn = self._conn()
+        with conn:
+            self._renew(conn, key, owner)
+            conn.execute(
+                "INSERT OR REPLACE INTO stage_checkpoints "
+                "(content_hash, team_id, stage, complete, progress, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (stage, int(complete), progress, json.dumps(payload), datetime.now().isoformat())
+            )
+            conn.execute(
+                "DELETE FROM stage_slices WHERE content_hash = ? AND team_id = ? AND stage = ?", key + (stage,)
+            )
+
+    def save_slice(self, key, stage, start, values, owner=None):
+        """
+        Checkpoint items `start` onwards of an unfinished list-valued stage,
+        without rewriting the ones saved before. Renews the lease like save().
+        """
+        conn = self._conn()
+        with conn:
+            self._renew(conn, key, owner)
+            conn.execute(
+                "INSERT OR REPLACE INTO stage_slices (content_hash, team_id, stage, start, count, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)", key + (stage, start, len(values), json.dumps(values))
+            )
+
+    def invalidate(self, content_hash, team_id=None, stage=None):
+        """
+        Drop `stage` and every stage after it (they were computed from it), or
+        the whole run if no stage is given. Returns False if nothing matched.
+        """
+        if stage is not None and stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}' (expected one of: {', '.join(STAGES)})")
+        key = (content_hash, team_id or '')
+        conn = self._conn()
+        with conn:
+            if stage is None:
+                return conn.execute(
+                    "DELETE FROM pipeline_runs WHERE content_hash = ? AND team_id = ?", key
+                ).rowcount > 0
+            later = STAGES[STAGES.index(stage):]
+            stages = f"AND stage IN ({', '.join('?' * len(later))})"
+            sliced = conn.execute(
+                f"DELETE FROM stage_slices WHERE content_hash = ? AND team_id = ? {stages}", key + later
+            ).rowcount
+            return conn.execute(
+                f"DELETE FROM stage_checkpoints WHERE content_hash = ? AND team_id = ? {stages}", key + later
+            ).rowcount + sliced > 0
+
+    # Inspection
+
+    def describe(self, content_hash, team_id=None):
+        """A run and the state of each of its stages (without their outputs), or None"""
+        key = (content_hash, team_id or '')
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT content_hash, team_id, meeting_id, filename, created_at, updated_at, attempts, failed_stage, error, "
+            "lease_expires FROM pipeline_runs WHERE content_hash = ? AND team_id = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        run = dict(zip(("content_hash", "team_id", "meeting_id", "filename", "created_at", "updated_at",
+                        "attempts", "failed_stage", "error"), row))
+        run["team_id"] = run["team_id"] or None
+        run["in_progress"] = row[-1] is not None and row[-1] > time.time()
+
+        saved = {
+            stage: {"complete": False, "progress": progress, "updated_at": None}
+            for stage, progress in conn.execute(
+                "SELECT stage, MAX(start + count) FROM stage_slices WHERE content_hash = ? AND team_id = ? "
+                "GROUP BY stage", key
+            )
+        }
+        saved.update({
+            stage: {"complete": bool(complete), "progress": progress, "updated_at": updated_at}
+            for stage, complete, progress, updated_at in conn.execute(
+                "SELECT stage, complete, progress, updated_at FROM stage_checkpoints "
+                "WHERE content_hash = ? AND team_id = ?", key
+            )
+        })
+        run["stages"] = [
+            dict(saved.get(stage, {"complete": False, "progress": 0, "updated_at": None}), stage=stage)
+            for stage in STAGES
+        ]
+        run["next_stage"] = next((s["stage"] for s in run["stages"] if not s["complete"]), None)
+        return run
+
+    def runs(self):
+        """Every unfinished run, most recently updated first"""
+        keys = self._conn().execute(
+            "SELECT content_hash, team_id FROM pipeline_runs ORDER BY updated_at DESC"
+        ).fetchall()
+        return [run for run in (self.describe(*key) for key in keys) if run is not None]
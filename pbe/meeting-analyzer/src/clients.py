@@ -1,66 +1,205 @@
-import cohere
-import requests
-import json
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
-from sentence_transformers import SentenceTransformer
+import sys
+import threading
+import time
 from config.settings import Config
+from src.ollama_pool import OllamaPool
+from src.tracing import tracer, count_http_request
+from src.usage import record_llm_call
+
+# Heavy dependencies (cohere, qdrant_client, sentence_transformers/torch) are
+# imported inside the factories below, so importing this module is cheap.
+
+class FailedReply(str):
+    """A reply that only says the model could not be reached (kept out of chat history)"""
 
 class APIClients:
-    """Initialize and manage API clients"""
+    """
+    Initialize and manage API clients
+
+    The Cohere and Qdrant clients and the embedding model are created on first
+    use, each under its own lock, so constructing this class does no network
+    or model I/O. warm_up() creates all of them ahead of traffic and records
+    how long each one took.
+    """
+    
+    COMPONENTS = ("cohere_client", "qdrant_client", "collections", "embedding_model")
     
     def __init__(self):
         Config.validate()
         
-        # Initialize Cohere client
-        self.cohere_client = cohere.Client(Config.COHERE_API_KEY)
-        
-        # Initialize Ollama client (for Q&A to avoid rate limits)
-        self.ollama_base_url = Config.OLLAMA_BASE_URL
+        # Ollama client pool (for Q&A to avoid rate limits); no I/O until used
         self.ollama_model = Config.OLLAMA_MODEL
+        self.ollama_pool = OllamaPool(Config.OLLAMA_BASE_URLS, self.ollama_model)
+        self.ollama_base_url = self.ollama_pool.endpoints[0].base_url
+        self.ollama_pool.start_health_checks()
         
-        # Initialize Qdrant client
-        self.qdrant_client = QdrantClient(
+        self._components = {}
+        self._errors = {}
+        self._locks = {name: threading.Lock() for name in self.COMPONENTS}
+        self.startup_times = {}
+        self.warmup_done = threading.Event()
+    
+    def _lazy(self, name, factory):
+        """Create a component once; concurrent callers wait for the first one"""
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._locks[name]:
+            if name not in self._components:
+                start = time.monotonic()
+                try:
+                    self._components[name] = factory()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._errors.pop(name, None)
+                self.startup_times[name] = round(time.monotonic() - start, 3)
+            return self._components[name]
+    
+    @property
+    def cohere_client(self):
+        return self._lazy("cohere_client", self._create_cohere_client)
+    
+    @property
+    def qdrant_client(self):
+        client = self._lazy("qdrant_client", self._create_qdrant_client)
+        # Collections are created before anyone gets the client
+        self._lazy("collections", lambda: self.create_collection_if_not_exists(client) or True)
+        return client
+    
+    @property
+    def embedding_model(self):
+        return self._lazy("embedding_model", self._create_embedding_model)
+    
+    def _create_cohere_client(self):
+        import cohere
+        import httpx
+        # The hook counts HTTP attempts per span, so SDK retries show up in traces
+        http_client = httpx.Client(timeout=300, event_hooks={"request": [count_http_request]})
+        if Config.COHERE_BASE_URL:
+            return cohere.Client(Config.COHERE_API_KEY, base_url=Config.COHERE_BASE_URL, httpx_client=http_client)
+        return cohere.Client(Config.COHERE_API_KEY, httpx_client=http_client)
+    
+    def _create_qdrant_client(self):
+        from qdrant_client import QdrantClient
+        # Embedded local mode if QDRANT_LOCAL_PATH is set
+        if Config.QDRANT_LOCAL_PATH == ":memory:":
+            return QdrantClient(location=":memory:")
+        if Config.QDRANT_LOCAL_PATH:
+            return QdrantClient(path=Config.QDRANT_LOCAL_PATH)
+        return QdrantClient(
             url=Config.QDRANT_URL,
             api_key=Config.QDRANT_API_KEY,
         )
+    
+    def _create_embedding_model(self):
+        from src.onnx_embeddings import load_embedding_model
+        print(f"Loading Sentence Transformer model ({Config.EMBEDDING_BACKEND} backend)...")
+        return load_embedding_model()
+    
+    def after_fork(self, torch_threads=None):
+        """
+        Reset per-process state in a freshly forked worker. The embedding model
+        is kept (its weights stay shared with the parent copy-on-write); network
+        clients are recreated on first use since their sockets can't be shared.
+        """
+        for name in ("cohere_client", "qdrant_client", "collections"):
+            self._components.pop(name, None)
+            self.startup_times.pop(name, None)
+        self._locks = {name: threading.Lock() for name in self.COMPONENTS}
+        self.warmup_done = threading.Event()
+        self.ollama_pool.after_fork()
         
-        # Initialize Sentence Transformer model
-        print("Loading Sentence Transformer model...")
-        self.embedding_model = SentenceTransformer(Config.EMBEDDING_MODEL)
+        torch = sys.modules.get("torch")
+        if torch_threads and torch is not None:
+            torch.set_num_threads(torch_threads)
+    
+    def deferred(self, name):
+        """A stand-in for a client that is created on its first attribute access"""
+        return _Deferred(self, name)
+    
+    @tracer.traced("clients.warm_up")
+    def warm_up(self):
+        """
+        Create every client, the collections and the model, then check connections.
+        A component that fails is reported and retried on its next use.
         
-        print("✓ All clients initialized successfully")
+        Returns: the startup report (seconds per component)
+        """
+        for name in ("cohere_client", "qdrant_client", "embedding_model"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                print(f"⚠ Could not initialize {name}: {e}")
+        
+        start = time.monotonic()
         self._verify_connections()
+        self.startup_times["connection_check"] = round(time.monotonic() - start, 3)
+        self.warmup_done.set()
+        
+        print("✓ Startup report:")
+        for name, seconds in self.startup_times.items():
+            print(f"  {name}: {seconds:.3f}s")
+        return dict(self.startup_times)
     
-    def chat_with_ollama(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1000):
-        """Chat with Ollama model for Q&A purposes"""
-        try:
-            url = f"{self.ollama_base_url}/api/generate"
-            
-            # Combine system and user prompts
-            full_prompt = prompt
-            if system_prompt:
-                full_prompt = f"{system_prompt}\n\nUser: {prompt}\n\nAssistant:"
-            
-            payload = {
-                "model": self.ollama_model,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
+    def start_warm_up(self):
+        """Run warm_up in a daemon thread so the server can bind immediately"""
+        thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    def readiness(self):
+        """Per-component state: ready, loading, failed or pending"""
+        components = {}
+        for name in self.COMPONENTS:
+            if name in self._components:
+                components[name] = "ready"
+            elif name in self._errors:
+                components[name] = f"failed: {self._errors[name]}"
+            elif self._locks[name].locked():
+                components[name] = "loading"
+            else:
+                components[name] = "pending"
+        return {
+            "ready": all(state == "ready" for state in components.values()),
+            "warm_up_complete": self.warmup_done.is_set(),
+            "components": components,
+            "startup_seconds": dict(self.startup_times)
+        }
+    
+    def generate_with_ollama(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1000, stage="chat"):
+        """Generate with the least-loaded Ollama endpoint. Raises on failure."""
+        # Combine system and user prompts
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\nUser: {prompt}\n\nAssistant:"
+        
+        payload = {
+            "model": self.ollama_model,
+            "prompt": full_prompt,
+            "stream": False,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
             }
-            
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result.get("response", "")
-            
+        }
+        
+        with tracer.span("ollama.generate") as span:
+            result = self.ollama_pool.generate(payload, timeout=30)
+            tokens_in, tokens_out = record_llm_call(
+                "ollama", stage, full_prompt, result.get("response", ""),
+                result.get("prompt_eval_count"), result.get("eval_count")
+            )
+            span.add(tokens_in=tokens_in, tokens_out=tokens_out)
+        return result.get("response", "")
+    
+    def chat_with_ollama(self, prompt, system_prompt=None, temperature=0.7, max_tokens=1000, stage="chat"):
+        """Chat with Ollama model for Q&A purposes; on failure returns a FailedReply"""
+        try:
+            return self.generate_with_ollama(prompt, system_prompt, temperature, max_tokens, stage=stage)
         except Exception as e:
             print(f"⚠ Ollama request failed: {e}")
-            return f"Error: Could not get response from Ollama. Make sure Ollama is running and the model '{self.ollama_model}' is available."
+            return FailedReply(f"Error: Could not get response from Ollama. Make sure Ollama is running and the model '{self.ollama_model}' is available.")
     
     def _verify_connections(self):
         """Verify API connections"""
@@ -72,66 +211,87 @@ class APIClients:
             # Test Cohere connection (simple ping)
             print("✓ Cohere client ready")
             
-            # Test Ollama connection
-            try:
-                response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=5)
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    model_names = [m.get("name", "") for m in models]
-                    if self.ollama_model in model_names:
-                        print(f"✓ Ollama connection verified. Model '{self.ollama_model}' available")
-                    else:
-                        print(f"⚠ Ollama connected but model '{self.ollama_model}' not found. Available models: {model_names}")
+            # Test Ollama connections
+            for base_url, status in self.ollama_pool.check_health().items():
+                if not status["healthy"]:
+                    print(f"⚠ Ollama connection failed: {base_url}")
+                elif self.ollama_model in status["models"]:
+                    print(f"✓ Ollama connection verified ({base_url}). Model '{self.ollama_model}' available")
                 else:
-                    print(f"⚠ Ollama server responded with status {response.status_code}")
-            except Exception as e:
-                print(f"⚠ Ollama connection failed: {e}")
+                    print(f"⚠ Ollama connected ({base_url}) but model '{self.ollama_model}' not found. Available models: {status['models']}")
             
         except Exception as e:
             print(f"⚠ Connection verification failed: {e}")
     
-    def create_collection_if_not_exists(self):
-        """Create Qdrant collection if it doesn't exist"""
+    def create_collection_if_not_exists(self, client=None):
+        """Create the Qdrant collections (and their payload indexes) if they don't exist"""
+        from qdrant_client.models import VectorParams, Distance
+        
+        client = client or self.qdrant_client
         try:
-            collections = self.qdrant_client.get_collections().collections
+            collections = client.get_collections().collections
             collection_names = [col.name for col in collections]
 
-            if Config.COLLECTION_NAME in collection_names:
-                print(f"✓ Collection '{Config.COLLECTION_NAME}' already exists")
-                collection_info = self.qdrant_client.get_collection(Config.COLLECTION_NAME)
-                print(f"  Points count: {collection_info.points_count}")
+            for collection_name in (Config.COLLECTION_NAME, Config.SUMMARY_COLLECTION_NAME):
+                if collection_name in collection_names:
+                    print(f"✓ Collection '{collection_name}' already exists")
+                    collection_info = client.get_collection(collection_name)
+                    print(f"  Points count: {collection_info.points_count}")
+                else:
+                    client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=VectorParams(size=Config.EMBEDDING_DIM, distance=Distance.COSINE),
+                    )
+                    print(f"✓ Created new collection: {collection_name}")
+            
+            self._create_payload_indexes(client)
                 
-                # Check if we need to create index for meeting_id
+        except Exception as e:
+            print(f"⚠ Error with collection: {e}")
+            raise
+    
+    def _create_payload_indexes(self, client):
+        """Index the payload fields that search filters on"""
+        from qdrant_client.models import PayloadSchemaType
+        
+        payload_indexes = {
+            Config.COLLECTION_NAME: [
+                ("meeting_id", PayloadSchemaType.KEYWORD),
+                ("team_id", PayloadSchemaType.KEYWORD),
+                ("speaker_name", PayloadSchemaType.KEYWORD),
+                ("meeting_ts", PayloadSchemaType.FLOAT),
+                ("offset_seconds", PayloadSchemaType.INTEGER),
+            ],
+            Config.SUMMARY_COLLECTION_NAME: [
+                ("meeting_id", PayloadSchemaType.KEYWORD),
+                ("team_id", PayloadSchemaType.KEYWORD),
+                ("meeting_ts", PayloadSchemaType.FLOAT),
+                ("level", PayloadSchemaType.KEYWORD),
+            ],
+        }
+        
+        for collection_name, fields in payload_indexes.items():
+            for field_name, field_schema in fields:
                 try:
-                    # Try to create index for meeting_id if it doesn't exist
-                    from qdrant_client.models import PayloadSchemaType
-                    self.qdrant_client.create_payload_index(
-                        collection_name=Config.COLLECTION_NAME,
-                        field_name="meeting_id",
-                        field_schema=PayloadSchemaType.KEYWORD
+                    client.create_payload_index(
+                        collection_name=collection_name,
+                        field_name=field_name,
+                        field_schema=field_schema
                     )
-                    print("✓ Created index for meeting_id field")
+                    print(f"✓ Created index for {collection_name}.{field_name}")
                 except Exception as e:
                     if "already exists" in str(e).lower():
-                        print("✓ Index for meeting_id already exists")
+                        print(f"✓ Index for {collection_name}.{field_name} already exists")
                     else:
-                        print(f"⚠ Could not create index for meeting_id: {e}")
-            else:
-                from qdrant_client.models import PayloadSchemaType
-                self.qdrant_client.create_collection(
-                    collection_name=Config.COLLECTION_NAME,
-                    vectors_config=VectorParams(size=Config.EMBEDDING_DIM, distance=Distance.COSINE),
-                )
-                print(f"✓ Created new collection: {Config.COLLECTION_NAME}")
-                
-                # Create index for meeting_id
-                self.qdrant_client.create_payload_index(
-                    collection_name=Config.COLLECTION_NAME,
-                    field_name="meeting_id",
-                    field_schema=PayloadSchemaType.KEYWORD
-                )
-                print("✓ Created index for meeting_id field")
-                
-        except Exception as e:
-            print(f"⚠ Error with collection: {e}")
-            raise
\ No newline at end of file
+                        print(f"⚠ Could not create index for {collection_name}.{field_name}: {e}")
+
+
+class _Deferred:
+    """Forwards attribute access to a lazily created APIClients component"""
+
+    def __init__(self, clients, name):
+        self._clients = clients
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(getattr(self._clients, self._name), attr)
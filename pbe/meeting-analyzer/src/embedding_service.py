@@ -0,0 +1,132 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from config.settings import Config
+from src.tracing import tracer
+
+INTERACTIVE = 0
+BULK = 1
+
+
+class _Request:
+    """One submit() call, possibly split into several queued chunks"""
+
+    def __init__(self, chunks):
+        self.future = Future()
+        self.results = [None] * chunks
+        self.remaining = chunks
+
+
+class EmbeddingService:
+    """
+    Single point of access to the embedding model with dynamic micro-batching.
+
+    Callers submit texts and get a Future. A worker thread takes the most
+    urgent queued item, then keeps adding items (interactive before bulk)
+    that arrive within `max_wait_ms` until `max_batch` texts are collected,
+    and encodes them in one model call. Bulk submissions are split into
+    chunks of at most `max_batch` texts, so a query arriving during ingestion
+    waits for at most one chunk.
+    """
+
+    def __init__(self, model, max_batch=None, max_wait_ms=None):
+        self.model = model
+        self.max_batch = max_batch or Config.EMBEDDING_MAX_BATCH
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else Config.EMBEDDING_MAX_WAIT_MS) / 1000.0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {"batches": 0, "texts": 0, "requests": 0, "max_batch_seen": 0}
+
+    def _ensure_worker(self):
+        # Called with the condition held; the worker starts on first use
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+            self._thread.start()
+
+    def after_fork(self):
+        """Forget the parent's worker thread and queue (threads don't survive fork)"""
+        self._cond = threading.Condition()
+        self._queue = []
+        self._thread = None
+
+    def submit(self, texts, priority=BULK):
+        """Queue texts for encoding. Returns a Future resolving to an (n, dim) array."""
+        texts = list(texts)
+        if not texts:
+            future = Future()
+            future.set_result(np.zeros((0, Config.EMBEDDING_DIM), dtype=np.float32))
+            return future
+
+        chunks = [texts[i:i + self.max_batch] for i in range(0, len(texts), self.max_batch)]
+        request = _Request(len(chunks))
+        with self._cond:
+            self._ensure_worker()
+            self._stats["requests"] += 1
+            for index, chunk in enumerate(chunks):
+                heapq.heappush(self._queue, (priority, next(self._seq), request, index, chunk))
+            self._cond.notify()
+        return request.future
+
+    def encode(self, texts, priority=BULK):
+        """Blocking form of submit()"""
+        return self.submit(texts, priority).result()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            batch = [heapq.heappop(self._queue)]
+            size = len(batch[0][4])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                if not self._queue:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                    continue
+                if size + len(self._queue[0][4]) > self.max_batch:
+                    break
+                item = heapq.heappop(self._queue)
+                batch.append(item)
+                size += len(item[4])
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [text for item in batch for text in item[4]]
+            try:
+                with tracer.span("embedding_service.batch", texts=len(texts), requests=len(batch)):
+                    vectors = np.asarray(self.model.encode(texts))
+            except Exception as e:
+                for _, _, request, _, _ in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            with self._cond:
+                self._stats["batches"] += 1
+                self._stats["texts"] += len(texts)
+                self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(texts))
+
+            start = 0
+            for _, _, request, index, chunk in batch:
+                request.results[index] = vectors[start:start + len(chunk)]
+                start += len(chunk)
+                request.remaining -= 1
+                if request.remaining == 0 and not request.future.done():
+                    request.future.set_result(np.concatenate(request.results))
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued_chunks"] = len(self._queue)
+        stats["avg_batch_size"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else None
+        return stats
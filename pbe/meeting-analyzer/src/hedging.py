@@ -0,0 +1,129 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.settings import Config
+
+class LatencyTracker:
+    """Sliding window of recent latencies with percentile lookup"""
+
+    def __init__(self, window):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class Hedger:
+    """
+    Hedged requests between a primary and a backup provider.
+
+    The primary runs first. If it has not answered within the configured
+    percentile of its own recent latency, the backup is fired as well and the
+    first successful answer wins. A primary that fails outright fails over to
+    the backup immediately. The losing call cannot be interrupted mid-request,
+    so it is cancelled if still queued and otherwise left to finish in the
+    background with its result discarded.
+    """
+
+    def __init__(self, percentile=None, min_delay=None, max_delay=None, default_delay=None, window=None):
+        self.percentile = percentile or Config.CHAT_HEDGE_PERCENTILE
+        self.min_delay = min_delay if min_delay is not None else Config.CHAT_HEDGE_MIN_DELAY
+        self.max_delay = max_delay if max_delay is not None else Config.CHAT_HEDGE_MAX_DELAY
+        self.default_delay = default_delay if default_delay is not None else Config.CHAT_HEDGE_DEFAULT_DELAY
+        self.latencies = LatencyTracker(window or Config.CHAT_HEDGE_WINDOW)
+        self._executor = ThreadPoolExecutor(max_workers=Config.CHAT_HEDGE_WORKERS, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "hedged": 0,
+            "backup_wins": 0,
+            "primary_failures": 0
+        }
+
+    def hedge_delay(self):
+        """Seconds to wait on the primary before firing the backup"""
+        if len(self.latencies) < 20:
+            return self.default_delay
+        delay = self.latencies.percentile(self.percentile)
+        return max(self.min_delay, min(self.max_delay, delay))
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _timed_primary(self, primary):
+        start = time.monotonic()
+        result = primary()
+        # Recorded even when the backup won, so the percentile is not biased low
+        self.latencies.record(time.monotonic() - start)
+        return result
+
+    def run(self, primary, backup):
+        """
+        Run primary(), hedging with backup() if it is slow.
+
+        Returns: (result, winner) where winner is "primary" or "backup".
+        """
+        self._count("requests")
+        # Calls run in the caller's context so their spans join the caller's trace
+        primary_future = self._executor.submit(contextvars.copy_context().run, self._timed_primary, primary)
+
+        done, _ = wait([primary_future], timeout=self.hedge_delay())
+        if done and primary_future.exception() is None:
+            return primary_future.result(), "primary"
+
+        if done:
+            self._count("primary_failures")
+            print(f"⚠ Primary provider failed, failing over: {primary_future.exception()}")
+            return backup(), "backup"
+
+        self._count("hedged")
+        backup_future = self._executor.submit(contextvars.copy_context().run, backup)
+        pending = {primary_future, backup_future}
+        last_error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    if future is primary_future:
+                        self._count("primary_failures")
+                    continue
+
+                for loser in pending:
+                    loser.cancel()
+                if future is backup_future:
+                    self._count("backup_wins")
+                    return future.result(), "backup"
+                return future.result(), "primary"
+
+        raise last_error
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats["requests"] or 1
+        stats["hedge_rate"] = round(stats["hedged"] / requests, 4)
+        stats["backup_win_rate"] = round(stats["backup_wins"] / requests, 4)
+        p50 = self.latencies.percentile(50)
+        p99 = self.latencies.percentile(99)
+        stats["primary_p50"] = round(p50, 3) if p50 is not None else None
+        stats["primary_p99"] = round(p99, 3) if p99 is not None else None
+        stats["hedge_delay"] = round(self.hedge_delay(), 3)
+        return stats
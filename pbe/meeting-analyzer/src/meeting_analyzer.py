@@ -1,5 +1,15 @@
 import json
 from datetime import datetime
+from src.tracing import tracer, cohere_chat
+from src import usage
+from src.transcript import Transcript
+
+# Keywords for the no-LLM urgency fallback (used once a meeting is over budget)
+URGENCY_KEYWORDS = [
+    ("critical", ("asap", "urgent", "critical", "blocker", "blocking", "immediately", "outage")),
+    ("high", ("today", "tomorrow", "deadline", "blocks", "priority", "this week", "important")),
+    ("low", ("eventually", "nice to have", "someday", "later", "optional")),
+]
 
 class MeetingAnalyzer:
     """Analyze meetings and extract insights"""
@@ -54,7 +64,9 @@ Required JSON structure:
 
 Return ONLY the JSON object, no markdown formatting."""
 
-        response = self.cohere_client.chat(
+        response = cohere_chat(
+            self.cohere_client,
+            "summary",
             model="command-r-v2",
             preamble=system_prompt,
             message=user_prompt,
@@ -88,7 +100,9 @@ Context: {task.get('urgency_reason', 'N/A')}
 """
 
         try:
-            response = self.cohere_client.chat(
+            response = cohere_chat(
+                self.cohere_client,
+                "urgency",
                 model="command-r-v2",
                 preamble=system_prompt,
                 message=f"Determine urgency level for this task:\n{task_description}",
@@ -107,6 +121,18 @@ Context: {task.get('urgency_reason', 'N/A')}
             print(f"Warning: Urgency detection failed. Using default 'medium'. Error: {e}")
             return 'medium'
     
+    def rule_based_urgency(self, task):
+        """
+        Urgency from keywords in the task and its context, without an LLM call
+
+        Returns: critical, high, medium, or low
+        """
+        text = f"{task.get('task', '')} {task.get('urgency_reason', '')}".lower()
+        for level, keywords in URGENCY_KEYWORDS:
+            if any(keyword in text for keyword in keywords):
+                return level
+        return 'medium'
+    
     def compute_speaker_sentiment(self, sentiment_score):
         """
         Convert sentiment score to label: Positive, Negative, or Neutral
@@ -120,23 +146,111 @@ Context: {task.get('urgency_reason', 'N/A')}
         else:
             return "Neutral"
     
+    @tracer.traced("analyzer.analyze_meeting")
     def analyze_meeting(self, transcript):
         """
         Complete meeting analysis pipeline
         """
+        llm_output = self.generate_summary(transcript)
+        self.add_urgency(llm_output)
+        return llm_output
+    
+    @tracer.traced("analyzer.generate_summary")
+    def generate_summary(self, transcript):
+        """
+        Structured summary (summary, action items, topics, entities, sentiment)
+        of a transcript, without urgency levels
+        """
         print("\n" + "="*60)
         print("ANALYZING MEETING TRANSCRIPT")
         print("="*60)
         
         # Format transcript for LLM
-        transcript_text = "\n".join(
-            f"[{t['timestamp']}] {t['speaker_name']}: {t['text']}"
-            for t in transcript
-        )
+        transcript_text = "\n".join(Transcript.coerce(transcript).format_lines())
         
         # Generate summary
-        llm_raw = self.summarize_with_urgency(transcript_text)
+        return self.parse_summary(self.summarize_with_urgency(transcript_text))
+    
+    @tracer.traced("analyzer.update_summary")
+    def update_summary(self, previous, transcript):
+        """
+        Structured summary of turns appended to a meeting, given `previous`,
+        the summary so far (executive_summary, action_items, topics_discussed,
+        named_entities). The executive summary covers the whole meeting; action
+        items, topics and entities are only those the new turns add.
+        """
+        print("\n" + "="*60)
+        print("UPDATING MEETING SUMMARY")
+        print("="*60)
         
+        transcript_text = "\n".join(Transcript.coerce(transcript).format_lines())
+        return self.parse_summary(self.summarize_update(previous, transcript_text))
+    
+    def summarize_update(self, previous, transcript_text):
+        """
+        Use Cohere LLM to fold new transcript lines into an existing summary
+        """
+        system_prompt = """You are an enterprise AI meeting assistant.
+        A meeting you already summarized has continued. Update its summary with
+        the new part of the transcript, in valid JSON format.
+
+        Focus on:
+        - Executive summary (2-3 sentences) of the WHOLE meeting so far
+        - Only NEW action items, topics and named entities from the new lines
+          (do not repeat ones listed in the existing summary)
+        - Action items with task, owner, deadline (ISO format if mentioned), urgency_reason, and tags
+        """
+
+        existing_tasks = "\n".join(
+            f"- {item.get('task')} (owner: {item.get('owner')})" for item in previous.get('action_items', [])
+        ) or "- none"
+        user_prompt = f"""Existing summary:
+{previous.get('executive_summary', '')}
+
+Existing action items:
+{existing_tasks}
+
+Existing topics: {', '.join(previous.get('topics_discussed', [])) or 'none'}
+Existing named entities: {', '.join(previous.get('named_entities', [])) or 'none'}
+
+New transcript lines:
+{transcript_text}
+
+Return ONLY valid JSON.
+
+Required JSON structure:
+{{
+  "executive_summary": "updated overview of the whole meeting",
+  "action_items": [
+    {{
+      "task": "description",
+      "owner": "person name",
+      "deadline": "YYYY-MM-DD or null",
+      "urgency_reason": "detailed explanation of task importance, context, and time sensitivity",
+      "tags": ["tag1", "tag2"]
+    }}
+  ],
+  "topics_discussed": ["new topic"],
+  "named_entities": ["new entity"],
+  "overall_sentiment": "positive/neutral/negative"
+}}
+
+Return ONLY the JSON object, no markdown formatting."""
+
+        response = cohere_chat(
+            self.cohere_client,
+            "summary_update",
+            model="command-r-v2",
+            preamble=system_prompt,
+            message=user_prompt,
+            temperature=0.2,
+            max_tokens=1500
+        )
+
+        return response.text
+    
+    def parse_summary(self, llm_raw):
+        """Summary JSON from an LLM reply (an empty summary if it is not valid JSON)"""
         # Clean potential markdown formatting
         if llm_raw.strip().startswith('```json'):
             llm_raw = llm_raw.strip()[len('```json'):-len('```')].strip()
@@ -157,16 +271,38 @@ Context: {task.get('urgency_reason', 'N/A')}
                 "named_entities": [],
                 "overall_sentiment": "neutral"
             }
+        return llm_output
+    
+    @tracer.traced("analyzer.add_urgency")
+    def add_urgency(self, llm_output, labels=None, on_label=None):
+        """
+        Set the urgency of each action item in `llm_output`
 
+        `labels` already computed for the first items (e.g. restored from a
+        checkpoint) are reused; on_label(labels) is called after each new one.
+        Returns the list of labels.
+        """
+        labels = list(labels or [])
+        action_items = llm_output.get("action_items", [])
+        
         # Apply LLM-based urgency computation to each action item
         print("\nComputing urgency levels with LLM...")
-        for i, task in enumerate(llm_output.get("action_items", []), 1):
-            print(f"  Analyzing urgency for task {i}/{len(llm_output.get('action_items', []))}...")
-            task["urgency"] = self.compute_urgency_with_llm(task)
+        for i, task in enumerate(action_items, 1):
+            if i <= len(labels):
+                task["urgency"] = labels[i - 1]
+            else:
+                print(f"  Analyzing urgency for task {i}/{len(action_items)}...")
+                if usage.over_budget("urgency"):
+                    task["urgency"] = self.rule_based_urgency(task)
+                else:
+                    task["urgency"] = self.compute_urgency_with_llm(task)
+                labels.append(task["urgency"])
+                if on_label is not None:
+                    on_label(labels)
             # Ensure tags exist
             if "tags" not in task:
                 task["tags"] = []
 
         print("\n✓ Urgency analysis complete")
         
-        return llm_output
+        return labels
@@ -0,0 +1,561 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from config.settings import Config
+from src.task_index import build_meeting_index, extend_meeting_index
+from src.transcript import Transcript
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    filename TEXT,
+    participants INTEGER NOT NULL DEFAULT 0,
+    action_items INTEGER NOT NULL DEFAULT 0,
+    revision INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transcripts (
+    meeting_id TEXT PRIMARY KEY REFERENCES meetings(meeting_id) ON DELETE CASCADE,
+    entry_count INTEGER NOT NULL,
+    entries TEXT NOT NULL,
+    append_claim TEXT,
+    append_claimed_at REAL
+);
+CREATE TABLE IF NOT EXISTS transcript_appends (
+    meeting_id TEXT NOT NULL REFERENCES meetings(meeting_id) ON DELETE CASCADE,
+    first_index INTEGER NOT NULL,
+    entries TEXT NOT NULL,
+    PRIMARY KEY (meeting_id, first_index)
+);
+CREATE TABLE IF NOT EXISTS transcript_rows (
+    meeting_id TEXT NOT NULL REFERENCES meetings(meeting_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    offset_seconds INTEGER NOT NULL,
+    end_ms INTEGER,
+    duration_ms INTEGER,
+    sentiment REAL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (meeting_id, position)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    meeting_id TEXT NOT NULL REFERENCES meetings(meeting_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    owner TEXT,
+    urgency TEXT,
+    deadline TEXT,
+    task TEXT NOT NULL,
+    PRIMARY KEY (meeting_id, position)
+);
+CREATE TABLE IF NOT EXISTS llm_usage (
+    meeting_id TEXT NOT NULL REFERENCES meetings(meeting_id) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    estimated_calls INTEGER NOT NULL DEFAULT 0,
+    tokens_in INTEGER NOT NULL DEFAULT 0,
+    tokens_out INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (meeting_id, endpoint, stage, provider)
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_created_at ON meetings(created_at);
+CREATE INDEX IF NOT EXISTS idx_meetings_revision ON meetings(revision);
+CREATE INDEX IF NOT EXISTS idx_meetings_content_hash ON meetings(content_hash);
+"""
+
+# Every write bumps the meeting to a new store-wide revision, so readers in any
+# process can pick up changes with one indexed query
+NEXT_REVISION = "(SELECT COALESCE(MAX(revision), 0) + 1 FROM meetings)"
+
+# Transcript turns are written as transcript_rows straight from the Transcript
+# columns, this many per executemany. (Meetings stored before that keep their
+# turns as JSON in transcripts.entries and transcript_appends; those are read
+# first.)
+TRANSCRIPT_WRITE_BATCH = 1000
+
+
+class MeetingStore:
+    """
+    Persistent meeting records (SQLite, WAL mode) behind an in-memory LRU.
+
+    Records are cached without their transcript; transcripts are stored one
+    row per turn and loaded only when a caller asks for them and are the first thing dropped when the cache
+    holds more than Config.MEETING_CACHE_MAX_ENTRIES transcript entries. Each
+    cached record remembers the revision it was read at and is reloaded once
+    another process has written a newer one.
+    """
+
+    def __init__(self, db_path=None, cache_size=None, max_cached_entries=None):
+        self.db_path = db_path or Config.MEETING_DB_PATH
+        self.cache_size = cache_size or Config.MEETING_CACHE_SIZE
+        self.max_cached_entries = max_cached_entries or Config.MEETING_CACHE_MAX_ENTRIES
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._revisions = {}
+        self._cached_entries = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        conn = self._conn()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(meetings)")}
+        if columns and 'revision' not in columns:
+            conn.execute("ALTER TABLE meetings ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        if columns and 'content_hash' not in columns:
+            conn.execute("ALTER TABLE meetings ADD COLUMN content_hash TEXT")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(transcripts)")}
+        if columns and 'append_claim' not in columns:
+            conn.execute("ALTER TABLE transcripts ADD COLUMN append_claim TEXT")
+            conn.execute("ALTER TABLE transcripts ADD COLUMN append_claimed_at REAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        """One connection per thread; SQLite connections are not shareable"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Drop connections and locks inherited from the parent process"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _write(self):
+        """
+        A transaction that takes SQLite's write lock up front, so whatever is
+        read inside it cannot be changed by another process before it commits
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    @staticmethod
+    def _revision(conn, meeting_id):
+        row = conn.execute("SELECT revision FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+        return row[0] if row else None
+
+    # Writes
+
+    def save(self, meeting_data):
+        """
+        Insert or replace a full meeting record (transcript and tasks included).
+        Task and speaker indexes are (re)built here so they always match.
+        """
+        tasks = meeting_data.get('tasks', [])
+        for position, task in enumerate(tasks):
+            task['task_id'] = position
+        meeting_data['indexes'] = build_meeting_index(tasks, meeting_data.get('speakers', {}))
+
+        record = {k: v for k, v in meeting_data.items() if k not in ('transcript', 'tasks')}
+        transcript = Transcript.coerce(meeting_data.get('transcript'))
+        meeting_id = meeting_data['meeting_id']
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meetings "
+                "(meeting_id, created_at, filename, participants, action_items, revision, content_hash, record) "
+                f"VALUES (?, ?, ?, ?, ?, {NEXT_REVISION}, ?, ?)",
+                (meeting_id, meeting_data.get('timestamp', ''), meeting_data.get('filename'),
+                 len(meeting_data.get('speakers', {})), len(tasks), meeting_data.get('content_hash'),
+                 json.dumps(record))
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (meeting_id, entry_count, entries) VALUES (?, ?, '[]')",
+                (meeting_id, len(transcript))
+            )
+            conn.execute("DELETE FROM transcript_appends WHERE meeting_id = ?", (meeting_id,))
+            conn.execute("DELETE FROM transcript_rows WHERE meeting_id = ?", (meeting_id,))
+            self._write_transcript(conn, meeting_id, 0, transcript)
+            self._write_tasks(conn, meeting_id, tasks)
+            revision = self._revision(conn, meeting_id)
+
+        self._cache_put(meeting_id, dict(meeting_data, transcript=transcript), revision)
+
+    def _write_transcript(self, conn, meeting_id, first_index, transcript):
+        """Insert a transcript's turns as rows `first_index` onwards, a batch at a time"""
+        rows = transcript.rows()
+        position = first_index
+        while True:
+            batch = list(itertools.islice(rows, TRANSCRIPT_WRITE_BATCH))
+            if not batch:
+                break
+            conn.executemany(
+                "INSERT INTO transcript_rows (meeting_id, position, speaker, offset_seconds, end_ms, duration_ms, "
+                "sentiment, text) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(meeting_id, position + i) + row for i, row in enumerate(batch)]
+            )
+            position += len(batch)
+
+    def _write_tasks(self, conn, meeting_id, tasks):
+        conn.execute("DELETE FROM tasks WHERE meeting_id = ?", (meeting_id,))
+        conn.executemany(
+            "INSERT INTO tasks (meeting_id, position, owner, urgency, deadline, task) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (meeting_id, i, task.get('owner'), task.get('urgency'), task.get('deadline'), json.dumps(task))
+                for i, task in enumerate(tasks)
+            ]
+        )
+
+    def update_task(self, meeting_id, task_id, changes):
+        """
+        Apply field changes to one task and rebuild the meeting's indexes.
+        Returns the updated task, or None if the meeting or task is unknown.
+        """
+        with self._write() as conn:
+            record, _ = self._load_record(meeting_id, conn)
+            if record is None or not 0 <= task_id < len(record['tasks']):
+                return None
+
+            tasks = record['tasks']
+            tasks[task_id].update(changes)
+            record['indexes'] = build_meeting_index(tasks, record.get('speakers', {}))
+
+            stored = {k: v for k, v in record.items() if k != 'tasks'}
+            conn.execute(
+                f"UPDATE meetings SET record = ?, action_items = ?, revision = {NEXT_REVISION} WHERE meeting_id = ?",
+                (json.dumps(stored), len(tasks), meeting_id)
+            )
+            self._write_tasks(conn, meeting_id, tasks)
+            revision = self._revision(conn, meeting_id)
+
+        self._cache_put(meeting_id, record, revision)
+        return tasks[task_id]
+
+    def claim_append(self, meeting_id, timeout=None):
+        """
+        Reserve a meeting's transcript for one append, before any work is done
+        for it. Returns (first_index, claim) for append() / release_append(),
+        or None if the meeting is unknown or another append holds a claim
+        younger than Config.APPEND_CLAIM_TIMEOUT_SECONDS.
+        """
+        timeout = Config.APPEND_CLAIM_TIMEOUT_SECONDS if timeout is None else timeout
+        now = time.time()
+        claim = uuid.uuid4().hex
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT entry_count, append_claim, append_claimed_at FROM transcripts WHERE meeting_id = ?",
+                (meeting_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            first_index, held, claimed_at = row
+            if held is not None and now - claimed_at < timeout:
+                return None
+            conn.execute(
+                "UPDATE transcripts SET append_claim = ?, append_claimed_at = ? WHERE meeting_id = ?",
+                (claim, now, meeting_id)
+            )
+        return first_index, claim
+
+    def release_append(self, meeting_id, claim):
+        """Give up a claim from claim_append() without appending"""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE transcripts SET append_claim = NULL, append_claimed_at = NULL "
+                "WHERE meeting_id = ? AND append_claim = ?",
+                (meeting_id, claim)
+            )
+
+    def append(self, meeting_id, claim, transcript, changes, new_tasks):
+        """
+        Append turns and tasks to a meeting and apply `changes` (summary,
+        speakers, ...) to its record, writing only the new transcript and task
+        rows, and release the claim from claim_append(). The record is read
+        again inside the write, so changes made meanwhile (task edits) are kept.
+
+        Returns the updated record, or None if the claim is no longer held (it
+        expired and another append took over, or the meeting was replaced).
+        """
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT entry_count FROM transcripts WHERE meeting_id = ? AND append_claim = ?",
+                (meeting_id, claim)
+            ).fetchone()
+            record, _ = self._load_record(meeting_id, conn)
+            if row is None or record is None:
+                return None
+            first_index = row[0]
+            conn.execute(
+                "UPDATE transcripts SET entry_count = entry_count + ?, append_claim = NULL, "
+                "append_claimed_at = NULL WHERE meeting_id = ?",
+                (len(transcript), meeting_id)
+            )
+
+            tasks = list(record['tasks'])
+            first_task = len(tasks)
+            for position, task in enumerate(new_tasks, first_task):
+                task['task_id'] = position
+                tasks.append(task)
+            updated = dict(record, **changes, tasks=tasks)
+            updated['indexes'] = extend_meeting_index(
+                record['indexes'], tasks, first_task, updated.get('speakers', {})
+            )
+
+            stored = {k: v for k, v in updated.items() if k != 'tasks'}
+            self._write_transcript(conn, meeting_id, first_index, transcript)
+            conn.execute(
+                "UPDATE meetings SET record = ?, participants = ?, action_items = ?, content_hash = ?, "
+                f"revision = {NEXT_REVISION} WHERE meeting_id = ?",
+                (json.dumps(stored), len(updated.get('speakers', {})), len(tasks), updated.get('content_hash'),
+                 meeting_id)
+            )
+            conn.executemany(
+                "INSERT INTO tasks (meeting_id, position, owner, urgency, deadline, task) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (meeting_id, task['task_id'], task.get('owner'), task.get('urgency'), task.get('deadline'),
+                     json.dumps(task))
+                    for task in tasks[first_task:]
+                ]
+            )
+            revision = self._revision(conn, meeting_id)
+
+        # A cached transcript is extended in place rather than reloaded
+        with self._lock:
+            cached = self._cache.get(meeting_id)
+            full = cached.get('transcript') if cached is not None else None
+            if full is not None and len(full) == first_index:
+                for row in transcript.rows():
+                    full.append_row(*row)
+                self._cached_entries += len(transcript)
+                updated['transcript'] = full
+        self._cache_put(meeting_id, updated, revision)
+        return updated
+
+    def add_usage(self, meeting_id, rows):
+        """Add LLM usage rows (see UsageLedger.rows) to a meeting's running totals"""
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO llm_usage (meeting_id, endpoint, stage, provider, calls, estimated_calls, "
+                "tokens_in, tokens_out, cost_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (meeting_id, endpoint, stage, provider) DO UPDATE SET "
+                "calls = calls + excluded.calls, estimated_calls = estimated_calls + excluded.estimated_calls, "
+                "tokens_in = tokens_in + excluded.tokens_in, tokens_out = tokens_out + excluded.tokens_out, "
+                "cost_usd = cost_usd + excluded.cost_usd",
+                [
+                    (meeting_id, row['endpoint'], row['stage'], row['provider'], row['calls'],
+                     row['estimated_calls'], row['tokens_in'], row['tokens_out'], row['cost_usd'])
+                    for row in rows
+                ]
+            )
+
+    def delete(self, meeting_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM meetings WHERE meeting_id = ?", (meeting_id,))
+        self._cache_drop(meeting_id)
+
+    # Reads
+
+    def get(self, meeting_id, include_transcript=False):
+        """
+        Return a meeting record, or None if unknown.
+
+        The returned dict is shared with the cache; treat it as read-only.
+        """
+        revision = self._revision(self._conn(), meeting_id)
+        if revision is None:
+            self._cache_drop(meeting_id)
+            return None
+
+        with self._lock:
+            record = self._cache.get(meeting_id)
+            if record is not None:
+                if self._revisions[meeting_id] == revision:
+                    self._cache.move_to_end(meeting_id)
+                else:
+                    # Written by another process since it was cached
+                    self._cache_drop_locked(meeting_id)
+                    record = None
+
+        if record is None:
+            record, revision = self._load_record(meeting_id)
+            if record is None:
+                return None
+            self._cache_put(meeting_id, record, revision)
+
+        if include_transcript and 'transcript' not in record:
+            record = dict(record, transcript=self._load_transcript(meeting_id))
+            with self._lock:
+                cached = self._cache.get(meeting_id)
+                if cached is not None and 'transcript' not in cached and self._revisions[meeting_id] == revision:
+                    self._cache[meeting_id] = record
+                    self._cached_entries += len(record['transcript'])
+                    self._trim()
+
+        return record
+
+    def _load_record(self, meeting_id, conn=None):
+        """(record with tasks, revision) from the database, or (None, None)"""
+        conn = conn or self._conn()
+        row = conn.execute(
+            "SELECT record, revision FROM meetings WHERE meeting_id = ?", (meeting_id,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        record = json.loads(row[0])
+        record['tasks'] = self.get_tasks(meeting_id)
+        if 'indexes' not in record:
+            # Meetings stored before indexes existed
+            record['indexes'] = build_meeting_index(record['tasks'], record.get('speakers', {}))
+        return record, row[1]
+
+    def _load_transcript(self, meeting_id):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT entries FROM transcripts WHERE meeting_id = ?", (meeting_id,)
+        ).fetchone()
+        transcript = Transcript.from_entries(json.loads(row[0]) if row else [])
+        for (entries,) in conn.execute(
+            "SELECT entries FROM transcript_appends WHERE meeting_id = ? ORDER BY first_index", (meeting_id,)
+        ):
+            for entry in json.loads(entries):
+                transcript.append(entry)
+        for row in conn.execute(
+            "SELECT speaker, offset_seconds, end_ms, duration_ms, sentiment, text FROM transcript_rows "
+            "WHERE meeting_id = ? ORDER BY position", (meeting_id,)
+        ):
+            transcript.append_row(*row)
+        return transcript
+
+    def exists(self, meeting_id):
+        return self._conn().execute(
+            "SELECT 1 FROM meetings WHERE meeting_id = ?", (meeting_id,)
+        ).fetchone() is not None
+
+    def ids(self):
+        return [row[0] for row in self._conn().execute(
+            "SELECT meeting_id FROM meetings ORDER BY created_at"
+        )]
+
+    def find_by_content(self, content_hash):
+        """Ids of meetings analyzed from an upload with this SHA-256, oldest first"""
+        return [row[0] for row in self._conn().execute(
+            "SELECT meeting_id FROM meetings WHERE content_hash = ? ORDER BY created_at", (content_hash,)
+        )]
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+    def changed_since(self, revision):
+        """(meeting_id, revision) pairs for meetings written after `revision`"""
+        return self._conn().execute(
+            "SELECT meeting_id, revision FROM meetings WHERE revision > ? ORDER BY revision", (revision,)
+        ).fetchall()
+
+    def get_tasks(self, meeting_id):
+        """A meeting's tasks straight from the database, bypassing the cache"""
+        return [
+            json.loads(task_json) for (task_json,) in self._conn().execute(
+                "SELECT task FROM tasks WHERE meeting_id = ? ORDER BY position", (meeting_id,)
+            )
+        ]
+
+    def usage_rows(self, meeting_id=None):
+        """LLM usage rows of one meeting, or summed over all meetings if meeting_id is None"""
+        if meeting_id is not None:
+            query = ("SELECT endpoint, stage, provider, calls, estimated_calls, tokens_in, tokens_out, cost_usd "
+                     "FROM llm_usage WHERE meeting_id = ?")
+            params = (meeting_id,)
+        else:
+            query = ("SELECT endpoint, stage, provider, SUM(calls), SUM(estimated_calls), SUM(tokens_in), "
+                     "SUM(tokens_out), SUM(cost_usd) FROM llm_usage GROUP BY endpoint, stage, provider")
+            params = ()
+        columns = ('endpoint', 'stage', 'provider', 'calls', 'estimated_calls', 'tokens_in', 'tokens_out', 'cost_usd')
+        return [dict(zip(columns, row)) for row in self._conn().execute(query, params)]
+
+    def usage_spent(self, meeting_id):
+        """(tokens, cost_usd) a meeting has used so far"""
+        tokens, cost = self._conn().execute(
+            "SELECT COALESCE(SUM(tokens_in + tokens_out), 0), COALESCE(SUM(cost_usd), 0) "
+            "FROM llm_usage WHERE meeting_id = ?", (meeting_id,)
+        ).fetchone()
+        return tokens, cost
+
+    def list_meetings(self):
+        """Lightweight listing that never touches records or transcripts"""
+        return [
+            {
+                'meeting_id': meeting_id,
+                'filename': filename,
+                'timestamp': created_at,
+                'participants': participants,
+                'action_items': action_items
+            }
+            for meeting_id, filename, created_at, participants, action_items in self._conn().execute(
+                "SELECT meeting_id, filename, created_at, participants, action_items "
+                "FROM meetings ORDER BY created_at"
+            )
+        ]
+
+    # Cache
+
+    def _cache_put(self, meeting_id, record, revision):
+        with self._lock:
+            self._cache_drop_locked(meeting_id)
+            self._cache[meeting_id] = record
+            self._revisions[meeting_id] = revision
+            self._cached_entries += len(record.get('transcript', ()))
+            self._trim()
+
+    def _cache_drop(self, meeting_id):
+        with self._lock:
+            self._cache_drop_locked(meeting_id)
+
+    def _cache_drop_locked(self, meeting_id):
+        old = self._cache.pop(meeting_id, None)
+        self._revisions.pop(meeting_id, None)
+        if old is not None:
+            self._cached_entries -= len(old.get('transcript', ()))
+
+    def _trim(self):
+        while len(self._cache) > self.cache_size:
+            meeting_id, old = self._cache.popitem(last=False)
+            del self._revisions[meeting_id]
+            self._cached_entries -= len(old.get('transcript', ()))
+
+        # Shed transcripts (coldest first) before whole records. Records are
+        # replaced rather than mutated since callers may still hold them.
+        if self._cached_entries > self.max_cached_entries:
+            for meeting_id, record in self._cache.items():
+                if self._cached_entries <= self.max_cached_entries:
+                    break
+                if 'transcript' in record:
+                    self._cached_entries -= len(record['transcript'])
+                    self._cache[meeting_id] = {k: v for k, v in record.items() if k != 'transcript'}
+
+    def cache_stats(self):
+        with self._lock:
+            return {
+                'cached_meetings': len(self._cache),
+                'cached_transcript_entries': self._cached_entries,
+                'max_meetings': self.cache_size,
+                'max_transcript_entries': self.max_cached_entries
+            }
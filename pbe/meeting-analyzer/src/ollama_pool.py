@@ -0,0 +1,168 @@
+import threading
+import time
+import requests
+from config.settings import Config
+from src.tracing import tracer
+
+class OllamaEndpoint:
+    """Routing state for a single Ollama instance"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.in_flight = 0
+        self.ewma_latency = None
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+
+    def record_latency(self, seconds, alpha):
+        """Fold a completed request's latency into the EWMA"""
+        if self.ewma_latency is None:
+            self.ewma_latency = seconds
+        else:
+            self.ewma_latency = alpha * seconds + (1 - alpha) * self.ewma_latency
+
+    def to_dict(self):
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures
+        }
+
+
+class OllamaPool:
+    """
+    Route Ollama generations across several instances.
+
+    Requests go to the healthy endpoint with the fewest in-flight requests,
+    ties broken by the lowest EWMA latency. Endpoints that fail repeatedly are
+    taken out of rotation until a health check sees them answer again.
+    """
+
+    def __init__(self, base_urls, model):
+        if not base_urls:
+            raise ValueError("OllamaPool needs at least one endpoint")
+        self.model = model
+        self.endpoints = [OllamaEndpoint(url) for url in base_urls]
+        self._lock = threading.Lock()
+        self._health_thread = None
+        self._stop = threading.Event()
+
+    def _select(self, exclude=()):
+        """Pick the best endpoint not in `exclude` and mark a request in flight on it"""
+        now = time.monotonic()
+        with self._lock:
+            untried = [ep for ep in self.endpoints if ep not in exclude] or self.endpoints
+            candidates = [ep for ep in untried if ep.healthy or ep.down_until <= now]
+            if not candidates:
+                # Everything is down: try the endpoint that failed longest ago
+                candidates = [min(untried, key=lambda ep: ep.down_until)]
+
+            endpoint = min(
+                candidates,
+                key=lambda ep: (ep.in_flight, ep.ewma_latency if ep.ewma_latency is not None else 0.0)
+            )
+            endpoint.in_flight += 1
+            endpoint.total_requests += 1
+            return endpoint
+
+    def _release(self, endpoint, latency=None, failed=False):
+        with self._lock:
+            endpoint.in_flight -= 1
+            if failed:
+                endpoint.total_failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= Config.OLLAMA_MAX_FAILURES:
+                    endpoint.healthy = False
+                    endpoint.down_until = time.monotonic() + Config.OLLAMA_HEALTH_INTERVAL
+            else:
+                endpoint.consecutive_failures = 0
+                endpoint.healthy = True
+                if latency is not None:
+                    endpoint.record_latency(latency, Config.OLLAMA_EWMA_ALPHA)
+
+    def generate(self, payload, timeout=30):
+        """
+        Send a /api/generate request to the least-loaded endpoint.
+
+        Retries once on a different endpoint if the first one fails and more
+        than one instance is configured. Raises on failure.
+        """
+        attempts = min(2, len(self.endpoints))
+        tried = set()
+        last_error = None
+
+        for attempt in range(attempts):
+            if attempt:
+                tracer.annotate(retries=1)
+            endpoint = self._select(exclude=tried)
+            tried.add(endpoint)
+            start = time.monotonic()
+            try:
+                response = requests.post(f"{endpoint.base_url}/api/generate", json=payload, timeout=timeout)
+                response.raise_for_status()
+                result = response.json()
+            except Exception as e:
+                self._release(endpoint, failed=True)
+                print(f"⚠ Ollama endpoint {endpoint.base_url} failed: {e}")
+                last_error = e
+                continue
+
+            self._release(endpoint, latency=time.monotonic() - start)
+            return result
+
+        raise last_error
+
+    def check_health(self):
+        """Probe every endpoint and update its rotation status"""
+        results = {}
+        for endpoint in self.endpoints:
+            try:
+                response = requests.get(f"{endpoint.base_url}/api/tags", timeout=5)
+                ok = response.status_code == 200
+                models = [m.get("name", "") for m in response.json().get("models", [])] if ok else []
+            except Exception:
+                ok, models = False, []
+
+            with self._lock:
+                endpoint.healthy = ok
+                if ok:
+                    endpoint.consecutive_failures = 0
+                    endpoint.down_until = 0.0
+                else:
+                    endpoint.down_until = time.monotonic() + Config.OLLAMA_HEALTH_INTERVAL
+            results[endpoint.base_url] = {"healthy": ok, "models": models}
+        return results
+
+    def start_health_checks(self, interval=None):
+        """Run check_health periodically in a daemon thread"""
+        if self._health_thread is not None or len(self.endpoints) < 2:
+            return
+        interval = interval or Config.OLLAMA_HEALTH_INTERVAL
+
+        def _loop():
+            while not self._stop.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=_loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def after_fork(self):
+        """Fresh lock and health-check thread in a forked worker (threads don't survive fork)"""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+        self.start_health_checks()
+
+    def stop_health_checks(self):
+        self._stop.set()
+
+    def stats(self):
+        """Snapshot of per-endpoint routing state"""
+        with self._lock:
+            return [ep.to_dict() for ep in self.endpoints]
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from config.settings import Config
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def export_dir(model_name):
+    """Where the exported ONNX files for a model are kept"""
+    return os.path.join(Config.EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+
+
+def _quantized_file():
+    return f"onnx/model_qint8_{Config.EMBEDDING_ONNX_QUANT_CONFIG}.onnx"
+
+
+def load_onnx_model(model_name, quantize=False):
+    """
+    SentenceTransformer running on ONNX Runtime, exporting the model on first use.
+
+    The export (and the int8 dynamic quantization) is written to export_dir()
+    once; later loads read the ONNX file directly and skip PyTorch weights.
+    The returned model has the same encode() as the PyTorch one.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    directory = export_dir(model_name)
+    onnx_file = os.path.join(directory, "onnx", "model.onnx")
+    if not os.path.exists(onnx_file):
+        print(f"Exporting {model_name} to ONNX (first run only)...")
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(directory)
+
+    file_name = "onnx/model.onnx"
+    if quantize:
+        file_name = _quantized_file()
+        if not os.path.exists(os.path.join(directory, file_name)):
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            print(f"Quantizing ONNX model to int8 ({Config.EMBEDDING_ONNX_QUANT_CONFIG})...")
+            model = SentenceTransformer(directory, backend="onnx")
+            export_dynamic_quantized_onnx_model(model, Config.EMBEDDING_ONNX_QUANT_CONFIG, directory)
+
+    return SentenceTransformer(directory, backend="onnx", model_kwargs={"file_name": file_name})
+
+
+def load_embedding_model(backend=None):
+    """
+    Embedding model for the configured backend (Config.EMBEDDING_BACKEND).
+    Falls back to PyTorch if the ONNX dependencies are missing.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or Config.EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}', expected one of {BACKENDS}")
+
+    if backend != "torch":
+        try:
+            return load_onnx_model(Config.EMBEDDING_MODEL, quantize=backend == "onnx-int8")
+        except ImportError as e:
+            print(f"⚠ ONNX backend unavailable ({e}); install optimum[onnxruntime]. Using PyTorch.")
+
+    return SentenceTransformer(Config.EMBEDDING_MODEL)
+
+
+def cosine_parity(reference, candidate, texts):
+    """
+    Row-wise cosine similarity between two models' embeddings of the same texts
+
+    Returns: {"min": ..., "mean": ...}
+    """
+    a = np.asarray(reference.encode(texts), dtype=np.float32)
+    b = np.asarray(candidate.encode(texts), dtype=np.float32)
+    a /= np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b /= np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    cosines = (a * b).sum(axis=1)
+    return {"min": float(cosines.min()), "mean": float(cosines.mean())}
@@ -0,0 +1,101 @@
+import re
+import numpy as np
+from config.settings import Config
+from src.transcript import Transcript
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Vocabulary that only shows up in questions about a meeting. Generic question
+# words (who/what/how/tell...) are deliberately absent: they match anything.
+MEETING_KEYWORDS = {
+    'meeting', 'meet', 'discuss', 'discussed', 'discussion', 'said', 'say', 'mention',
+    'mentioned', 'talk', 'talked', 'speaker', 'participant', 'attendee', 'action',
+    'task', 'todo', 'deadline', 'due', 'decision', 'decide', 'decided', 'summary',
+    'summarize', 'topic', 'agenda', 'sentiment', 'mood', 'tone', 'owner', 'own',
+    'assigned', 'assign', 'responsible', 'urgent', 'urgency', 'important', 'critical',
+    'priority', 'risk', 'issue', 'problem', 'solution', 'blocker', 'agree', 'agreed',
+    'disagree', 'concern', 'highlight', 'outcome', 'result', 'conclusion', 'step',
+    'follow', 'plan', 'schedule', 'timeline', 'milestone', 'team', 'call', 'sync'
+}
+
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by',
+    'is', 'are', 'was', 'were', 'be', 'it', 'its', 'this', 'that', 'we', 'our', 'i',
+    'you', 'they', 'he', 'she', 'do', 'did', 'does', 'what', 'who', 'when', 'why',
+    'how', 'which', 'about', 'from', 'as', 'new', 'general'
+}
+
+
+def _normalize(token):
+    # Crude plural folding so "tasks"/"task" and "deadlines"/"deadline" meet
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lowercased, plural-folded tokens of a string"""
+    return {_normalize(t) for t in TOKEN_PATTERN.findall(text.lower())}
+
+
+class MeetingMatcher:
+    """
+    Precompiled relevance check for questions about one meeting.
+
+    Built once per meeting: keyword, speaker, topic and entity vocabularies
+    become token sets, so a question is checked with a few set intersections.
+    Questions with no lexical hit are compared to the meeting's embedding
+    centroid and rejected below Config.OFFTOPIC_SIMILARITY_THRESHOLD.
+    """
+
+    KEYWORDS = {_normalize(k) for k in MEETING_KEYWORDS}
+
+    def __init__(self, speakers=(), topics=(), entities=(), centroid=None):
+        self.speaker_tokens = self._vocabulary(speakers)
+        self.topic_tokens = self._vocabulary(topics) | self._vocabulary(entities)
+        self.centroid = None
+        if centroid is not None and len(centroid):
+            centroid = np.asarray(centroid, dtype=np.float32)
+            norm = np.linalg.norm(centroid)
+            if norm > 0:
+                self.centroid = centroid / norm
+
+    @staticmethod
+    def _vocabulary(terms):
+        tokens = set()
+        for term in terms:
+            if term:
+                tokens |= tokenize(str(term))
+        return tokens - STOPWORDS
+
+    @classmethod
+    def from_meeting(cls, meeting_data):
+        """Build a matcher from either the API or the CLI meeting record shape"""
+        speakers = list(meeting_data.get('speakers', {}).keys())
+        if not speakers:
+            speakers = Transcript.coerce(meeting_data.get('transcript')).speakers
+
+        summary = meeting_data.get('summary', {})
+        topics = meeting_data.get('topics') or summary.get('topics_discussed', [])
+        entities = meeting_data.get('entities') or summary.get('named_entities', [])
+
+        return cls(speakers, topics, entities, meeting_data.get('centroid'))
+
+    def lexical_match(self, question):
+        """Returns a reason string if the question names meeting vocabulary, else None"""
+        tokens = tokenize(question)
+        if tokens & self.speaker_tokens:
+            return "Question mentions a meeting participant"
+        if tokens & self.topic_tokens:
+            return "Question mentions a meeting topic"
+        if tokens & self.KEYWORDS:
+            return "Question contains meeting-related keywords"
+        return None
+
+    def similarity(self, query_embedding):
+        """Cosine similarity between a query embedding and the meeting centroid"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if self.centroid is None or norm == 0:
+            return None
+        return float(np.dot(self.centroid, query) / norm)
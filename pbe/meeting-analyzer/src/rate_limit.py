@@ -0,0 +1,43 @@
+import multiprocessing
+import time
+
+_limiter = None
+
+
+class SharedRateLimiter:
+    """
+    Pace calls to at most `per_minute`, across every process holding this
+    limiter.
+
+    The next free call slot lives in shared memory; each caller reserves one
+    under its lock and sleeps until it comes up, so workers of a process pool
+    space their calls out evenly instead of bursting into the provider's
+    limit together. Create it before the pool and hand it to the workers
+    (pool initializer arguments); it cannot be pickled afterwards.
+    """
+
+    def __init__(self, per_minute, context=None):
+        self.per_minute = per_minute
+        self.interval = 60.0 / per_minute
+        self._next_slot = (context or multiprocessing).Value("d", 0.0)
+
+    def acquire(self):
+        """Block until this caller's slot; returns the seconds waited"""
+        with self._next_slot.get_lock():
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+        return slot - now
+
+
+def install(limiter):
+    """Pace this process's Cohere calls with `limiter` (None removes it)"""
+    global _limiter
+    _limiter = limiter
+
+
+def wait():
+    """Wait for a call slot if a limiter is installed"""
+    return _limiter.acquire() if _limiter is not None else 0.0
@@ -0,0 +1,280 @@
+import base64
+import bisect
+import heapq
+import json
+import threading
+from datetime import date
+from dateutil import parser as date_parser
+
+URGENCY_LEVELS = ['critical', 'high', 'medium', 'low']
+URGENCY_ORDER = {level: rank for rank, level in enumerate(URGENCY_LEVELS)}
+
+
+def urgency_rank(task):
+    """Sort rank of a task's urgency (unknown levels sort as medium)"""
+    return URGENCY_ORDER.get(str(task.get('urgency', 'medium')).lower(), URGENCY_ORDER['medium'])
+
+
+def build_meeting_index(tasks, speakers):
+    """
+    Precompute the lookups behind the per-meeting filter routes.
+
+    Every task list holds positions into `tasks`, already in urgency order,
+    so a filter route is a dictionary lookup plus a list comprehension.
+    The result is plain JSON and is stored with the meeting record.
+    """
+    order = sorted(range(len(tasks)), key=lambda i: urgency_rank(tasks[i]))
+
+    by_tag = {}
+    by_owner = {}
+    by_urgency = {}
+    for position in order:
+        task = tasks[position]
+        for tag in {str(t).lower() for t in task.get('tags', []) if t}:
+            by_tag.setdefault(tag, []).append(position)
+        owner = str(task.get('owner') or '').casefold()
+        by_owner.setdefault(owner, []).append(position)
+        urgency = str(task.get('urgency', 'medium')).lower()
+        by_urgency.setdefault(urgency, []).append(position)
+
+    return {
+        'sorted_tasks': order,
+        'by_tag': by_tag,
+        'by_owner': by_owner,
+        'by_urgency': by_urgency,
+        'speakers': {name.casefold(): name for name in speakers}
+    }
+
+
+def extend_meeting_index(index, tasks, first_new, speakers):
+    """
+    build_meeting_index(tasks, speakers) from `index`, the index of
+    tasks[:first_new], placing only the tasks added after it (each one after
+    the tasks of its urgency, as a rebuild would). `index` is left unchanged;
+    only the lists that gain a task are copied.
+    """
+    index = dict(index, speakers={name.casefold(): name for name in speakers})
+    for group in ('by_tag', 'by_owner', 'by_urgency'):
+        index[group] = dict(index[group])
+
+    for position in range(first_new, len(tasks)):
+        task = tasks[position]
+        rank = urgency_rank(task)
+        index['sorted_tasks'] = _insert_ranked(index['sorted_tasks'], tasks, position, rank)
+        for tag in {str(t).lower() for t in task.get('tags', []) if t}:
+            index['by_tag'][tag] = _insert_ranked(index['by_tag'].get(tag, []), tasks, position, rank)
+        owner = str(task.get('owner') or '').casefold()
+        index['by_owner'][owner] = _insert_ranked(index['by_owner'].get(owner, []), tasks, position, rank)
+        urgency = str(task.get('urgency', 'medium')).lower()
+        index['by_urgency'][urgency] = index['by_urgency'].get(urgency, []) + [position]
+    return index
+
+
+def _insert_ranked(positions, tasks, position, rank):
+    """Copy of `positions` (urgency order) with `position` after every task ranked `rank` or higher"""
+    i = len(positions)
+    while i and urgency_rank(tasks[positions[i - 1]]) > rank:
+        i -= 1
+    return positions[:i] + [position] + positions[i:]
+
+
+def select_tasks(tasks, positions):
+    """Materialize an index entry back into task dicts"""
+    return [tasks[i] for i in positions]
+
+
+NO_DEADLINE = '9999-12-31'
+CLOSED_STATUSES = {'done', 'closed', 'cancelled'}
+
+
+def parse_deadline(value):
+    """ISO date string for a task deadline, or None if it isn't a date"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10]).isoformat()
+    except ValueError:
+        pass
+    if not any(ch.isdigit() for ch in value):
+        # Bare weekday or month names would resolve relative to today
+        return None
+    try:
+        return date_parser.parse(value, fuzzy=False).date().isoformat()
+    except (ValueError, OverflowError):
+        return None
+
+
+def encode_cursor(sort_key):
+    return base64.urlsafe_b64encode(json.dumps(list(sort_key)).encode()).decode()
+
+
+# Element types of a task sort key, (deadline, urgency rank, task key)
+SORT_KEY_TYPES = (str, int, str)
+
+
+def decode_cursor(cursor, types=SORT_KEY_TYPES):
+    """
+    Inverse of encode_cursor; raises ValueError on a malformed cursor or one
+    whose elements don't match `types` (so it can't break sort key comparisons)
+    """
+    try:
+        values = tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if len(values) != len(types) or not all(
+        isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(values, types)
+    ):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+class GlobalTaskIndex:
+    """
+    Cross-meeting index of open tasks.
+
+    - owner (case-folded) -> sorted list of (deadline, urgency rank, task key)
+    - tag -> task keys
+    - deadline month ("YYYY-MM") -> task keys
+
+    The index follows MeetingStore revisions: sync() reloads only meetings
+    written since the last sync, so it stays current with writes made by
+    other workers. Owner lists are kept sorted on insert and delete, so an
+    owner's page is a bisect and a slice.
+    """
+
+    def __init__(self, meeting_store):
+        self.meeting_store = meeting_store
+        self._revision = 0
+        self._tasks = {}          # key -> task dict (with meeting_id, task_key)
+        self._sort_keys = {}      # key -> (deadline, urgency rank, key)
+        self._meeting_keys = {}   # meeting_id -> [keys]
+        self._by_owner = {}
+        self._by_tag = {}
+        self._by_month = {}
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Pull in meetings written since the last sync"""
+        changed = self.meeting_store.changed_since(self._revision)
+        if not changed:
+            return 0
+        with self._lock:
+            for meeting_id, revision in changed:
+                self._index_meeting(meeting_id, self.meeting_store.get_tasks(meeting_id))
+                self._revision = max(self._revision, revision)
+        return len(changed)
+
+    def _index_meeting(self, meeting_id, tasks):
+        self._remove_meeting(meeting_id)
+        keys = []
+        for task in tasks:
+            if str(task.get('status', 'open')).lower() in CLOSED_STATUSES:
+                continue
+            key = f"{meeting_id}:{task.get('task_id', len(keys))}"
+            deadline = parse_deadline(task.get('deadline'))
+            sort_key = (deadline or NO_DEADLINE, urgency_rank(task), key)
+
+            self._tasks[key] = dict(task, meeting_id=meeting_id, task_key=key)
+            self._sort_keys[key] = sort_key
+            owner = str(task.get('owner') or '').casefold()
+            bisect.insort(self._by_owner.setdefault(owner, []), sort_key)
+            for tag in {str(t).lower() for t in task.get('tags', []) if t}:
+                self._by_tag.setdefault(tag, set()).add(key)
+            self._by_month.setdefault(deadline[:7] if deadline else None, set()).add(key)
+            keys.append(key)
+        self._meeting_keys[meeting_id] = keys
+
+    def _remove_meeting(self, meeting_id):
+        for key in self._meeting_keys.pop(meeting_id, []):
+            task = self._tasks.pop(key)
+            sort_key = self._sort_keys.pop(key)
+            owner = str(task.get('owner') or '').casefold()
+            owned = self._by_owner[owner]
+            del owned[bisect.bisect_left(owned, sort_key)]
+            if not owned:
+                del self._by_owner[owner]
+            for tag in {str(t).lower() for t in task.get('tags', []) if t}:
+                self._by_tag.get(tag, set()).discard(key)
+            deadline = None if sort_key[0] == NO_DEADLINE else sort_key[0]
+            self._by_month.get(deadline[:7] if deadline else None, set()).discard(key)
+
+    def _page(self, sort_keys, limit, cursor):
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            sort_keys = [k for k in sort_keys if k > after]
+        return self._page_of(heapq.nsmallest(limit + 1, sort_keys), limit)
+
+    def _page_of(self, page, limit):
+        """Result for the first limit + 1 sort keys after the cursor, in order"""
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            'tasks': [self._tasks[k[2]] for k in page],
+            'next_cursor': encode_cursor(page[-1]) if has_more and page else None
+        }
+
+    def tasks_for_owner(self, owner, limit=50, cursor=None):
+        """Open tasks for an owner across meetings, by deadline then urgency"""
+        self.sync()
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            owned = self._by_owner.get(owner.casefold(), [])
+            start = bisect.bisect_right(owned, after) if after is not None else 0
+            result = self._page_of(owned[start:start + limit + 1], limit)
+            result['total'] = len(owned)
+            return result
+
+    def tasks_for_tag(self, tag, limit=50, cursor=None):
+        self.sync()
+        with self._lock:
+            sort_keys = [self._sort_keys[k] for k in self._by_tag.get(tag.lower(), ())]
+            result = self._page(sort_keys, limit, cursor)
+            result['total'] = len(sort_keys)
+            return result
+
+    def tasks_due(self, start=None, end=None, owner=None, limit=50, cursor=None):
+        """Open tasks with a deadline in [start, end] (ISO dates, inclusive)"""
+        self.sync()
+        start = start or '0000-01-01'
+        end = end or NO_DEADLINE
+        with self._lock:
+            months = [m for m in self._by_month if m is not None and start[:7] <= m <= end[:7]]
+            sort_keys = [
+                self._sort_keys[k]
+                for m in months for k in self._by_month[m]
+                if start <= self._sort_keys[k][0] <= end
+            ]
+            if owner:
+                folded = owner.casefold()
+                sort_keys = [k for k in sort_keys if str(self._tasks[k[2]].get('owner') or '').casefold() == folded]
+            result = self._page(sort_keys, limit, cursor)
+            result['total'] = len(sort_keys)
+            return result
+
+    def workload(self, today=None):
+        """Per-owner counts of open tasks by urgency, plus overdue and undated counts"""
+        self.sync()
+        today = today or date.today().isoformat()
+        with self._lock:
+            owners = {}
+            for key, task in self._tasks.items():
+                deadline = self._sort_keys[key][0]
+                name = task.get('owner') or 'Unassigned'
+                stats = owners.setdefault(name.casefold(), {
+                    'owner': name,
+                    'open_tasks': 0,
+                    'by_urgency': {level: 0 for level in URGENCY_LEVELS},
+                    'overdue': 0,
+                    'no_deadline': 0,
+                    'next_deadline': None
+                })
+                stats['open_tasks'] += 1
+                level = URGENCY_LEVELS[urgency_rank(task)]
+                stats['by_urgency'][level] += 1
+                if deadline == NO_DEADLINE:
+                    stats['no_deadline'] += 1
+                elif deadline < today:
+                    stats['overdue'] += 1
+                elif stats['next_deadline'] is None or deadline < stats['next_deadline']:
+                    stats['next_deadline'] = deadline
+            return sorted(owners.values(), key=lambda s: s['open_tasks'], reverse=True)
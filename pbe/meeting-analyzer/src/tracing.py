@@ -0,0 +1,304 @@
+import bisect
+import contextvars
+import functools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from config.settings import Config
+from src import rate_limit
+from src.usage import record_llm_call
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Numeric span tags that are also summed into Prometheus counters
+COUNTED_TAGS = {
+    "tokens_in": ("llm_tokens_total", {"direction": "prompt"}),
+    "tokens_out": ("llm_tokens_total", {"direction": "completion"}),
+    "retries": ("retries_total", {}),
+}
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_bound_tags = contextvars.ContextVar("bound_tags", default={})
+
+
+class Span:
+    """One timed call. Tags set on it end up in the trace dump; numeric
+    tags listed in COUNTED_TAGS are also added to the metrics."""
+
+    __slots__ = ("name", "tags", "start", "duration", "parent", "error", "attempts")
+
+    def __init__(self, name, tags, parent):
+        self.name = name
+        self.tags = tags
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self.attempts = 0
+
+    def set(self, **tags):
+        self.tags.update(tags)
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.tags[key] = self.tags.get(key, 0) + value
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class Tracer:
+    """
+    Spans around pipeline calls, aggregated into Prometheus metrics.
+
+    Every span feeds a latency histogram labelled with its name. When a
+    trace is active (see start_trace) finished spans are also collected,
+    with their tags, into a per-request trace kept in a small ring buffer.
+    Disabled (Config.TRACING_ENABLED=false), span() is a no-op.
+    """
+
+    def __init__(self, enabled=None, max_traces=None):
+        self.enabled = Config.TRACING_ENABLED if enabled is None else enabled
+        self.max_traces = max_traces or Config.TRACE_BUFFER_SIZE
+        self._histograms = {}
+        self._errors = {}
+        self._counters = {}
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **tags):
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        bound = _bound_tags.get()
+        span = Span(name, dict(bound, **tags) if bound else tags, _current_span.get())
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration = time.perf_counter() - span.start
+            self._finish(span)
+
+    def observe(self, name, seconds, error=None):
+        """Record a duration measured outside span() (e.g. a whole HTTP request)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._observe_locked(name, seconds, error)
+
+    def _observe_locked(self, name, seconds, error):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = _Histogram()
+        histogram.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram.total += seconds
+        histogram.count += 1
+        if error:
+            self._errors[name] = self._errors.get(name, 0) + 1
+
+    def _finish(self, span):
+        with self._lock:
+            self._observe_locked(span.name, span.duration, span.error)
+            for tag, (metric, labels) in COUNTED_TAGS.items():
+                value = span.tags.get(tag)
+                if value:
+                    key = (metric, span.name, tuple(sorted(labels.items())))
+                    self._counters[key] = self._counters.get(key, 0) + value
+
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["spans"].append({
+                "name": span.name,
+                "parent": span.parent.name if span.parent else None,
+                "start_ms": round((span.start - trace["start"]) * 1000, 3),
+                "duration_ms": round(span.duration * 1000, 3),
+                "error": span.error,
+                "tags": span.tags
+            })
+
+    def traced(self, name):
+        """Decorator form of span(); the call's meeting_id kwarg becomes a tag"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                tags = {"meeting_id": kwargs["meeting_id"]} if "meeting_id" in kwargs else {}
+                with self.span(name, **tags):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def annotate(self, **counts):
+        """Add numeric tags (tokens, retries) to the innermost open span"""
+        span = _current_span.get()
+        if span is not None:
+            span.add(**counts)
+
+    @contextmanager
+    def bind(self, **tags):
+        """Tag every span opened inside the block (e.g. with the meeting_id)"""
+        token = _bound_tags.set(dict(_bound_tags.get(), **tags))
+        try:
+            yield
+        finally:
+            _bound_tags.reset(token)
+
+    # Requests
+
+    def begin_request(self, trace_name=None):
+        """Start of an HTTP request: clear request tags, optionally start a trace"""
+        _bound_tags.set({})
+        _current_trace.set(None)
+        return self.start_trace(trace_name) if trace_name and self.enabled else None
+
+    def tag_request(self, **tags):
+        """Tag every span for the rest of the current request"""
+        _bound_tags.set(dict(_bound_tags.get(), **tags))
+
+    def end_request(self, name, seconds, error=None):
+        """End of an HTTP request: record its latency and close its trace (if any)"""
+        self.observe(name, seconds, error)
+        _bound_tags.set({})
+        return self.end_trace()
+
+    # Per-request traces
+
+    def start_trace(self, name):
+        """Collect spans of the current context into a trace; returns its id"""
+        trace_id = uuid.uuid4().hex[:16]
+        _current_trace.set({"trace_id": trace_id, "name": name, "start": time.perf_counter(), "spans": []})
+        return trace_id
+
+    def end_trace(self):
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        _current_trace.set(None)
+        record = {
+            "trace_id": trace["trace_id"],
+            "name": trace["name"],
+            "duration_ms": round((time.perf_counter() - trace["start"]) * 1000, 3),
+            "spans": trace["spans"]
+        }
+        with self._lock:
+            self._traces[trace["trace_id"]] = record
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+        return record
+
+    def get_trace(self, trace_id):
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def recent_traces(self):
+        with self._lock:
+            return [
+                {"trace_id": t["trace_id"], "name": t["name"], "duration_ms": t["duration_ms"], "spans": len(t["spans"])}
+                for t in reversed(self._traces.values())
+            ]
+
+    # Prometheus exposition
+
+    def render_metrics(self, prefix="meeting_analyzer"):
+        with self._lock:
+            histograms = {name: (list(h.counts), h.total, h.count) for name, h in self._histograms.items()}
+            errors = dict(self._errors)
+            counters = dict(self._counters)
+
+        lines = [
+            f"# HELP {prefix}_span_seconds Time spent in instrumented calls",
+            f"# TYPE {prefix}_span_seconds histogram",
+        ]
+        for name in sorted(histograms):
+            counts, total, count = histograms[name]
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'{prefix}_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_span_seconds_bucket{{span="{name}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {count}')
+
+        lines += [
+            f"# HELP {prefix}_span_errors_total Instrumented calls that raised",
+            f"# TYPE {prefix}_span_errors_total counter",
+        ]
+        lines += [f'{prefix}_span_errors_total{{span="{name}"}} {n}' for name, n in sorted(errors.items())]
+
+        for metric, help_text in (("llm_tokens_total", "LLM tokens by span and direction"),
+                                  ("retries_total", "Retried provider requests by span")):
+            lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} counter"]
+            for (name, span_name, labels), value in sorted(counters.items()):
+                if name != metric:
+                    continue
+                label_text = "".join(f',{k}="{v}"' for k, v in labels)
+                lines.append(f'{prefix}_{metric}{{span="{span_name}"{label_text}}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+class _NullSpan:
+    def set(self, **tags):
+        pass
+
+    def add(self, **counts):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+tracer = Tracer()
+
+
+def count_http_request(request):
+    """httpx event hook: every attempt after the first within a span is a retry"""
+    span = _current_span.get()
+    if span is not None:
+        span.attempts += 1
+        if span.attempts > 1:
+            span.add(retries=1)
+
+
+def cohere_usage(response):
+    """(prompt, completion) tokens billed for a Cohere chat response, or (None, None)"""
+    meta = getattr(response, "meta", None)
+    units = getattr(meta, "billed_units", None) if meta is not None else None
+    if units is None:
+        return None, None
+    return getattr(units, "input_tokens", None), getattr(units, "output_tokens", None)
+
+
+def cohere_chat(cohere_client, stage, **kwargs):
+    """
+    cohere_client.chat(**kwargs) in a span named cohere.<stage>, tagged with
+    token usage, which is also accounted to the current meeting. Waits for
+    the shared rate limiter first, if one is installed (batch imports).
+    """
+    rate_limit.wait()
+    with tracer.span(f"cohere.{stage}") as span:
+        response = cohere_client.chat(**kwargs)
+        tokens_in, tokens_out = record_llm_call(
+            "cohere", stage,
+            (kwargs.get("preamble"), kwargs.get("message")),
+            getattr(response, "text", ""),
+            *cohere_usage(response)
+        )
+        span.add(tokens_in=tokens_in, tokens_out=tokens_out)
+        return response
@@ -0,0 +1,251 @@
+import array
+import math
+from datetime import timedelta
+import numpy as np
+
+
+def _number(value):
+    """Float from a number or numeric string; 0.0 for anything else"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# end_ms/duration_ms of a turn without timings, in a transcript where others have them
+UNTIMED = -1
+
+
+def _column(values, dtype):
+    """Zero-copy numpy view of an array.array column"""
+    return np.frombuffer(values, dtype=dtype) if len(values) else np.zeros(0, dtype=dtype)
+
+
+def sentiment_label(score):
+    if score > 0.3:
+        return 'Positive'
+    if score < -0.3:
+        return 'Negative'
+    return 'Neutral'
+
+
+def merge_speaker_stats(stats, more):
+    """
+    speaker_stats() of a transcript followed by more turns, from the stats of
+    each part: talk time and turns add up, mean sentiment is turn-weighted
+    """
+    merged = dict(stats)
+    for name, extra in more.items():
+        prior = merged.get(name)
+        if prior is None:
+            merged[name] = dict(extra)
+            continue
+        segments = prior['segments'] + extra['segments']
+        score = round((prior['sentiment'] * prior['segments'] + extra['sentiment'] * extra['segments'])
+                      / max(segments, 1), 2)
+        merged[name] = {
+            'duration': round(prior['duration'] + extra['duration'], 2),
+            'segments': segments,
+            'sentiment': score,
+            'sentiment_label': sentiment_label(score)
+        }
+    return merged
+
+
+class Transcript:
+    """
+    Columnar meeting transcript
+
+    One row per turn, kept as parallel columns instead of a dict per entry:
+    interned speaker ids, int offsets (seconds), end times and durations in
+    milliseconds (allocated at the first turn that has them; UNTIMED for
+    turns without), float32 sentiment (NaN until scored) and the texts.
+    Indexing and iteration yield entries in the usual dict shape, and
+    to_entries() round-trips them losslessly, so code written against
+    entry lists keeps working; per-speaker statistics run vectorized.
+    """
+
+    __slots__ = ("speakers", "_speaker_ids", "speaker_ids", "offsets", "end_ms", "duration_ms",
+                 "sentiment", "texts")
+
+    def __init__(self):
+        self.speakers = []      # speaker id -> name
+        self._speaker_ids = {}  # name -> speaker id
+        self.speaker_ids = array.array("i")
+        self.offsets = array.array("i")
+        # None until an entry carries end_seconds/duration (older records do not)
+        self.end_ms = None
+        self.duration_ms = None
+        self.sentiment = array.array("f")
+        self.texts = []
+
+    @classmethod
+    def from_entries(cls, entries):
+        transcript = cls()
+        for entry in entries:
+            transcript.append(entry)
+        return transcript
+
+    @classmethod
+    def coerce(cls, transcript):
+        """A Transcript as is, or one built from a list of entries"""
+        return transcript if isinstance(transcript, cls) else cls.from_entries(transcript or [])
+
+    def append(self, entry):
+        timed = 'end_seconds' in entry
+        sentiment = entry.get('sentiment')
+        self.append_row(
+            entry.get('speaker_name') or entry.get('speaker') or 'Unknown',
+            int(_number(entry.get('offset_seconds'))),
+            round(_number(entry.get('end_seconds')) * 1000) if timed else None,
+            round(_number(entry.get('duration')) * 1000) if timed else None,
+            None if sentiment is None else _number(sentiment),
+            entry.get('text', '')
+        )
+
+    def append_row(self, speaker, offset, end_ms, duration_ms, sentiment, text):
+        """Append one turn from column values (end_ms/duration_ms None if untimed)"""
+        speaker_id = self._speaker_ids.get(speaker)
+        if speaker_id is None:
+            speaker_id = self._speaker_ids[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+
+        if end_ms is not None and self.end_ms is None:
+            self.end_ms = array.array("q", [UNTIMED]) * len(self)
+            self.duration_ms = array.array("q", [UNTIMED]) * len(self)
+
+        self.speaker_ids.append(speaker_id)
+        self.offsets.append(offset)
+        if self.end_ms is not None:
+            self.end_ms.append(UNTIMED if end_ms is None else end_ms)
+            self.duration_ms.append(UNTIMED if end_ms is None else duration_ms or 0)
+        self.sentiment.append(math.nan if sentiment is None else sentiment)
+        self.texts.append(text)
+
+    def rows(self):
+        """
+        (speaker, offset, end_ms, duration_ms, sentiment, text) per turn, the
+        append_row() arguments, read straight from the columns
+        """
+        for index in range(len(self)):
+            untimed = self.end_ms is None or self.end_ms[index] == UNTIMED
+            yield (
+                self.speakers[self.speaker_ids[index]],
+                self.offsets[index],
+                None if untimed else self.end_ms[index],
+                None if untimed else self.duration_ms[index],
+                self._sentiment_value(index),
+                self.texts[index]
+            )
+
+    def set_sentiment(self, index, score):
+        self.sentiment[index] = math.nan if score is None else score
+
+    # Entry view
+
+    @property
+    def has_times(self):
+        """Whether any turn carries end_seconds/duration"""
+        return self.end_ms is not None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _sentiment_value(self, index):
+        value = self.sentiment[index]
+        return None if math.isnan(value) else round(value, 6)
+
+    def entry(self, index):
+        """Row `index` in the usual entry dict shape"""
+        offset = self.offsets[index]
+        entry = {
+            "timestamp": str(timedelta(seconds=offset)),
+            "offset_seconds": offset,
+        }
+        if self.end_ms is not None and self.end_ms[index] != UNTIMED:
+            entry["end_seconds"] = self.end_ms[index] / 1000
+            entry["duration"] = self.duration_ms[index] / 1000
+        entry["speaker_name"] = self.speakers[self.speaker_ids[index]]
+        entry["text"] = self.texts[index]
+        entry["sentiment"] = self._sentiment_value(index)
+        return entry
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.entry(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return self.entry(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.entry(index)
+
+    def to_entries(self):
+        """The transcript as a list of entry dicts (the stored JSON shape)"""
+        return list(self)
+
+    def sentiment_values(self, start=0, stop=None):
+        """Sentiment of turns `start` to `stop` (all by default), None where unscored"""
+        return [self._sentiment_value(i) for i in range(start, len(self) if stop is None else stop)]
+
+    def format_lines(self, with_sentiment=False):
+        """
+        Prompt lines, "[H:MM:SS] Speaker: text" (with "(Sentiment: x)" after
+        the speaker if asked), built straight from the columns
+        """
+        names = [self.speakers[speaker_id] for speaker_id in self.speaker_ids]
+        clocks = [str(timedelta(seconds=offset)) for offset in self.offsets]
+        if not with_sentiment:
+            return [f"[{clock}] {name}: {text}" for clock, name, text in zip(clocks, names, self.texts)]
+        return [
+            f"[{clock}] {name} (Sentiment: {self._sentiment_value(i)}): {text}"
+            for i, (clock, name, text) in enumerate(zip(clocks, names, self.texts))
+        ]
+
+    # Aggregations
+
+    def _by_speaker(self, weights=None):
+        return np.bincount(_column(self.speaker_ids, np.int32), weights=weights, minlength=len(self.speakers))
+
+    def segment_counts(self):
+        """Turns per speaker id"""
+        return self._by_speaker()
+
+    def talk_time(self):
+        """Seconds of speech per speaker id (untimed turns count as none)"""
+        if self.duration_ms is None:
+            return np.zeros(len(self.speakers))
+        durations = np.maximum(_column(self.duration_ms, np.int64), 0).astype(np.float64)
+        return self._by_speaker(durations) / 1000
+
+    def mean_sentiment(self):
+        """Mean sentiment per speaker id (unscored turns count as neutral)"""
+        sentiment = np.nan_to_num(_column(self.sentiment, np.float32).astype(np.float64))
+        counts = self.segment_counts()
+        return self._by_speaker(sentiment) / np.maximum(counts, 1)
+
+    def speaker_stats(self):
+        """
+        {speaker: {'duration', 'segments', 'sentiment', 'sentiment_label'}},
+        speakers in order of first appearance
+        """
+        talk_time = self.talk_time()
+        segments = self.segment_counts()
+        sentiment = self.mean_sentiment()
+        stats = {}
+        for speaker_id, name in enumerate(self.speakers):
+            score = round(float(sentiment[speaker_id]), 2)
+            stats[name] = {
+                'duration': round(float(talk_time[speaker_id]), 2),
+                'segments': int(segments[speaker_id]),
+                'sentiment': score,
+                'sentiment_label': sentiment_label(score)
+            }
+        return stats
+
+    def duration_seconds(self):
+        """Offset of the last turn (0 if empty)"""
+        return int(_column(self.offsets, np.int32).max()) if len(self) else 0
@@ -0,0 +1,257 @@
+import html
+import io
+import json
+import os
+import re
+from datetime import timedelta
+from itertools import chain, islice
+from config.settings import Config
+
+FORMATS = ("text", "vtt", "srt", "json")
+
+# Cue timing line: "00:01:02.345 --> 00:01:04.000" (WebVTT, hours optional)
+# or "00:01:02,345 --> 00:01:04,000" (SRT). Cue settings may follow.
+CUE_TIMING = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})"
+)
+# WebVTT voice span: <v Speaker> or <v.class Speaker>
+VOICE_TAG = re.compile(r"<v(?:\.[^\s>]*)?\s+([^>]+)>")
+# Remaining markup: VTT/HTML tags and SSA override blocks used in some SRT files
+MARKUP = re.compile(r"<[^>]*>|\{\\[^}]*\}")
+WHITESPACE = re.compile(r"\s+")
+# "Speaker: text" inside a cue, optionally after a ">>" speaker-change marker
+CUE_SPEAKER = re.compile(r"^(?:>>\s*|-\s+)?([^\W\d][\w.'()\- ]{0,39}?):\s+(\S.*)$")
+# Plain-text turn: optional [H:MM:SS] start time, then "Speaker: text". The
+# speaker must start with a letter, so "10:30 works" or a URL is not a turn.
+SPEAKER_LINE = re.compile(
+    r"^(?:\[(\d{1,2}(?::\d{2}){1,2}(?:[.,]\d{1,3})?)\]\s*)?([^\W\d][\w.'()\- ]{0,39}?):(?!//)\s*(\S.*)$"
+)
+MAX_SPEAKER_WORDS = 4
+
+
+def parse_clock(value):
+    """Seconds from "H:MM:SS(.mmm)", "MM:SS" or a number"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = 0.0
+    for part in str(value).strip().replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _timing_seconds(hours, minutes, seconds, fraction):
+    return (int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+            + int(fraction.ljust(3, "0")) / 1000)
+
+
+def make_entry(start, end, speaker, text):
+    """Transcript entry in the shape the rest of the pipeline uses"""
+    return {
+        "timestamp": str(timedelta(seconds=int(start))),
+        "offset_seconds": int(start),
+        "end_seconds": round(float(end), 3),
+        "duration": round(max(0.0, float(end - start)), 3),
+        "speaker_name": speaker,
+        "text": text,
+        "sentiment": None  # Will be filled later
+    }
+
+
+def _is_speaker(name):
+    return name.count(" ") < MAX_SPEAKER_WORDS
+
+
+# Plain text
+
+def iter_text_entries(lines, start_time=0, avg_gap=30):
+    """
+    Entries from "Speaker: text" lines (any iterable of lines)
+
+    A leading [H:MM:SS] gives a turn its real start time; without one the
+    time is estimated as before (avg_gap plus a second per 10 characters of
+    the previous turn). A turn lasts until the next one starts. Lines that
+    are not a speaker turn continue the previous turn.
+    """
+    pending = None  # (start, speaker, text parts)
+    next_time = start_time
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        match = SPEAKER_LINE.match(line)
+        if match is None or not _is_speaker(match.group(2)):
+            if pending is not None:
+                pending[2].append(line)
+            continue
+
+        clock, speaker, text = match.groups()
+        start = parse_clock(clock) if clock else None
+        if pending is not None:
+            entry, next_time = _finish_turn(pending, avg_gap, start)
+            yield entry
+        pending = (next_time if start is None else start, speaker.strip(), [text])
+
+    if pending is not None:
+        yield _finish_turn(pending, avg_gap, None)[0]
+
+
+def _finish_turn(pending, avg_gap, next_start):
+    start, speaker, parts = pending
+    text = " ".join(parts)
+    estimated_end = start + avg_gap + len(text) // 10
+    end = estimated_end if next_start is None else max(start, next_start)
+    return make_entry(start, end, speaker, text), estimated_end
+
+
+# Captions
+
+def iter_caption_cues(lines):
+    """
+    (start, end, speaker, text) for each cue of a WebVTT or SRT file
+
+    Headers, cue numbers/identifiers and NOTE/STYLE blocks are skipped since
+    they have no timing line. Speakers come from <v> voice tags or a
+    "Name:" prefix; a cue without one continues the previous speaker.
+    """
+    timing = None
+    text_lines = []
+    speaker = "Unknown"
+
+    for line in chain(lines, ("",)):
+        line = line.strip()
+        if not line:
+            if timing is not None and text_lines:
+                cue = _caption_cue(timing, text_lines, speaker)
+                if cue is not None:
+                    speaker = cue[2]
+                    yield cue
+            timing = None
+            text_lines = []
+        elif timing is None:
+            timing = CUE_TIMING.match(line)
+        else:
+            text_lines.append(line)
+
+
+def _caption_cue(timing, text_lines, speaker):
+    text = " ".join(text_lines)
+    voice = VOICE_TAG.search(text)
+    if voice:
+        speaker = voice.group(1).strip()
+    text = MARKUP.sub("", text)
+    if "&" in text:
+        text = html.unescape(text)
+    text = WHITESPACE.sub(" ", text).strip()
+
+    prefixed = None if voice else CUE_SPEAKER.match(text)
+    if prefixed and _is_speaker(prefixed.group(1)):
+        speaker, text = prefixed.group(1).strip(), prefixed.group(2)
+    if not text:
+        return None
+
+    groups = timing.groups()
+    return _timing_seconds(*groups[:4]), _timing_seconds(*groups[4:]), speaker, text
+
+
+# JSON segments
+
+def iter_json_cues(data):
+    """
+    (start, end, speaker, text) for each segment of a JSON segment list
+
+    Accepts Whisper-style {"segments": [...]} or a bare list. Segments need
+    "start" and "text"; "end" and "speaker" (or "speaker_name") are optional.
+    """
+    segments = data.get("segments", []) if isinstance(data, dict) else data
+    speaker = "Unknown"
+    for segment in segments or []:
+        if not isinstance(segment, dict):
+            continue
+        text = WHITESPACE.sub(" ", str(segment.get("text") or "")).strip()
+        if not text:
+            continue
+        start = parse_clock(segment.get("start", segment.get("start_time", 0)))
+        end = segment.get("end", segment.get("end_time"))
+        end = parse_clock(end) if end is not None else start
+        speaker = str(segment.get("speaker") or segment.get("speaker_name") or speaker)
+        yield start, end, speaker, text
+
+
+def merge_cues(cues, max_gap=None, max_seconds=None):
+    """
+    Entries from (start, end, speaker, text) cues, merging consecutive cues of
+    the same speaker into one turn while the pause between them is at most
+    `max_gap` seconds and the turn stays within `max_seconds`
+    """
+    max_gap = Config.CUE_MERGE_MAX_GAP if max_gap is None else max_gap
+    max_seconds = Config.CUE_MERGE_MAX_SECONDS if max_seconds is None else max_seconds
+    turn = None  # [start, end, speaker, text parts]
+
+    for start, end, speaker, text in cues:
+        if (turn is not None and speaker == turn[2]
+                and start - turn[1] <= max_gap and end - turn[0] <= max_seconds):
+            turn[1] = max(turn[1], end)
+            turn[3].append(text)
+            continue
+        if turn is not None:
+            yield make_entry(turn[0], turn[1], turn[2], " ".join(turn[3]))
+        turn = [start, max(start, end), speaker, [text]]
+
+    if turn is not None:
+        yield make_entry(turn[0], turn[1], turn[2], " ".join(turn[3]))
+
+
+# Files
+
+def detect_format(filename, head_lines):
+    """
+    "vtt", "srt", "json" or "text", from the extension or, for .txt/.md
+    uploads, from the first few lines
+    """
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension in ("vtt", "srt", "json"):
+        return extension
+
+    first = next((line.strip() for line in head_lines if line.strip()), "")
+    if first.startswith("WEBVTT"):
+        return "vtt"
+    if any(CUE_TIMING.match(line.strip()) for line in head_lines):
+        return "srt"
+    return "text"
+
+
+def iter_file_entries(filepath, start_time=0, avg_gap=30):
+    """
+    Transcript entries from a file, parsed lazily in a single pass
+
+    Text, WebVTT and SRT files are streamed line by line. A JSON file is one
+    document, so it is loaded whole: segment lists become cues, and a
+    `transcript` or `text` string is parsed as plain text.
+    """
+    if filepath.endswith(".json"):
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            data = None
+
+        if isinstance(data, list) or (isinstance(data, dict) and isinstance(data.get("segments"), list)):
+            yield from merge_cues(iter_json_cues(data))
+            return
+        if isinstance(data, dict) and isinstance(data.get("transcript"), str):
+            content = data["transcript"]
+        elif isinstance(data, dict) and isinstance(data.get("text"), str):
+            content = data["text"]
+        yield from iter_text_entries(io.StringIO(content), start_time, avg_gap)
+        return
+
+    with open(filepath, "r", encoding="utf-8-sig") as f:
+        head = list(islice(f, 5))
+        lines = chain(head, f)
+        file_format = detect_format(filepath, head)
+        if file_format in ("vtt", "srt"):
+            yield from merge_cues(iter_caption_cues(lines))
+        else:
+            yield from iter_text_entries(lines, start_time, avg_gap)
@@ -1,6 +1,34 @@
-from datetime import timedelta
+import io
+import re
 import time
 from config.settings import Config
+from src.tracing import tracer, cohere_chat
+from src import usage
+from src.transcript_formats import iter_file_entries, iter_text_entries
+
+# Word lists for the no-LLM sentiment fallback (used once a meeting is over budget)
+POSITIVE_WORDS = {
+    "good", "great", "thanks", "thank", "agree", "agreed", "awesome", "excellent", "perfect",
+    "happy", "glad", "love", "nice", "done", "works", "working", "sounds", "progress", "ahead"
+}
+NEGATIVE_WORDS = {
+    "bad", "problem", "problems", "issue", "issues", "blocked", "blocker", "delay", "delayed",
+    "late", "worried", "concern", "concerns", "fail", "failed", "failing", "broken", "bug",
+    "bugs", "risk", "behind", "unfortunately", "can't", "cannot", "won't"
+}
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+
+def lexical_sentiment(text):
+    """Word-list sentiment on the same scale as the LLM one (-0.75, 0.0 or 0.75)"""
+    words = WORD_PATTERN.findall(text.lower())
+    score = sum(w in POSITIVE_WORDS for w in words) - sum(w in NEGATIVE_WORDS for w in words)
+    if score > 0:
+        return 0.75
+    if score < 0:
+        return -0.75
+    return 0.0
+
 
 class TranscriptParser:
     """Parse and process meeting transcripts"""
@@ -8,6 +36,7 @@ class TranscriptParser:
     def __init__(self, cohere_client):
         self.cohere_client = cohere_client
     
+    @tracer.traced("parser.parse")
     def parse_transcript_with_timestamps(self, raw_text, start_time=0, avg_gap=30):
         """
         Parse raw transcript and add timestamps
@@ -17,29 +46,23 @@ class TranscriptParser:
             start_time: Starting timestamp in seconds
             avg_gap: Average seconds between messages
         """
-        lines = [line.strip() for line in raw_text.strip().split('\n') if line.strip()]
-        transcript = []
-        current_time = start_time
-
-        for line in lines:
-            if ':' in line:
-                parts = line.split(':', 1)
-                speaker = parts[0].strip()
-                text = parts[1].strip()
-
-                timestamp = str(timedelta(seconds=current_time))
-
-                transcript.append({
-                    "timestamp": timestamp,
-                    "speaker_name": speaker,
-                    "text": text,
-                    "sentiment": None  # Will be filled later
-                })
-
-                # Increment time based on text length
-                current_time += avg_gap + len(text) // 10
+        return list(self.iter_entries(io.StringIO(raw_text), start_time, avg_gap))
+    
+    def iter_entries(self, lines, start_time=0, avg_gap=30):
+        """
+        Parse "Speaker: text" lines lazily (any iterable of lines, e.g. an open file)
 
-        return transcript
+        Yields the same entries as parse_transcript_with_timestamps, one at a time.
+        """
+        return iter_text_entries(lines, start_time, avg_gap)
+    
+    def iter_file(self, filepath, start_time=0, avg_gap=30):
+        """
+        Parse a transcript file lazily, detecting its format: plain text,
+        WebVTT, SRT or JSON (Whisper-style segment lists or a text field).
+        Caption and segment formats carry real start/end times.
+        """
+        return iter_file_entries(filepath, start_time, avg_gap)
     
     def analyze_sentiment(self, text):
         """
@@ -50,7 +73,9 @@ class TranscriptParser:
         Respond with ONLY ONE WORD: positive, neutral, or negative."""
 
         try:
-            response = self.cohere_client.chat(
+            response = cohere_chat(
+                self.cohere_client,
+                "sentiment",
                 model="command-r-v2",
                 preamble=system_prompt,
                 message=f"Analyze sentiment: '{text}'",
@@ -71,16 +96,27 @@ class TranscriptParser:
             print(f"Sentiment analysis error: {e}")
             return 0.0  # Default to neutral on error
     
+    @tracer.traced("parser.add_sentiment")
     def add_sentiment_analysis(self, transcript):
         """Add sentiment analysis to transcript entries"""
+        for _ in self.iter_sentiment(transcript, total=len(transcript)):
+            pass
+        return transcript
+    
+    def iter_sentiment(self, entries, total=None):
+        """Add sentiment to entries as they stream past (any iterable of entries)"""
         print("\nAnalyzing sentiment for each message...")
         
-        for i, entry in enumerate(transcript):
-            entry['sentiment'] = self.analyze_sentiment(entry['text'])
-            # Add delay to avoid hitting rate limits
-            time.sleep(Config.API_DELAY_SECONDS)
+        for i, entry in enumerate(entries):
+            if usage.over_budget("sentiment"):
+                # Meeting budget spent: score the rest locally
+                entry['sentiment'] = lexical_sentiment(entry['text'])
+            else:
+                entry['sentiment'] = self.analyze_sentiment(entry['text'])
+                # Add delay to avoid hitting rate limits
+                time.sleep(Config.API_DELAY_SECONDS)
             if (i + 1) % 5 == 0:
-                print(f"  Processed {i + 1}/{len(transcript)} messages...")
+                print(f"  Processed {i + 1}/{total or '?'} messages...")
+            yield entry
         
         print("✓ Sentiment analysis complete")
-        return transcript
\ No newline at end of file
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config.settings import Config
+
+
+def save_stream(stream, filepath, chunk_size=1024 * 1024):
+    """
+    Copy a file-like stream to `filepath` in chunks, hashing it on the way.
+    Returns (SHA-256 hex digest, bytes written).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(filepath, 'wb') as out:
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class UploadRetention:
+    """
+    Garbage collection for the uploads directory.
+
+    An upload is only read while it is analyzed (the parsed transcript is saved
+    with the meeting, and a retry re-uploads the file), so afterwards it is kept
+    for reference only: files older than Config.UPLOAD_RETENTION_HOURS are
+    deleted, and oldest first while the directory is over Config.UPLOAD_MAX_MB.
+
+    Files held by an analysis are never deleted, whichever worker process
+    holds them: a hold is also a marker file in the directory's .held/
+    subdirectory. Markers older than Config.UPLOAD_HOLD_TIMEOUT_HOURS are
+    taken to be left by a process that died and are removed.
+    """
+
+    HELD_DIR = ".held"
+
+    def __init__(self, directory, max_age_hours=None, max_mb=None, interval=None, hold_timeout_hours=None):
+        self.directory = directory
+        self.max_age_seconds = (Config.UPLOAD_RETENTION_HOURS if max_age_hours is None else max_age_hours) * 3600
+        self.max_bytes = int((Config.UPLOAD_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.interval = Config.UPLOAD_GC_INTERVAL_SECONDS if interval is None else interval
+        self.hold_timeout_seconds = (
+            Config.UPLOAD_HOLD_TIMEOUT_HOURS if hold_timeout_hours is None else hold_timeout_hours
+        ) * 3600
+        self.held_directory = os.path.join(directory, self.HELD_DIR)
+        self._held = {}
+        self._next_run = 0.0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def after_fork(self):
+        """Drop the lock inherited from the parent process"""
+        self._lock = threading.Lock()
+        self._held = {}
+
+    def _marker(self, path):
+        return os.path.join(self.held_directory, f"{os.path.basename(path)}.{os.getpid()}")
+
+    @contextmanager
+    def hold(self, path):
+        """Keep `path` from being collected inside the block, by any process"""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._held[path] = self._held.get(path, 0) + 1
+            if self._held[path] == 1:
+                os.makedirs(self.held_directory, exist_ok=True)
+                open(self._marker(path), 'w').close()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held[path] -= 1
+                if not self._held[path]:
+                    del self._held[path]
+                    try:
+                        os.remove(self._marker(path))
+                    except FileNotFoundError:
+                        pass
+
+    def _held_names(self, now):
+        """Names of the files any process holds, dropping markers past the hold timeout"""
+        names = set()
+        try:
+            entries = list(os.scandir(self.held_directory))
+        except FileNotFoundError:
+            return names
+        for entry in entries:
+            try:
+                if self.hold_timeout_seconds and now - entry.stat().st_mtime > self.hold_timeout_seconds:
+                    os.remove(entry.path)
+                    continue
+            except FileNotFoundError:
+                continue
+            names.add(entry.name.rsplit('.', 1)[0])
+        return names
+
+    def maybe_collect(self):
+        """collect(), at most once per interval; returns its result or None"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_run:
+                return None
+            self._next_run = now + self.interval
+        return self.collect()
+
+    def collect(self):
+        """
+        Delete expired uploads, then the oldest ones until the directory fits
+        the size cap. Returns counts of what was deleted and what is left.
+        """
+        now = time.time()
+        with self._lock:
+            held = set(self._held)
+        held_names = self._held_names(now)
+
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((stat.st_mtime, stat.st_size, os.path.abspath(entry.path)))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        deleted = freed = 0
+        for mtime, size, path in files:
+            expired = self.max_age_seconds and now - mtime > self.max_age_seconds
+            oversized = self.max_bytes and total > self.max_bytes
+            if not (expired or oversized):
+                break  # oldest first: every later file is newer, and the cap is met
+            if path in held or os.path.basename(path) in held_names:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker got there first
+            deleted += 1
+            freed += size
+            total -= size
+
+        result = {
+            'deleted': deleted,
+            'freed_bytes': freed,
+            'files': len(files) - deleted,
+            'bytes': total,
+            'finished_at': now
+        }
+        with self._lock:
+            self._last = result
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'retention_hours': self.max_age_seconds / 3600 or None,
+                'max_mb': self.max_bytes / (1024 * 1024) or None,
+                'held': len(self._held),
+                'last_collection': self._last
+            }
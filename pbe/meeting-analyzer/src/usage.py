@@ -0,0 +1,156 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from config.settings import Config
+
+# Characters per token when a provider does not report usage (English text)
+CHARS_PER_TOKEN = 4
+
+FIELDS = ("calls", "estimated_calls", "tokens_in", "tokens_out", "cost_usd")
+
+_current_ledger = contextvars.ContextVar("usage_ledger", default=None)
+
+
+def estimate_tokens(*texts):
+    """Rough token count of some text for providers that do not report usage"""
+    return (sum(len(text or "") for text in texts) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def call_cost(provider, tokens_in, tokens_out):
+    """USD cost of one call at the configured per-million-token prices"""
+    price_in, price_out = Config.LLM_PRICES_PER_MTOK.get(provider, (0.0, 0.0))
+    return (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+
+
+class UsageLedger:
+    """
+    LLM usage of one operation on a meeting (an analysis, a chat turn).
+
+    `spent_tokens` / `spent_cost` are what the meeting had used before this
+    operation, so over_budget() reflects the meeting as a whole.
+    """
+
+    def __init__(self, meeting_id, endpoint, spent_tokens=0, spent_cost=0.0):
+        self.meeting_id = meeting_id
+        self.endpoint = endpoint
+        self.spent_tokens = spent_tokens
+        self.spent_cost = spent_cost
+        self.degraded = set()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, stage, tokens_in, tokens_out, estimated):
+        with self._lock:
+            row = self._stages.setdefault((stage, provider), dict.fromkeys(FIELDS, 0))
+            row["calls"] += 1
+            row["estimated_calls"] += int(estimated)
+            row["tokens_in"] += tokens_in
+            row["tokens_out"] += tokens_out
+            row["cost_usd"] += call_cost(provider, tokens_in, tokens_out)
+
+    def rows(self):
+        """One row per (stage, provider), in the shape MeetingStore.add_usage takes"""
+        with self._lock:
+            return [
+                dict(row, endpoint=self.endpoint, stage=stage, provider=provider)
+                for (stage, provider), row in self._stages.items()
+            ]
+
+    def total_tokens(self):
+        with self._lock:
+            return self.spent_tokens + sum(r["tokens_in"] + r["tokens_out"] for r in self._stages.values())
+
+    def total_cost(self):
+        with self._lock:
+            return self.spent_cost + sum(r["cost_usd"] for r in self._stages.values())
+
+    def over_budget(self):
+        return exceeds_budget(self.total_tokens(), self.total_cost())
+
+    def summary(self):
+        return dict(summarize(self.rows()), degraded=sorted(self.degraded))
+
+
+@contextmanager
+def track(meeting_id, endpoint, spent_tokens=0, spent_cost=0.0):
+    """Record every LLM call made inside the block on a new UsageLedger"""
+    ledger = UsageLedger(meeting_id, endpoint, spent_tokens, spent_cost)
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def record_llm_call(provider, stage, prompt, completion, tokens_in=None, tokens_out=None):
+    """
+    Account one LLM call on the current ledger (if any).
+
+    Provider-reported counts are used when given; missing ones are estimated
+    from the prompt (a string or a tuple of its parts) and completion text.
+    Returns (tokens_in, tokens_out).
+    """
+    estimated = tokens_in is None or tokens_out is None
+    if tokens_in is None:
+        tokens_in = estimate_tokens(*prompt) if isinstance(prompt, tuple) else estimate_tokens(prompt)
+    if tokens_out is None:
+        tokens_out = estimate_tokens(completion)
+    tokens_in, tokens_out = int(tokens_in), int(tokens_out)
+
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.record(provider, stage, tokens_in, tokens_out, estimated)
+    return tokens_in, tokens_out
+
+
+def over_budget(stage=None):
+    """
+    True once the current meeting has used up its token or cost budget.
+    Callers take a cheaper path then; `stage` is noted on the ledger as degraded.
+    """
+    ledger = _current_ledger.get()
+    if ledger is None or not ledger.over_budget():
+        return False
+    if stage:
+        ledger.degraded.add(stage)
+    return True
+
+
+def exceeds_budget(tokens, cost):
+    return bool(
+        (Config.MEETING_TOKEN_BUDGET and tokens >= Config.MEETING_TOKEN_BUDGET)
+        or (Config.MEETING_COST_BUDGET_USD and cost >= Config.MEETING_COST_BUDGET_USD)
+    )
+
+
+def _add(totals, row):
+    for field in FIELDS:
+        totals[field] = totals.get(field, 0) + row[field]
+
+
+def summarize(rows):
+    """
+    Roll usage rows up into totals and per-stage, per-endpoint and per-provider
+    breakdowns
+    """
+    total = dict.fromkeys(FIELDS, 0)
+    breakdowns = {"by_stage": {}, "by_endpoint": {}, "by_provider": {}}
+    for row in rows:
+        _add(total, row)
+        _add(breakdowns["by_stage"].setdefault(row["stage"], {}), row)
+        _add(breakdowns["by_endpoint"].setdefault(row["endpoint"], {}), row)
+        _add(breakdowns["by_provider"].setdefault(row["provider"], {}), row)
+
+    for totals in [total] + [t for group in breakdowns.values() for t in group.values()]:
+        totals["tokens"] = totals["tokens_in"] + totals["tokens_out"]
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return dict(breakdowns, total=total)
+
+
+def budget_status(total):
+    """Configured budgets and whether `total` (a summarize() total) exceeds them"""
+    return {
+        "token_budget": Config.MEETING_TOKEN_BUDGET or None,
+        "cost_budget_usd": Config.MEETING_COST_BUDGET_USD or None,
+        "over_budget": exceeds_budget(total["tokens"], total["cost_usd"])
+    }
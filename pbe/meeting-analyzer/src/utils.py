@@ -1,4 +1,7 @@
 import json
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
 def export_meeting_analysis(data, filename="meeting_analysis.json"):
@@ -18,9 +21,19 @@ def export_meeting_analysis(data, filename="meeting_analysis.json"):
         json.dump(export_data, f, indent=2, ensure_ascii=False)
     print(f"\n✓ Meeting analysis exported to {filename}")
 
+@contextmanager
+def timed_stage(timings, name):
+    """Add the wall time of the block to timings[name] (seconds)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
 def generate_meeting_id():
     """Generate unique meeting ID"""
-    return f"mtg_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    # Random suffix: uploads finishing in the same second must not collide
+    return f"mtg_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
 
 def demo_questions(chat_interface, processed_data):
     """Run demo Q&A session"""
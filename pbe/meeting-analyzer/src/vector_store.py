@@ -1,102 +1,468 @@
 import uuid
-from qdrant_client.models import PointStruct
+import threading
+from collections import OrderedDict
+import numpy as np
 from config.settings import Config
+from src.embedding_service import INTERACTIVE, BULK
+from src.tracing import tracer
+
+def batched(items, size):
+    """Lists of up to `size` items from any iterable, consumed lazily"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def point_id(meeting_id, kind, index=0):
+    """
+    Stable Qdrant point id for a meeting's line, segment or meeting vector, so
+    storing a meeting again (a retried upload) overwrites instead of duplicating
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"meeting/{meeting_id}/{kind}/{index}"))
+
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return (vector / norm).astype(np.float32).tolist() if norm > 0 else None
+
+
+class LineVectors:
+    """
+    Running summary of a meeting's line vectors, built batch by batch
+
+    Keeps the normalized mean of all lines (the centroid used for off-topic
+    detection) and one mean per Config.SEGMENT_SIZE consecutive lines (the
+    segment vectors for two-stage search): memory grows with the number of
+    segments, not lines.
+    """
+
+    def __init__(self, segment_size=None):
+        self.segment_size = max(1, segment_size or Config.SEGMENT_SIZE)
+        self.count = 0
+        self.segments = []  # (vector, start_offset, end_offset)
+        self.first_segment = 0  # index of segments[0] within the meeting
+        self._total = None
+        self._segment_sum = None
+        self._segment_lines = 0
+        self._segment_start = None
+        self._segment_end = None
+
+    def add(self, vectors, entries):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if self._total is None:
+            self._total = np.zeros(vectors.shape[1], dtype=np.float64)
+        self._total += vectors.sum(axis=0)
+
+        for vector, entry in zip(vectors, entries):
+            if self._segment_lines == 0:
+                self._segment_sum = np.zeros_like(self._total)
+                self._segment_start = entry.get("offset_seconds", 0)
+            self._segment_sum += vector
+            self._segment_lines += 1
+            self._segment_end = entry.get("offset_seconds", 0)
+            if self._segment_lines == self.segment_size:
+                self._close_segment()
+        self.count += len(vectors)
+
+    def _close_segment(self):
+        if self._segment_lines:
+            self.segments.append((_unit(self._segment_sum), self._segment_start, self._segment_end))
+            self._segment_lines = 0
+
+    def finish(self):
+        """Close the last, partial segment"""
+        self._close_segment()
+        return self
+
+    @classmethod
+    def resume(cls, count, centroid, centroid_norm=None, segment_size=None):
+        """
+        Continue after `count` lines stored earlier, from their centroid and
+        centroid_norm(): new lines get the following point ids and start a
+        new segment, and the centroid keeps counting the earlier lines.
+        """
+        line_vectors = cls(segment_size)
+        line_vectors.count = count
+        line_vectors.first_segment = -(-count // line_vectors.segment_size)
+        if centroid is not None and count:
+            # Meetings stored before centroid_norm existed count it as 1
+            line_vectors._total = np.asarray(centroid, dtype=np.float64) * (centroid_norm or 1.0) * count
+        return line_vectors
+
+    def centroid(self):
+        """Normalized mean vector of all lines (None if there are none)"""
+        return _unit(self._total) if self._total is not None else None
+
+    def centroid_norm(self):
+        """Length of the mean line vector before normalization (for resume())"""
+        if self._total is None or not self.count:
+            return None
+        return float(np.linalg.norm(self._total) / self.count)
+
 
 class VectorStore:
     """Handle vector storage and semantic search"""
     
-    def __init__(self, qdrant_client, embedding_model):
+    def __init__(self, qdrant_client, embedding_model, embedding_service=None):
         self.qdrant_client = qdrant_client
         self.embedding_model = embedding_model
+        # Optional EmbeddingService; when set, all encoding goes through its batching queue
+        self.embedding_service = embedding_service
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+    
+    def encode_batch(self, texts):
+        """Embeddings of a batch of texts as a float32 array"""
+        if self.embedding_service is not None:
+            return np.asarray(self.embedding_service.encode(texts, BULK), dtype=np.float32)
+        return np.asarray(self.embedding_model.encode(texts, show_progress_bar=False), dtype=np.float32)
     
+    @tracer.traced("vector_store.embed_batch")
     def generate_embeddings(self, texts):
         """
         Generate embeddings using Sentence Transformers
         """
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
-        return embeddings.tolist()
+        return self.encode_batch(texts).tolist()
+    
+    @tracer.traced("vector_store.embed_query")
+    def embed_query(self, query):
+        """
+        Embed a single query, reusing recent results
+        (the off-topic check and the search embed the same question)
+        """
+        with self._query_cache_lock:
+            if query in self._query_cache:
+                self._query_cache.move_to_end(query)
+                return self._query_cache[query]
+        
+        if self.embedding_service is not None:
+            embedding = self.embedding_service.encode([query], INTERACTIVE)[0].tolist()
+        else:
+            embedding = self.embedding_model.encode([query])[0].tolist()
+        
+        with self._query_cache_lock:
+            self._query_cache[query] = embedding
+            while len(self._query_cache) > 256:
+                self._query_cache.popitem(last=False)
+        return embedding
     
-    def store_transcript_in_qdrant(self, transcript, meeting_id):
+    @tracer.traced("vector_store.store_transcript")
+    def store_transcript_in_qdrant(self, transcript, meeting_id, team_id=None, meeting_ts=None, batch_size=None,
+                                   line_vectors=None):
         """
         Store transcript entries in Qdrant with embeddings
+
+        `transcript` may be any iterable of entries, including a generator:
+        entries are embedded and upserted Config.INGEST_BATCH_SIZE at a time,
+        and their vectors are dropped once folded into the returned LineVectors,
+        so memory does not grow with the transcript.
+
+        Args:
+            team_id: Optional team the meeting belongs to (indexed for search)
+            meeting_ts: Meeting time as a Unix timestamp (indexed for search)
+            line_vectors: LineVectors.resume() of lines stored earlier, when
+                appending to a meeting
+
+        Returns: LineVectors (centroid, segment vectors and line count)
         """
-        # Prepare texts for embedding
-        texts = [f"{entry['speaker_name']}: {entry['text']}" for entry in transcript]
+        from qdrant_client.models import PointStruct
+        
+        batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        line_vectors = LineVectors() if line_vectors is None else line_vectors
+        print(f"\nGenerating embeddings for transcript entries ({batch_size} per batch)...")
+        
+        for batch_number, batch in enumerate(batched(transcript, batch_size), 1):
+            embeddings = self.encode_batch([f"{entry['speaker_name']}: {entry['text']}" for entry in batch])
+            
+            points = [
+                PointStruct(
+                    id=point_id(meeting_id, "line", line_vectors.count + i),
+                    vector=embedding.tolist(),
+                    payload={
+                        "meeting_id": meeting_id,
+                        "timestamp": entry["timestamp"],
+                        "offset_seconds": entry.get("offset_seconds"),
+                        "speaker_name": entry["speaker_name"],
+                        "text": entry["text"],
+                        "sentiment": entry.get("sentiment", "neutral"),
+                        "entry_index": line_vectors.count + i,
+                        "team_id": team_id,
+                        "meeting_ts": meeting_ts
+                    }
+                )
+                for i, (entry, embedding) in enumerate(zip(batch, embeddings))
+            ]
+            with tracer.span("qdrant.upsert", meeting_id=meeting_id, points=len(points)):
+                self.qdrant_client.upsert(
+                    collection_name=Config.COLLECTION_NAME,
+                    points=points
+                )
+            line_vectors.add(embeddings, batch)
+            print(f"  Uploaded batch {batch_number} ({line_vectors.count} entries so far)")
 
-        print(f"\nGenerating embeddings for {len(texts)} transcript entries...")
-        embeddings = self.generate_embeddings(texts)
+        print(f"✓ Stored {line_vectors.count} transcript entries in Qdrant Cloud")
+        return line_vectors.finish()
+    
+    @tracer.traced("vector_store.store_meeting_vectors")
+    def store_meeting_vectors(self, meeting_id, summary_text, topics, line_vectors,
+                              team_id=None, meeting_ts=None):
+        """
+        Store the coarse vectors used by two-stage search
 
-        # Prepare points for Qdrant
+        One vector per meeting (executive summary plus topics) and one per
+        segment of Config.SEGMENT_SIZE consecutive lines. Segment vectors are
+        the normalized mean of the already-computed line vectors (collected in
+        `line_vectors` at ingestion), so only the meeting vector costs an extra encode.
+        After an append, `line_vectors` holds only the new segments, and the
+        meeting vector is replaced.
+        """
+        from qdrant_client.models import PointStruct
+        
         points = []
-        for i, (entry, embedding) in enumerate(zip(transcript, embeddings)):
-            point = PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
+        overview = " ".join([summary_text or ""] + [f"Topic: {t}" for t in topics or []]).strip()
+        if overview:
+            points.append(PointStruct(
+                id=point_id(meeting_id, "meeting"),
+                vector=self.generate_embeddings([overview])[0],
                 payload={
+                    "level": "meeting",
                     "meeting_id": meeting_id,
-                    "timestamp": entry["timestamp"],
-                    "speaker_name": entry["speaker_name"],
-                    "text": entry["text"],
-                    "sentiment": entry.get("sentiment", "neutral"),
-                    "entry_index": i
+                    "team_id": team_id,
+                    "meeting_ts": meeting_ts,
+                    "text": overview
                 }
-            )
-            points.append(point)
+            ))
 
-        # Upload to Qdrant in batches
-        batch_size = 100
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i + batch_size]
+        for segment_index, (vector, start_offset, end_offset) in enumerate(line_vectors.segments,
+                                                                           line_vectors.first_segment):
+            if vector is None:
+                continue
+            points.append(PointStruct(
+                id=point_id(meeting_id, "segment", segment_index),
+                vector=vector,
+                payload={
+                    "level": "segment",
+                    "meeting_id": meeting_id,
+                    "team_id": team_id,
+                    "meeting_ts": meeting_ts,
+                    "segment_index": segment_index,
+                    "start_offset": start_offset,
+                    "end_offset": end_offset
+                }
+            ))
+
+        if points:
             self.qdrant_client.upsert(
-                collection_name=Config.COLLECTION_NAME,
-                points=batch
+                collection_name=Config.SUMMARY_COLLECTION_NAME,
+                points=points
             )
-            print(f"  Uploaded batch {i//batch_size + 1}/{(len(points)-1)//batch_size + 1}")
-
-        print(f"✓ Stored {len(points)} transcript entries in Qdrant Cloud")
+        print(f"✓ Stored {len(points)} meeting/segment vectors")
         return points
     
-    def search_relevant_transcript(self, query, meeting_id, top_k=5):
+    def delete_appended(self, meeting_id, first_index, count, segment_size=None):
+        """
+        Remove the line and segment points an append of `count` lines after
+        `first_index` may have stored (when the append is rolled back)
+        """
+        from qdrant_client.models import PointIdsList
+
+        segment_size = max(1, segment_size or Config.SEGMENT_SIZE)
+        first_segment = -(-first_index // segment_size)
+        last_segment = -(-(first_index + count) // segment_size)
+        for collection, ids in (
+            (Config.COLLECTION_NAME,
+             [point_id(meeting_id, "line", i) for i in range(first_index, first_index + count)]),
+            (Config.SUMMARY_COLLECTION_NAME,
+             [point_id(meeting_id, "segment", i) for i in range(first_segment, last_segment)])
+        ):
+            if ids:
+                self.qdrant_client.delete(collection_name=collection, points_selector=PointIdsList(points=ids))
+
+    @tracer.traced("vector_store.copy_meeting")
+    def copy_meeting(self, source_id, meeting_id, team_id=None, meeting_ts=None, batch_size=None):
+        """
+        Store a copy of every line, segment and meeting vector of `source_id`
+        under `meeting_id` (and its team and time), reusing the stored vectors
+        instead of embedding the transcript again. Returns the points copied.
+        """
+        from qdrant_client.models import PointStruct
+        
+        batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        copied = 0
+        for collection in (Config.COLLECTION_NAME, Config.SUMMARY_COLLECTION_NAME):
+            offset = None
+            while True:
+                records, offset = self.qdrant_client.scroll(
+                    collection_name=collection,
+                    scroll_filter=self.build_filter(meeting_ids=[source_id]),
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                points = []
+                for record in records:
+                    payload = dict(record.payload, meeting_id=meeting_id, team_id=team_id, meeting_ts=meeting_ts)
+                    level = payload.get("level")
+                    if level == "meeting":
+                        new_id = point_id(meeting_id, "meeting")
+                    elif level == "segment":
+                        new_id = point_id(meeting_id, "segment", payload["segment_index"])
+                    else:
+                        new_id = point_id(meeting_id, "line", payload["entry_index"])
+                    points.append(PointStruct(id=new_id, vector=record.vector, payload=payload))
+                if points:
+                    with tracer.span("qdrant.upsert", meeting_id=meeting_id, points=len(points)):
+                        self.qdrant_client.upsert(collection_name=collection, points=points)
+                    copied += len(points)
+                if offset is None:
+                    break
+        print(f"✓ Copied {copied} vectors from meeting {source_id}")
+        return copied
+    
+    @staticmethod
+    def build_filter(meeting_ids=None, team_id=None, speakers=None, start_ts=None, end_ts=None,
+                     start_offset=None, end_offset=None):
+        """
+        Qdrant filter over the indexed payload fields (None if unfiltered)
+
+        Args:
+            start_ts/end_ts: Meeting time range (Unix seconds)
+            start_offset/end_offset: Position within the meeting (seconds from start)
+        """
+        from qdrant_client.models import Filter, FieldCondition, MatchAny, MatchValue, Range
+
+        must = []
+        if meeting_ids:
+            must.append(FieldCondition(key="meeting_id", match=MatchAny(any=list(meeting_ids))))
+        if team_id:
+            must.append(FieldCondition(key="team_id", match=MatchValue(value=team_id)))
+        if speakers:
+            must.append(FieldCondition(key="speaker_name", match=MatchAny(any=list(speakers))))
+        if start_ts is not None or end_ts is not None:
+            must.append(FieldCondition(key="meeting_ts", range=Range(gte=start_ts, lte=end_ts)))
+        if start_offset is not None or end_offset is not None:
+            must.append(FieldCondition(key="offset_seconds", range=Range(gte=start_offset, lte=end_offset)))
+        return Filter(must=must) if must else None
+    
+    @tracer.traced("vector_store.search_meeting")
+    def search_relevant_transcript(self, query, meeting_id, top_k=5, speakers=None,
+                                   start_offset=None, end_offset=None):
         """
         Search for relevant transcript entries using semantic search in Qdrant
+
+        Speaker and offset filters (seconds from meeting start) are applied by
+        Qdrant during the index search.
         """
         try:
             # Generate embedding for the query
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
+            query_embedding = self.embed_query(query)
 
-            # Search in Qdrant using the correct API
-            from qdrant_client.models import Filter, FieldCondition, MatchValue
-            
-            search_results = self.qdrant_client.search(
+            return self.qdrant_client.search(
                 collection_name=Config.COLLECTION_NAME,
                 query_vector=query_embedding,
-                query_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="meeting_id",
-                            match=MatchValue(value=meeting_id)
-                        )
-                    ]
+                query_filter=self.build_filter(
+                    meeting_ids=[meeting_id],
+                    speakers=speakers,
+                    start_offset=start_offset,
+                    end_offset=end_offset
                 ),
                 limit=top_k
             )
-
-            return search_results
         except Exception as e:
+            # Never fall back to an unfiltered search: it scans other meetings
+            # and can return nothing from this one
             print(f"⚠ Search error: {e}")
-            # Fallback to search without filter if there's an issue
-            try:
-                search_results = self.qdrant_client.search(
-                    collection_name=Config.COLLECTION_NAME,
-                    query_vector=query_embedding,
-                    limit=top_k
-                )
-                # Filter results manually by meeting_id
-                filtered_results = [
-                    result for result in search_results 
-                    if result.payload.get("meeting_id") == meeting_id
-                ]
-                return filtered_results[:top_k]
-            except Exception as e2:
-                print(f"⚠ Fallback search also failed: {e2}")
-                return []
\ No newline at end of file
+            return []
+    
+    @tracer.traced("vector_store.search")
+    def search_transcripts(self, query, meeting_ids=None, team_id=None, speakers=None,
+                           start_ts=None, end_ts=None, start_offset=None, end_offset=None,
+                           top_k=10, offset=0):
+        """
+        Semantic search across meetings with payload-indexed filters
+
+        Filters are applied by Qdrant during the index search (meeting_id,
+        team_id, speaker_name, meeting_ts and offset_seconds all have payload
+        indexes), so results are never post-filtered.
+
+        Returns: (results, has_more)
+        """
+        # One extra result tells us whether another page exists
+        results = self.qdrant_client.search(
+            collection_name=Config.COLLECTION_NAME,
+            query_vector=self.embed_query(query),
+            query_filter=self.build_filter(
+                meeting_ids=meeting_ids,
+                team_id=team_id,
+                speakers=speakers,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                start_offset=start_offset,
+                end_offset=end_offset
+            ),
+            limit=top_k + 1,
+            offset=offset
+        )
+        return results[:top_k], len(results) > top_k
+    
+    @tracer.traced("vector_store.search_two_stage")
+    def search_two_stage(self, query, meeting_ids=None, team_id=None, speakers=None,
+                         start_ts=None, end_ts=None, start_offset=None, end_offset=None,
+                         top_k=10, offset=0, candidates=None):
+        """
+        Coarse-to-fine search: pick candidate meetings and segments from the
+        summary collection, then run the line-level search only inside them
+
+        Returns: (results, has_more)
+        """
+        from qdrant_client.models import Filter, FieldCondition, MatchAny, MatchValue, Range
+
+        query_embedding = self.embed_query(query)
+        coarse = self.qdrant_client.search(
+            collection_name=Config.SUMMARY_COLLECTION_NAME,
+            query_vector=query_embedding,
+            query_filter=self.build_filter(
+                meeting_ids=meeting_ids, team_id=team_id, start_ts=start_ts, end_ts=end_ts
+            ),
+            limit=candidates or Config.COARSE_CANDIDATES
+        )
+        if not coarse:
+            return [], False
+
+        # A meeting-level hit opens the whole meeting; a segment hit only its span
+        whole_meetings = {hit.payload["meeting_id"] for hit in coarse if hit.payload.get("level") == "meeting"}
+        scopes = []
+        if whole_meetings:
+            scopes.append(FieldCondition(key="meeting_id", match=MatchAny(any=sorted(whole_meetings))))
+        for hit in coarse:
+            payload = hit.payload
+            if payload.get("level") == "segment" and payload["meeting_id"] not in whole_meetings:
+                scopes.append(Filter(must=[
+                    FieldCondition(key="meeting_id", match=MatchValue(value=payload["meeting_id"])),
+                    FieldCondition(key="offset_seconds", range=Range(
+                        gte=payload.get("start_offset"), lte=payload.get("end_offset")
+                    ))
+                ]))
+
+        fine_filter = self.build_filter(
+            speakers=speakers, start_offset=start_offset, end_offset=end_offset
+        ) or Filter()
+        fine_filter.should = scopes
+
+        results = self.qdrant_client.search(
+            collection_name=Config.COLLECTION_NAME,
+            query_vector=query_embedding,
+            query_filter=fine_filter,
+            limit=top_k + 1,
+            offset=offset
+        )
+        return results[:top_k], len(results) > top_k
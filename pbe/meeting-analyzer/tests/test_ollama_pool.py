@@ -0,0 +1,28 @@
+import unittest
+
+from benchmarks.fake_services import FakeOllama
+from src.ollama_pool import OllamaPool
+
+
+class OllamaPoolRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.ollama = FakeOllama()
+        self.healthy_url = self.ollama.start()
+        self.dead_url = "http://127.0.0.1:1"  # nothing listens on port 1
+
+    def tearDown(self):
+        self.ollama.stop()
+
+    def test_retry_skips_the_endpoint_that_failed(self):
+        # The dead endpoint is listed first so the first attempt goes there
+        pool = OllamaPool([self.dead_url, self.healthy_url], self.ollama.model)
+        result = pool.generate({"model": self.ollama.model, "prompt": "Hello", "stream": False}, timeout=5)
+
+        self.assertIn("response", result)
+        stats = {ep["base_url"]: ep for ep in pool.stats()}
+        self.assertEqual(stats[self.dead_url]["total_failures"], 1)
+        self.assertEqual(stats[self.healthy_url]["total_requests"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+WSGI entry point for pre-fork servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module loads the embedding model in the master process, so
+workers forked from it share the model weights copy-on-write instead of each
+loading a copy. Everything that holds sockets or threads is created per
+worker in after_fork().
+"""
+
+import gc
+import os
+
+# Hugging Face tokenizers deadlock if their thread pool is used before a fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+from config.settings import Config
+
+# Workers warm up after the fork; the master only loads the model
+Config.WARM_UP_ON_START = False
+
+from app import app, clients, meeting_store, checkpoints, upload_retention, chat_interface, embedding_service
+
+clients.embedding_model
+
+# Move everything allocated so far out of the collector's reach, so garbage
+# collection in the workers doesn't write to (and copy) the shared pages
+gc.freeze()
+
+
+def after_fork(worker_count):
+    """Per-worker setup: CPU thread budget, fresh connections, warm-up"""
+    threads = Config.TORCH_THREADS or max(1, (os.cpu_count() or 1) // max(1, worker_count))
+    clients.after_fork(torch_threads=threads)
+    meeting_store.after_fork()
+    checkpoints.after_fork()
+    upload_retention.after_fork()
+    chat_interface.sessions.after_fork()
+    if embedding_service is not None:
+        embedding_service.after_fork()
+    clients.start_warm_up()